@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""SimQuip audit history extraction.
+
+``generate-solution.py`` enables auditing on SimQuip columns, but reading the
+history back means opening records one at a time. This tool pages through
+the ``audits`` table, filtered to the SimQuip tables' ``objecttypecode``,
+and streams every entry to one JSONL file per calendar month:
+
+    <out-dir>/<YYYY-MM>.jsonl
+
+with one line per audit entry::
+
+    {"auditId": ..., "createdOn": ..., "table": "redi_loantransfer",
+     "recordId": ..., "recordName": ..., "userId": ..., "userName": ...,
+     "operation": "Update", "action": "Update",
+     "changes": [{"column": "redi_loanstatus", "old": "100000001", "new": "100000002"}]}
+
+``changedata`` is decoded in both formats Dataverse stores: the JSON
+``changedAttributes`` list (old and new values), and the older ``~``-separated
+old values, matched to columns through ``attributemask`` and each column's
+``ColumnNumber``.
+
+Months are fetched concurrently, one ``createdon`` range per worker, each
+read in order of ``createdon``. After every page is written the month's
+cursor (last ``createdon``, the audit ids at that instant and the file
+length) is saved to ``audit-state.json``, so an interrupted run resumes where
+it stopped: the file is cut back to the saved length and the query restarts
+at the saved ``createdon``. Past months are marked complete and skipped on
+later runs; the current month is picked up again, so a daily run appends
+only new entries. Requests go through the shared service-protection limiter
+and ``--workers`` defaults to 2, so an extraction does not crowd out the app.
+
+Usage: python3 dataverse/audit-extract.py [TABLE ...] [--since YYYY-MM] [--until YYYY-MM] [--out-dir audit]
+                                          [--page-size 5000] [--workers 2]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from dv_client import FORMATTED, FORMATTED_VALUES, MAX_PAGE_SIZE, DataverseClient, DataverseError
+from dv_schema import all_tables, get_table, load_schema
+
+STATE_FILE = "audit-state.json"
+
+AUDIT_COLUMNS = [
+    "auditid", "createdon", "objecttypecode", "_objectid_value", "_userid_value",
+    "operation", "action", "changedata", "attributemask",
+]
+
+# Months fetched when --since is not given and nothing has been extracted yet
+DEFAULT_MONTHS = 12
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# State
+# ═══════════════════════════════════════════════════════════════════════════
+
+class AuditState:
+    """Per-month cursors persisted to ``audit-state.json``."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.months: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            with open(path) as f:
+                self.months = json.load(f)
+
+    def cursor(self, month: str) -> dict[str, Any]:
+        return dict(self.months.get(month, {}))
+
+    def save(self, month: str, cursor: dict[str, Any]) -> None:
+        with self._lock:
+            self.months[month] = cursor
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, "w") as f:
+                json.dump(self.months, f, indent=2, sort_keys=True)
+            temp_path.replace(self.path)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Decoding
+# ═══════════════════════════════════════════════════════════════════════════
+
+def column_numbers(client: DataverseClient, logical_name: str) -> dict[int, str]:
+    """Map each attribute's ``ColumnNumber`` to its logical name, for legacy ``attributemask`` values."""
+    result = client.checked(
+        "GET", f"EntityDefinitions(LogicalName='{logical_name}')/Attributes?$select=LogicalName,ColumnNumber"
+    ) or {}
+    return {a["ColumnNumber"]: a["LogicalName"] for a in result.get("value", []) if a.get("ColumnNumber")}
+
+
+def decode_changes(row: dict[str, Any], columns: dict[int, str]) -> list[dict[str, Any]]:
+    """The changed columns of one audit entry, from JSON or legacy ``~``-separated ``changedata``."""
+    change_data = row.get("changedata") or ""
+    if not change_data:
+        return []
+    if change_data.lstrip().startswith("{"):
+        try:
+            attributes = json.loads(change_data).get("changedAttributes", [])
+        except json.JSONDecodeError:
+            return [{"raw": change_data}]
+        return [
+            {"column": a.get("logicalName"), "old": a.get("oldValue"), "new": a.get("newValue")}
+            for a in attributes
+        ]
+    # Legacy format: ",3,17," in attributemask and "~old3~old17~" in changedata
+    numbers = [int(n) for n in (row.get("attributemask") or "").split(",") if n.strip().isdigit()]
+    # Only the one delimiter at each end: an empty first or last old value is itself "~~"
+    values = change_data.removeprefix("~").removesuffix("~").split("~")
+    if len(values) != len(numbers):
+        return [{"raw": change_data}]
+    return [
+        {"column": columns.get(number, str(number)), "old": value or None}
+        for number, value in zip(numbers, values)
+    ]
+
+
+def decode(row: dict[str, Any], columns: dict[str, dict[int, str]]) -> dict[str, Any]:
+    table = row.get("objecttypecode")
+    return {
+        "auditId": row["auditid"],
+        "createdOn": row["createdon"],
+        "table": table,
+        "recordId": row.get("_objectid_value"),
+        "recordName": row.get(f"_objectid_value{FORMATTED}"),
+        "userId": row.get("_userid_value"),
+        "userName": row.get(f"_userid_value{FORMATTED}"),
+        "operation": row.get(f"operation{FORMATTED}") or row.get("operation"),
+        "action": row.get(f"action{FORMATTED}") or row.get("action"),
+        "changes": decode_changes(row, columns.get(table, {})),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Extraction
+# ═══════════════════════════════════════════════════════════════════════════
+
+def add_months(month: date, count: int) -> date:
+    """The first day of the month ``count`` months after ``month`` (negative counts go back)."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(since: date, until: date) -> list[date]:
+    """First days of every month from ``since`` to ``until`` inclusive."""
+    months, current = [], since.replace(day=1)
+    while current <= until:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+def extract_month(
+    client: DataverseClient,
+    month: date,
+    tables: list[str],
+    columns: dict[str, dict[int, str]],
+    state: AuditState,
+    out_dir: Path,
+    page_size: int,
+) -> tuple[str, int, bool, float]:
+    """Append one month's new audit entries; returns ``(month, rows, complete, seconds)``."""
+    key = month.strftime("%Y-%m")
+    started = time.monotonic()
+    cursor = state.cursor(key)
+    path = out_dir / f"{key}.jsonl"
+    end = add_months(month, 1)
+
+    since = cursor.get("createdon") or f"{month.isoformat()}T00:00:00Z"
+    seen = set(cursor.get("ids", []))
+    tables_filter = " or ".join(f"objecttypecode eq '{name}'" for name in tables)
+    odata_filter = f"({tables_filter}) and createdon ge {since} and createdon lt {end.isoformat()}T00:00:00Z"
+    # Complete only if the month had ended before this read began
+    complete = datetime.now(timezone.utc).date() >= end
+
+    rows = 0
+    with open(path, "a+b") as out:
+        # Drop anything written after the last saved cursor
+        out.truncate(cursor.get("offset", 0))
+        out.seek(0, 2)
+        for page in client.iter_pages(
+            "audits",
+            select=AUDIT_COLUMNS,
+            filter=odata_filter,
+            orderby="createdon asc",
+            page_size=page_size,
+            headers=FORMATTED_VALUES,
+        ):
+            fresh = [row for row in page if row["auditid"] not in seen]
+            for row in fresh:
+                out.write(json.dumps(decode(row, columns), separators=(",", ":")).encode() + b"\n")
+            out.flush()
+            rows += len(fresh)
+            if page:
+                last = page[-1]["createdon"]
+                if last != cursor.get("createdon"):
+                    seen = set()
+                seen.update(row["auditid"] for row in page if row["createdon"] == last)
+                cursor.update(createdon=last, ids=sorted(seen))
+            cursor.update(offset=out.tell(), rows=cursor.get("rows", 0) + len(fresh))
+            state.save(key, cursor)
+    cursor["complete"] = complete
+    state.save(key, cursor)
+    return key, rows, complete, time.monotonic() - started
+
+
+def parse_month(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise ValueError(f"{value!r} is not a YYYY-MM month") from None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Main Execution
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream SimQuip audit history to monthly JSONL files.")
+    parser.add_argument("tables", nargs="*", help="Table logical names (default: all schema tables)")
+    parser.add_argument("--since", help=f"First month, YYYY-MM (default: {DEFAULT_MONTHS} months ago)")
+    parser.add_argument("--until", help="Last month, YYYY-MM (default: this month)")
+    parser.add_argument("--out-dir", type=Path, default=Path("audit"), help="State and month files (default ./audit)")
+    parser.add_argument("--page-size", type=int, default=MAX_PAGE_SIZE, help="odata.maxpagesize (default 5000)")
+    parser.add_argument("--workers", type=int, default=2, help="Months fetched concurrently (default 2)")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    try:
+        tables = [get_table(schema, name)["logicalName"] for name in args.tables] or \
+            [t["logicalName"] for t in all_tables(schema)]
+        today = datetime.now(timezone.utc).date()
+        until = parse_month(args.until) if args.until else today
+        since = parse_month(args.since) if args.since else add_months(today, 1 - DEFAULT_MONTHS)
+    except KeyError as e:
+        print(f"ERROR: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+
+    client = DataverseClient()
+    state = AuditState(args.out_dir / STATE_FILE)
+    months = [m for m in month_range(since, until) if not state.cursor(m.strftime("%Y-%m")).get("complete")]
+    print(f"Extracting audit history for {len(tables)} table(s), {len(months)} month(s) to fetch")
+    if not months:
+        return
+    try:
+        columns = {name: column_numbers(client, name) for name in tables}
+    except DataverseError as e:
+        print(f"ERROR: reading column numbers: {e.message}", file=sys.stderr)
+        sys.exit(1)
+
+    failed = False
+    started = time.monotonic()
+    total = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(extract_month, client, month, tables, columns, state, args.out_dir, args.page_size): month
+            for month in months
+        }
+        for future in as_completed(futures):
+            month = futures[future].strftime("%Y-%m")
+            try:
+                key, rows, complete, elapsed = future.result()
+            except DataverseError as e:
+                print(f"  FAILED {month}: {e.message} (rerun to resume)", file=sys.stderr)
+                failed = True
+                continue
+            total += rows
+            print(f"  {key}: {rows} entries{'' if complete else ' (month still open)'} ({elapsed:.1f}s)")
+    print(f"Wrote {total} audit entries in {time.monotonic() - started:.1f}s")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""SimQuip test data cleanup with server-side BulkDelete jobs.
+
+Resets a dev or test org without thousands of DELETE calls. For each SimQuip
+table in ``schema.json`` a criteria set is built: every row of a
+SimQuip-created table, or only the SimQuip rows of a shared table (its
+``appFilter``, e.g. ``redi_sq_active ne null`` on equipment). The criteria
+are rendered as a ``QueryExpression`` for ``BulkDelete`` and as FetchXML for
+the row counts shown before anything is deleted.
+
+Tables are deleted tier by tier in reverse ``LOAD_TIERS`` order: loans,
+media and contents, then equipment, then locations and team members, then
+teams and levels, then buildings and people. Deleting children first means
+the server never has to clear their lookups one by one (``RemoveLink``).
+The jobs of one tier are submitted together and their ``asyncoperations``
+are polled until all have finished; a failed job stops the later tiers.
+
+Refuses to run against the production org.
+
+Usage: python3 dataverse/cleanup-test-data.py --org-url https://simquip-dev.crm6.dynamics.com
+           [--table redi_loantransfer ...] [--skip-shared] [--dry-run]
+           [--poll-interval 15] [--timeout 3600]
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+from urllib.parse import urlsplit
+from xml.sax.saxutils import quoteattr
+
+from dv_client import ASYNC_FIRST_POLL, DEFAULT_ORG_URL, DataverseClient, DataverseError
+from dv_schema import LOAD_TIERS, app_filter_conditions, entity_set_name, get_table, load_schema, primary_key
+
+# Aggregate FetchXML stops counting at this many rows
+AGGREGATE_LIMIT = 50000
+
+# FetchXML null-test operators and their QueryExpression names
+QUERY_OPERATORS = {"null": "Null", "not-null": "NotNull"}
+
+
+@dataclass
+class Criteria:
+    """Rows of one table to delete, as ``(column, "null" | "not-null")`` conditions ANDed together."""
+
+    table: str
+    conditions: list[tuple[str, str]]
+
+    def query_expression(self) -> dict[str, Any]:
+        return {
+            "EntityName": self.table,
+            "ColumnSet": {"AllColumns": False, "Columns": []},
+            "Distinct": False,
+            "Criteria": {
+                "FilterOperator": "And",
+                "Conditions": [
+                    {"AttributeName": column, "Operator": QUERY_OPERATORS[operator], "Values": []}
+                    for column, operator in self.conditions
+                ],
+            },
+        }
+
+    def count_fetch_xml(self) -> str:
+        conditions = "".join(
+            f"<condition attribute={quoteattr(column)} operator={quoteattr(operator)}/>"
+            for column, operator in self.conditions
+        )
+        return (
+            f'<fetch aggregate="true"><entity name={quoteattr(self.table)}>'
+            f'<attribute name={quoteattr(primary_key(self.table))} alias="rows" aggregate="count"/>'
+            f'<filter type="and">{conditions}</filter></entity></fetch>'
+        )
+
+
+@dataclass
+class Job:
+    criteria: Criteria
+    job_id: str = ""
+    status: str = "Submitted"
+    deleted: int = 0
+    failures: int = 0
+    message: str = ""
+    done: bool = False
+    ok: bool = False
+    started: float = field(default_factory=time.monotonic)
+
+
+def table_criteria(table: dict[str, Any]) -> Criteria:
+    """Criteria for every row, or for a shared table only the rows its ``appFilter`` selects."""
+    logical_name = table["logicalName"]
+    # A condition that every row meets, so a table with no filter is emptied
+    conditions = app_filter_conditions(table) or [(primary_key(logical_name), "not-null")]
+    return Criteria(logical_name, conditions)
+
+
+def deletion_tiers(schema: dict[str, Any], tables: list[str] | None, skip_shared: bool) -> list[list[Criteria]]:
+    """Criteria per tier, children first."""
+    shared = {t["logicalName"] for t in schema.get("sharedTables", [])}
+    tiers = []
+    for tier in reversed(LOAD_TIERS):
+        selected = [
+            table_criteria(get_table(schema, name))
+            for name in tier
+            if (tables is None or name in tables) and not (skip_shared and name in shared)
+        ]
+        if selected:
+            tiers.append(selected)
+    return tiers
+
+
+def count_rows(client: DataverseClient, criteria: Criteria) -> str:
+    """Matching row count for the preview, from an aggregate FetchXML query."""
+    result = client.checked("GET", f"{entity_set_name(criteria.table)}?fetchXml={criteria.count_fetch_xml()}")
+    rows = ((result or {}).get("value") or [{}])[0].get("rows", 0)
+    return f"{rows:,}"
+
+
+def submit(client: DataverseClient, criteria: Criteria, stamp: str) -> str:
+    """Start a BulkDelete job for one table; returns its asyncoperation id."""
+    result = client.checked("POST", "BulkDelete", {
+        "QuerySet": [criteria.query_expression()],
+        "JobName": f"SimQuip cleanup {criteria.table} {stamp}",
+        "SendEmailNotification": False,
+        "ToRecipients": [],
+        "CCRecipients": [],
+        "RecurrencePattern": "",
+        "StartDateTime": stamp,
+        "RunNow": True,
+    })
+    return (result or {})["JobId"]
+
+
+def poll(client: DataverseClient, job: Job) -> None:
+    """Refresh a job from its asyncoperation and, once finished, its bulkdeleteoperation counts."""
+    operation = client.async_operation_status(job.job_id)
+    job.status = operation.status
+    if not operation.done:
+        return
+    job.done, job.ok, job.message = True, operation.ok, operation.message
+    result = client.checked(
+        "GET",
+        f"bulkdeleteoperations?$select=successcount,failurecount&$filter=_asyncoperationid_value eq {job.job_id}",
+    ) or {}
+    for row in result.get("value", []):
+        job.deleted += row.get("successcount") or 0
+        job.failures += row.get("failurecount") or 0
+    if job.failures:
+        job.ok = False
+
+
+def run_tier(client: DataverseClient, tier: list[Criteria], max_interval: float, deadline: float) -> bool:
+    """Submit one tier's jobs and wait for all of them; returns False if any failed."""
+    stamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    jobs = []
+    for criteria in tier:
+        job = Job(criteria)
+        try:
+            job.job_id = submit(client, criteria, stamp)
+        except DataverseError as e:
+            job.done, job.status, job.message = True, "Not submitted", e.message
+        jobs.append(job)
+        print(f"  {criteria.table}: {job.status}{f' ({job.message})' if job.message else ''}")
+
+    interval = ASYNC_FIRST_POLL
+    while not all(job.done for job in jobs):
+        if time.monotonic() > deadline:
+            for job in jobs:
+                if not job.done:
+                    job.done, job.message = True, f"still {job.status.lower()} at the timeout; check System Jobs"
+            break
+        time.sleep(interval)
+        interval = min(interval * 1.5, max_interval)
+        for job in jobs:
+            if job.done:
+                continue
+            try:
+                poll(client, job)
+            except DataverseError as e:
+                print(f"  WARNING: polling {job.criteria.table}: {e.message}", file=sys.stderr)
+                continue
+            if job.done:
+                elapsed = time.monotonic() - job.started
+                print(f"  {job.criteria.table}: {job.status}, {job.deleted:,} deleted, "
+                      f"{job.failures:,} failed ({elapsed:.0f}s)")
+
+    for job in jobs:
+        if not job.ok:
+            print(f"  FAILED {job.criteria.table}: {job.status} {job.message}".rstrip(), file=sys.stderr)
+    return all(job.ok for job in jobs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete SimQuip data from a dev/test org with BulkDelete jobs.")
+    parser.add_argument("--org-url", required=True, help="Dev or test environment to clean")
+    parser.add_argument("--table", action="append", help="Only clean this table (repeatable)")
+    parser.add_argument("--skip-shared", action="store_true",
+                        help="Leave the shared person/location/equipment tables alone")
+    parser.add_argument("--dry-run", action="store_true", help="Count the rows each job would delete")
+    parser.add_argument("--poll-interval", type=float, default=15, help="Longest wait between polls (default 15s)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Give up waiting after this many seconds")
+    args = parser.parse_args()
+
+    if urlsplit(args.org_url).hostname == urlsplit(DEFAULT_ORG_URL).hostname:
+        print("ERROR: Refusing to delete data in production; use a dev or test org", file=sys.stderr)
+        sys.exit(1)
+    schema = load_schema()
+    known = {name for tier in LOAD_TIERS for name in tier}
+    unknown = set(args.table or []) - known
+    if unknown:
+        print(f"ERROR: Unknown table(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        tiers = deletion_tiers(schema, args.table, args.skip_shared)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    client = DataverseClient(args.org_url)
+    print(f"Target: {args.org_url}")
+    for number, tier in enumerate(tiers, 1):
+        for criteria in tier:
+            try:
+                count = count_rows(client, criteria)
+            except DataverseError as e:
+                if "AggregateQueryRecordLimit" not in e.message:
+                    print(f"ERROR: counting {criteria.table}: {e.message}", file=sys.stderr)
+                    sys.exit(1)
+                count = f"over {AGGREGATE_LIMIT:,}"
+            conditions = " and ".join(f"{column} {operator}" for column, operator in criteria.conditions)
+            print(f"  tier {number}: {criteria.table}, {count} rows ({conditions})")
+    if args.dry_run:
+        return
+
+    started = time.monotonic()
+    deadline = started + args.timeout
+    for number, tier in enumerate(tiers, 1):
+        print(f"Tier {number}: {', '.join(c.table for c in tier)}")
+        if not run_tier(client, tier, args.poll_interval, deadline):
+            print("Stopped before the next tier, so no parent rows are deleted while their children remain",
+                  file=sys.stderr)
+            sys.exit(1)
+    print(f"Cleanup finished in {time.monotonic() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
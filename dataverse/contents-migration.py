@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""SimQuip contents-list analysis and migration to redi_equipmentcontent.
+
+``redi_contentslistjson`` holds each kit's contents checklist as a JSON array
+in a memo column of up to 100,000 characters, and every equipment detail
+read downloads it. This tool reads all SimQuip equipment in paged batches and
+reports:
+
+- the size distribution of the JSON (buckets, percentiles, largest items);
+- item counts, legacy plain-string entries, duplicate ids and over-long labels;
+- rows whose JSON does not parse the way ``parseContentsJson`` in
+  ``src/types/contents.ts`` expects.
+
+With ``--migrate`` it then writes the items to the ``redi_equipmentcontent``
+child table, one row per item, using parallel ``CreateMultiple`` chunks.
+Items already present (same equipment and item key) are not created again,
+so re-runs only fill gaps. Afterwards the child rows are re-read and counted
+per equipment. Any mismatch with the parsed lists is reported and the tool
+exits 1. ``--clear-json`` also empties the JSON column on equipment whose
+counts match. Run it only once the app reads contents from the child table.
+
+Usage:
+  python3 dataverse/contents-migration.py [--json report.json]
+  python3 dataverse/contents-migration.py --migrate [--chunk-size 500] [--workers 4] [--clear-json]
+"""
+
+import argparse
+import heapq
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from dv_client import DataverseClient, percentile, run_chunks
+from dv_schema import (
+    app_filter,
+    column_length,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    primary_key,
+)
+
+EQUIPMENT_TABLE = "redi_equipment"
+CONTENTS_COLUMN = "redi_contentslistjson"
+CODE_COLUMN = "redi_equipmentcode"
+CONTENT_TABLE = "redi_equipmentcontent"
+CONTENT_EQUIPMENT_COLUMN = "redi_equipmentid"
+ITEM_KEY_COLUMN = "redi_itemkey"
+
+# Upper bounds (in characters) of the size report buckets
+SIZE_BUCKETS = [(0, "empty"), (1_000, "< 1K"), (10_000, "1K-10K"), (50_000, "10K-50K"), (100_000, "50K-100K")]
+OVERSIZE_BUCKET = ">= 100K"
+
+
+@dataclass
+class ContentsItem:
+    key: str
+    label: str
+    checked: bool
+    last_checked: str | None
+    sort_order: int
+
+
+@dataclass
+class ParsedContents:
+    items: list[ContentsItem]
+    legacy: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    truncated: int = 0
+
+
+def _iso_or_none(value: Any) -> str | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return value
+
+
+def parse_contents(text: str | None, max_label: int, max_key: int) -> ParsedContents:
+    """Parse one contents list the way ``parseContentsJson`` does; raises ``ValueError`` if it cannot.
+
+    Legacy string entries get a stable ``legacy-<index>`` key so re-runs find
+    the rows they created. The app would show invalid JSON as an empty list.
+    """
+    if not text or text == "[]":
+        return ParsedContents([])
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e.msg} at char {e.pos}") from None
+    if not isinstance(data, list):
+        raise ValueError(f"not a JSON array ({type(data).__name__})")
+
+    parsed = ParsedContents([])
+    seen: set[str] = set()
+    for index, entry in enumerate(data):
+        if isinstance(entry, dict) and "id" in entry and "label" in entry:
+            item = ContentsItem(
+                key=str(entry["id"]),
+                label=str(entry["label"]),
+                checked=entry.get("checked") is True,
+                last_checked=_iso_or_none(entry.get("lastChecked")),
+                sort_order=entry["sortOrder"] if isinstance(entry.get("sortOrder"), int) else index,
+            )
+        elif isinstance(entry, str):
+            item = ContentsItem(f"legacy-{index}", entry, False, None, index)
+            parsed.legacy += 1
+        else:
+            parsed.skipped += 1
+            continue
+
+        if len(item.label) > max_label or len(item.key) > max_key:
+            item.label, item.key = item.label[:max_label], item.key[:max_key]
+            parsed.truncated += 1
+        if item.key in seen:
+            item.key = f"{item.key[:max_key - 8]}-dup{index:04d}"
+            parsed.duplicates += 1
+        seen.add(item.key)
+        parsed.items.append(item)
+    return parsed
+
+
+def size_bucket(size: int) -> str:
+    if size == 0:
+        return SIZE_BUCKETS[0][1]
+    return next((name for bound, name in SIZE_BUCKETS[1:] if size < bound), OVERSIZE_BUCKET)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Analysis
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Analysis:
+    def __init__(self) -> None:
+        self.sizes: list[int] = []
+        self.buckets: Counter[str] = Counter()
+        self.largest: list[tuple[int, str]] = []
+        self.lists: dict[str, list[ContentsItem]] = {}
+        self.codes: dict[str, str] = {}
+        self.failures: list[dict[str, str]] = []
+        self.totals: Counter[str] = Counter()
+
+    def add(self, equipment_id: str, code: str, text: str | None, max_label: int, max_key: int) -> None:
+        size = len(text or "")
+        self.sizes.append(size)
+        self.buckets[size_bucket(size)] += 1
+        if len(self.largest) < 10:
+            heapq.heappush(self.largest, (size, code))
+        else:
+            heapq.heappushpop(self.largest, (size, code))
+        self.codes[equipment_id] = code
+        try:
+            parsed = parse_contents(text, max_label, max_key)
+        except ValueError as e:
+            self.failures.append({"equipmentId": equipment_id, "equipmentCode": code, "error": str(e)})
+            return
+        self.lists[equipment_id] = parsed.items
+        self.totals.update({
+            "items": len(parsed.items),
+            "legacy": parsed.legacy,
+            "duplicates": parsed.duplicates,
+            "skipped": parsed.skipped,
+            "truncated": parsed.truncated,
+        })
+
+    def report(self) -> dict[str, Any]:
+        sizes = sorted(self.sizes)
+        counts = [len(items) for items in self.lists.values()]
+        return {
+            "equipment": len(sizes),
+            "withContents": sum(1 for c in counts if c),
+            "totalChars": sum(sizes),
+            "sizeBuckets": {name: self.buckets[name] for _b, name in SIZE_BUCKETS} | {
+                OVERSIZE_BUCKET: self.buckets[OVERSIZE_BUCKET]},
+            "sizePercentiles": {f"p{p}": percentile(sizes, p) for p in (50, 90, 99, 100)} if sizes else {},
+            "largest": [{"equipmentCode": code, "chars": size}
+                        for size, code in sorted(self.largest, reverse=True) if size],
+            "items": dict(self.totals) | {"maxPerEquipment": max(counts, default=0)},
+            "parseFailures": self.failures,
+        }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"  {report['equipment']} equipment, {report['withContents']} with contents, "
+          f"{report['totalChars']:,} chars of contents JSON")
+    print("  Size distribution (chars):")
+    for name, count in report["sizeBuckets"].items():
+        print(f"    {name:<10} {count:>7}")
+    if report["sizePercentiles"]:
+        print("    " + "  ".join(f"{p} {v:,}" for p, v in report["sizePercentiles"].items()))
+    for entry in report["largest"][:5]:
+        print(f"    {entry['equipmentCode']:<24} {entry['chars']:>9,}")
+    items = report["items"]
+    print(f"  {items.get('items', 0)} items (max {items['maxPerEquipment']} per equipment), "
+          f"{items.get('legacy', 0)} legacy strings, {items.get('duplicates', 0)} duplicate ids, "
+          f"{items.get('truncated', 0)} truncated, {items.get('skipped', 0)} unusable entries")
+    failures = report["parseFailures"]
+    print(f"  {len(failures)} parse failures")
+    for failure in failures[:20]:
+        print(f"    {failure['equipmentCode']:<24} {failure['error']}", file=sys.stderr)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Migration
+# ═══════════════════════════════════════════════════════════════════════════
+
+def existing_items(client: DataverseClient) -> dict[str, set[str]]:
+    """Item keys already in the child table, per equipment id."""
+    equipment_ref = lookup_value_column(CONTENT_EQUIPMENT_COLUMN)
+    found: dict[str, set[str]] = {}
+    for row in client.iter_rows(entity_set_name(CONTENT_TABLE), select=[equipment_ref, ITEM_KEY_COLUMN]):
+        found.setdefault(row.get(equipment_ref) or "", set()).add(row.get(ITEM_KEY_COLUMN) or "")
+    return found
+
+
+def content_records(analysis: Analysis, existing: dict[str, set[str]]) -> list[dict[str, Any]]:
+    name_column = f"{CONTENT_TABLE}_name"
+    equipment_set = entity_set_name(EQUIPMENT_TABLE)
+    records = []
+    for equipment_id, items in analysis.lists.items():
+        present = existing.get(equipment_id, set())
+        for item in items:
+            if item.key in present:
+                continue
+            records.append({
+                name_column: item.label,
+                ITEM_KEY_COLUMN: item.key,
+                "redi_checked": item.checked,
+                "redi_lastchecked": item.last_checked,
+                "redi_sortorder": item.sort_order,
+                f"{CONTENT_EQUIPMENT_COLUMN}@odata.bind": f"/{equipment_set}({equipment_id})",
+            })
+    return records
+
+
+def run_parallel(client_call, records: list[dict[str, Any]], chunk_size: int, workers: int, label: str) -> int:
+    """Run one bulk call per chunk on a thread pool; returns the number of records that failed."""
+    failures = run_chunks(client_call, records, chunk_size, workers)
+    for chunk, e in failures:
+        print(f"  FAILED {label} chunk of {len(chunk)}: {e.message}", file=sys.stderr)
+    return sum(len(chunk) for chunk, _e in failures)
+
+
+def verify(client: DataverseClient, analysis: Analysis) -> tuple[list[dict[str, Any]], set[str]]:
+    """Compare child-row counts with the parsed lists; returns mismatches and the equipment that matched."""
+    existing = existing_items(client)
+    mismatches, matched = [], set()
+    for equipment_id, items in analysis.lists.items():
+        expected = {item.key for item in items}
+        actual = existing.get(equipment_id, set())
+        if expected <= actual and len(actual) == len(expected):
+            matched.add(equipment_id)
+            continue
+        mismatches.append({
+            "equipmentCode": analysis.codes[equipment_id],
+            "expected": len(expected),
+            "actual": len(actual),
+            "missing": len(expected - actual),
+        })
+    return mismatches, matched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Analyse contents-list JSON and migrate it to redi_equipmentcontent.")
+    parser.add_argument("--page-size", type=int, default=200,
+                        help="Equipment rows per page; the JSON makes rows large (default 200)")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON")
+    parser.add_argument("--migrate", action="store_true", help="Create the child rows and verify their counts")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Items per CreateMultiple call (default 500)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent bulk requests (default 4)")
+    parser.add_argument("--clear-json", action="store_true",
+                        help="With --migrate, empty the JSON column on equipment whose counts verified")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    equipment_table = get_table(schema, EQUIPMENT_TABLE)
+    content_table = get_table(schema, CONTENT_TABLE)
+    max_key = column_length(content_table, ITEM_KEY_COLUMN)
+    max_label = 200  # primary name column length, as provisioned
+
+    client = DataverseClient()
+    started = time.monotonic()
+    analysis = Analysis()
+    pk = primary_key(EQUIPMENT_TABLE)
+    for page in client.iter_pages(
+        entity_set_name(EQUIPMENT_TABLE),
+        select=[pk, CODE_COLUMN, CONTENTS_COLUMN],
+        filter=app_filter(equipment_table),
+        page_size=args.page_size,
+    ):
+        for row in page:
+            analysis.add(row[pk], row.get(CODE_COLUMN) or row[pk], row.get(CONTENTS_COLUMN), max_label, max_key)
+    report = analysis.report()
+    print(f"Read {report['equipment']} equipment items ({time.monotonic() - started:.1f}s)")
+    print_report(report)
+
+    failed = 0
+    if args.migrate:
+        records = content_records(analysis, existing_items(client))
+        print(f"\nCreating {len(records)} {CONTENT_TABLE} rows...")
+        failed = run_parallel(
+            lambda chunk: client.create_multiple(entity_set_name(CONTENT_TABLE), CONTENT_TABLE, chunk),
+            records, args.chunk_size, args.workers, "create",
+        )
+        mismatches, matched = verify(client, analysis)
+        report["migration"] = {"created": len(records) - failed, "failed": failed, "mismatches": mismatches}
+        print(f"  Created {len(records) - failed}, {failed} failed; "
+              f"{len(matched)} equipment verified, {len(mismatches)} count mismatches")
+        for mismatch in mismatches[:20]:
+            print(f"    {mismatch['equipmentCode']:<24} expected {mismatch['expected']}, "
+                  f"found {mismatch['actual']} ({mismatch['missing']} missing)", file=sys.stderr)
+        failed += len(mismatches)
+
+        if args.clear_json:
+            # Only non-empty lists that verified; equipment whose JSON failed to parse is never in ``lists``
+            to_clear = [{pk: eid, CONTENTS_COLUMN: None} for eid in sorted(matched) if analysis.lists[eid]]
+            cleared_failed = run_parallel(
+                lambda chunk: client.update_multiple(entity_set_name(EQUIPMENT_TABLE), EQUIPMENT_TABLE, chunk),
+                to_clear, args.chunk_size, args.workers, "clear",
+            )
+            report["migration"]["cleared"] = len(to_clear) - cleared_failed
+            print(f"  Cleared {CONTENTS_COLUMN} on {len(to_clear) - cleared_failed} equipment")
+            failed += cleared_failed
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+    print(f"Done ({time.monotonic() - started:.1f}s)")
+    if failed or report["parseFailures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
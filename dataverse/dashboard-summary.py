@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""SimQuip dashboard summary refresh.
+
+The dashboard only shows counts and the open-loan cards, yet it used to read
+every loan, every equipment item, every team and every person to work them
+out in the browser. This job precomputes those figures into
+``redi_dashboardmetric``, one row per metric, so the page reads a handful of
+rows instead:
+
+- ``equipment-by-status``: SimQuip equipment (its ``appFilter``) counted per
+  ``redi_sq_status``;
+- ``loans-by-team``: loans counted per status, for each team as origin
+  (outgoing) and as recipient (incoming);
+- ``open-loans``: the Active and Overdue loans the dashboard lists, with the
+  equipment, team and approver names already resolved;
+- ``overdue-loans``: the subset of those that are Overdue, or Active and past
+  their due date.
+
+The counts come from aggregate FetchXML (``groupby`` / ``count``), so the
+server returns one row per group rather than the rows themselves. Aggregate
+queries stop at 50,000 rows; past that the counts fall back to a paged read
+of just the grouped columns. Team names come back as formatted values, so no
+team or person table is read at all. The loan lists are one filtered, paged
+read; they are capped at ``--max-loans`` and trimmed further if needed to fit
+``redi_payloadjson``, with ``truncated`` set in the payload either way.
+
+Metric rows are written with one ``UpsertMultiple`` addressed by
+``redi_metrickey``, so the first run creates them and later runs overwrite
+them. Run from cron / a scheduled task, or keep it running with
+``--interval``.
+
+Usage: python3 dataverse/dashboard-summary.py [--as-of YYYY-MM-DD] [--max-loans 200] [--dry-run]
+                                              [--interval SECONDS]
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any
+from xml.sax.saxutils import quoteattr
+
+from dv_client import FORMATTED, FORMATTED_VALUES, DataverseClient, DataverseError
+from dv_schema import (
+    alternate_key_ref,
+    app_filter,
+    app_filter_conditions,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    option_values,
+    primary_key,
+    primary_name_column,
+)
+
+METRIC_TABLE = "redi_dashboardmetric"
+METRIC_KEY_COLUMN = "redi_metrickey"
+PAYLOAD_COLUMN = "redi_payloadjson"
+
+EQUIPMENT_TABLE = "redi_equipment"
+EQUIPMENT_STATUS_COLUMN = "redi_sq_status"
+EQUIPMENT_CODE_COLUMN = "redi_equipmentcode"
+
+LOAN_TABLE = "redi_loantransfer"
+LOAN_STATUS_COLUMN = "redi_loanstatus"
+DUE_DATE_COLUMN = "redi_duedate"
+START_DATE_COLUMN = "redi_startdate"
+LOAN_EQUIPMENT_COLUMN = "redi_equipmentid"
+ORIGIN_TEAM_COLUMN = "redi_originteamid"
+RECIPIENT_TEAM_COLUMN = "redi_recipientteamid"
+APPROVER_COLUMN = "redi_approverpersonid"
+
+
+@dataclass
+class GroupCounts:
+    """Row counts per combination of the grouped columns' values, with their display labels."""
+
+    counts: Counter = field(default_factory=Counter)
+    labels: dict[tuple[str, Any], str] = field(default_factory=dict)
+
+    def label(self, column: str, value: Any) -> str:
+        return self.labels.get((column, value)) or ("(none)" if value is None else str(value))
+
+
+def fetch_conditions(table: dict[str, Any]) -> str:
+    """The table's ``appFilter`` as a FetchXML filter (only null tests are supported)."""
+    conditions = "".join(
+        f"<condition attribute={quoteattr(column)} operator={quoteattr(operator)}/>"
+        for column, operator in app_filter_conditions(table)
+    )
+    return f'<filter type="and">{conditions}</filter>' if conditions else ""
+
+
+def group_counts(client: DataverseClient, table: dict[str, Any], columns: list[str]) -> GroupCounts:
+    """Count rows per value of ``columns`` server-side, or by a paged read past the aggregate limit."""
+    logical_name = table["logicalName"]
+    lookups = {c["logicalName"] for c in table["columns"] if c["type"] == "Lookup"}
+    groups = "".join(
+        f'<attribute name={quoteattr(column)} alias="g{i}" groupby="true"/>' for i, column in enumerate(columns)
+    )
+    fetch_xml = (
+        f'<fetch aggregate="true"><entity name={quoteattr(logical_name)}>{groups}'
+        f'<attribute name={quoteattr(primary_key(logical_name))} alias="rows" aggregate="count"/>'
+        f"{fetch_conditions(table)}</entity></fetch>"
+    )
+    result = GroupCounts()
+    try:
+        response = client.checked(
+            "GET", f"{entity_set_name(logical_name)}?fetchXml={fetch_xml}", headers=FORMATTED_VALUES
+        ) or {}
+    except DataverseError as e:
+        if "AggregateQueryRecordLimit" not in e.message:
+            raise
+        properties = [lookup_value_column(c) if c in lookups else c for c in columns]
+        for row in client.iter_rows(
+            entity_set_name(logical_name), select=properties, filter=app_filter(table), headers=FORMATTED_VALUES
+        ):
+            key = tuple(row.get(p) for p in properties)
+            result.counts[key] += 1
+            for column, prop, value in zip(columns, properties, key):
+                if row.get(prop + FORMATTED):
+                    result.labels[(column, value)] = row[prop + FORMATTED]
+        return result
+
+    for row in response.get("value", []):
+        key = tuple(row.get(f"g{i}") for i in range(len(columns)))
+        result.counts[key] += row.get("rows") or 0
+        for i, (column, value) in enumerate(zip(columns, key)):
+            if row.get(f"g{i}{FORMATTED}"):
+                result.labels[(column, value)] = row[f"g{i}{FORMATTED}"]
+    return result
+
+
+def equipment_by_status(client: DataverseClient, schema: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+    table = get_table(schema, EQUIPMENT_TABLE)
+    col = next(c for c in table["columns"] if c["logicalName"] == EQUIPMENT_STATUS_COLUMN)
+    grouped = group_counts(client, table, [EQUIPMENT_STATUS_COLUMN])
+    by_value = {value: count for (value,), count in grouped.counts.items()}
+    # Every status appears, in option order, so the page can render zeros
+    statuses = [
+        {"status": label, "value": value, "count": by_value.pop(value, 0)}
+        for label, value in option_values(col).items()
+    ]
+    statuses += [
+        {"status": grouped.label(EQUIPMENT_STATUS_COLUMN, value), "value": value, "count": count}
+        for value, count in by_value.items()
+    ]
+    return sum(s["count"] for s in statuses), {"statuses": statuses}
+
+
+def loans_by_team(client: DataverseClient, schema: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+    table = get_table(schema, LOAN_TABLE)
+    teams: dict[Any, dict[str, Any]] = {}
+    total = 0
+    for direction, column in (("outgoing", ORIGIN_TEAM_COLUMN), ("incoming", RECIPIENT_TEAM_COLUMN)):
+        grouped = group_counts(client, table, [column, LOAN_STATUS_COLUMN])
+        for (team_id, status), count in grouped.counts.items():
+            team = teams.setdefault(team_id, {
+                "teamId": team_id,
+                "teamName": grouped.label(column, team_id),
+                "outgoing": {},
+                "incoming": {},
+            })
+            label = grouped.label(LOAN_STATUS_COLUMN, status)
+            team[direction][label] = team[direction].get(label, 0) + count
+            if direction == "outgoing":
+                total += count
+    return total, {"teams": sorted(teams.values(), key=lambda t: t["teamName"].casefold())}
+
+
+def read_open_loans(client: DataverseClient, schema: dict[str, Any], as_of: date) -> list[dict[str, Any]]:
+    """Active and Overdue loans, soonest due first, shaped like the dashboard's cards."""
+    col = next(c for c in get_table(schema, LOAN_TABLE)["columns"] if c["logicalName"] == LOAN_STATUS_COLUMN)
+    statuses = option_values(col)
+    pk = primary_key(LOAN_TABLE)
+    lookups = {
+        "equipment": lookup_value_column(LOAN_EQUIPMENT_COLUMN),
+        "originTeam": lookup_value_column(ORIGIN_TEAM_COLUMN),
+        "recipientTeam": lookup_value_column(RECIPIENT_TEAM_COLUMN),
+        "approverPerson": lookup_value_column(APPROVER_COLUMN),
+    }
+    loans = []
+    for row in client.iter_rows(
+        entity_set_name(LOAN_TABLE),
+        select=[pk, primary_name_column(get_table(schema, LOAN_TABLE)), START_DATE_COLUMN, DUE_DATE_COLUMN,
+                LOAN_STATUS_COLUMN, *lookups.values()],
+        filter=f"{LOAN_STATUS_COLUMN} eq {statuses['Active']} or {LOAN_STATUS_COLUMN} eq {statuses['Overdue']}",
+        orderby=f"{DUE_DATE_COLUMN} asc",
+        expand=f"{LOAN_EQUIPMENT_COLUMN}($select={EQUIPMENT_CODE_COLUMN})",
+        headers=FORMATTED_VALUES,
+    ):
+        due = row.get(DUE_DATE_COLUMN)
+        loan = {
+            "loanTransferId": row[pk],
+            "status": row.get(f"{LOAN_STATUS_COLUMN}{FORMATTED}") or str(row.get(LOAN_STATUS_COLUMN)),
+            "startDate": row.get(START_DATE_COLUMN),
+            "dueDate": due,
+            "overdue": row.get(LOAN_STATUS_COLUMN) == statuses["Overdue"]
+            or bool(due and date.fromisoformat(due[:10]) < as_of),
+            "equipmentCode": (row.get(LOAN_EQUIPMENT_COLUMN) or {}).get(EQUIPMENT_CODE_COLUMN),
+        }
+        for name, prop in lookups.items():
+            loan[f"{name}Id"] = row.get(prop)
+            loan[f"{name}Name"] = row.get(prop + FORMATTED)
+        loans.append(loan)
+    return loans
+
+
+def loan_list_payload(loans: list[dict[str, Any]], max_loans: int, max_length: int) -> dict[str, Any]:
+    """The first ``max_loans`` loans, fewer if the JSON would not fit the payload column."""
+    shown = loans[:max_loans]
+    while True:
+        payload = {"loans": shown, "truncated": len(shown) < len(loans)}
+        if len(json.dumps(payload)) <= max_length or not shown:
+            return payload
+        shown = shown[: len(shown) * 9 // 10]
+
+
+def compute_metrics(
+    client: DataverseClient, schema: dict[str, Any], as_of: date, max_loans: int
+) -> dict[str, tuple[int, dict[str, Any]]]:
+    """Every metric as ``key -> (total, payload)``."""
+    max_length = next(
+        c.get("maxLength", 100000) for c in get_table(schema, METRIC_TABLE)["columns"]
+        if c["logicalName"] == PAYLOAD_COLUMN
+    )
+    open_loans = read_open_loans(client, schema, as_of)
+    overdue = [loan for loan in open_loans if loan["overdue"]]
+    return {
+        "equipment-by-status": equipment_by_status(client, schema),
+        "loans-by-team": loans_by_team(client, schema),
+        "open-loans": (len(open_loans), loan_list_payload(open_loans, max_loans, max_length)),
+        "overdue-loans": (len(overdue), loan_list_payload(overdue, max_loans, max_length)),
+    }
+
+
+def write_metrics(client: DataverseClient, schema: dict[str, Any], metrics: dict[str, tuple[int, dict[str, Any]]],
+                  computed_on: datetime) -> None:
+    name_column = primary_name_column(get_table(schema, METRIC_TABLE))
+    stamp = computed_on.strftime("%Y-%m-%dT%H:%M:%SZ")
+    records = [
+        {
+            "@odata.id": alternate_key_ref(METRIC_TABLE, {METRIC_KEY_COLUMN: key}),
+            METRIC_KEY_COLUMN: key,
+            name_column: key,
+            "redi_total": total,
+            PAYLOAD_COLUMN: json.dumps({**payload, "computedOn": stamp}, separators=(",", ":")),
+            "redi_computedon": stamp,
+        }
+        for key, (total, payload) in metrics.items()
+    ]
+    client.upsert_multiple(entity_set_name(METRIC_TABLE), METRIC_TABLE, records)
+
+
+def refresh(client: DataverseClient, schema: dict[str, Any], args: argparse.Namespace) -> bool:
+    """Recompute and write every metric; returns False on failure."""
+    started = time.monotonic()
+    as_of = date.fromisoformat(args.as_of) if args.as_of else date.today()
+    try:
+        metrics = compute_metrics(client, schema, as_of, args.max_loans)
+    except DataverseError as e:
+        print(f"  FAILED computing metrics: {e.message}", file=sys.stderr)
+        return False
+    for key, (total, payload) in metrics.items():
+        note = ", truncated" if payload.get("truncated") else ""
+        print(f"  {key}: {total}{note}")
+    if args.dry_run:
+        return True
+    try:
+        write_metrics(client, schema, metrics, datetime.now(timezone.utc))
+    except DataverseError as e:
+        print(f"  FAILED writing metrics: {e.message}", file=sys.stderr)
+        return False
+    print(f"Refreshed {len(metrics)} dashboard metrics ({time.monotonic() - started:.1f}s)")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute the dashboard's counts and loan lists.")
+    parser.add_argument("--as-of", help="Treat this date (YYYY-MM-DD) as today when flagging overdue loans")
+    parser.add_argument("--max-loans", type=int, default=200, help="Loans kept in each list (default 200)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the metrics without writing them")
+    parser.add_argument("--interval", type=int, help="Repeat every N seconds instead of running once")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    try:
+        fetch_conditions(get_table(schema, EQUIPMENT_TABLE))
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    client = DataverseClient()
+
+    if not args.interval:
+        sys.exit(0 if refresh(client, schema, args) else 1)
+    while True:
+        refresh(client, schema, args)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
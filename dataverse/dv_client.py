@@ -0,0 +1,672 @@
+"""Shared Dataverse Web API client for the SimQuip data tools.
+
+Generalises the request helpers in provision-tables.py (PAC CLI token,
+OData headers, ``_error`` result dicts) into a small thread-safe client
+that keeps one persistent connection per worker thread, follows
+``@odata.nextLink`` paging and wraps the bulk ``CreateMultiple`` /
+``UpdateMultiple`` / ``UpsertMultiple`` messages, OData ``$batch`` and
+block transfers to and from file columns.
+
+Only the standard library is used, matching the other scripts in this
+directory.
+"""
+
+import base64
+import gzip
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from urllib.parse import quote, urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows: the shared limiter falls back to pacing one process
+    fcntl = None
+
+DEFAULT_ORG_URL = "https://redi.crm6.dynamics.com"
+API_VERSION = "v9.2"
+TOKEN_CACHE_PATH = Path.home() / ".local/share/Microsoft/PowerAppsCli/tokencache_msalv3.dat"
+
+# Service-protection (429) and gateway errors are retried with Retry-After
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 5
+MAX_PAGE_SIZE = 5000
+
+# UploadBlock accepts blocks of up to 4 MB
+MAX_FILE_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Service protection allows each user 6,000 requests and 20 minutes of
+# combined execution time per 5-minute window
+PROTECTION_WINDOW = 300
+WINDOW_REQUESTS = 6000
+WINDOW_EXECUTION_SECONDS = 1200
+
+# Budgets are spread evenly over the window at 90% of the limits, so a long
+# run (or several tools at once) is paced just under them rather than throttled
+BUDGET_FRACTION = 0.9
+DEFAULT_RATE = WINDOW_REQUESTS / PROTECTION_WINDOW * BUDGET_FRACTION
+DEFAULT_EXECUTION_RATE = WINDOW_EXECUTION_SECONDS / PROTECTION_WINDOW * BUDGET_FRACTION
+
+# Shared limiter state, one file per org, under the user's profile (the limits are per user)
+RATE_LIMIT_DIR = Path.home() / ".cache/simquip"
+# Execution time reserved per request until some have been measured
+INITIAL_EXECUTION_ESTIMATE = 0.2
+
+# asyncoperation statecode / statuscode values
+ASYNC_STATE_COMPLETED = 3
+ASYNC_STATUS_SUCCEEDED = 30
+ASYNC_STATUS_NAMES = {30: "Succeeded", 31: "Failed", 32: "Canceled"}
+# Seconds before the first poll of a system job; tools back off from here
+ASYNC_FIRST_POLL = 2.0
+
+# Prefer header asking for display labels, returned as ``<column>@OData.Community.Display.V1.FormattedValue``
+FORMATTED = "@OData.Community.Display.V1.FormattedValue"
+FORMATTED_VALUES = {"Prefer": 'odata.include-annotations="OData.Community.Display.V1.FormattedValue"'}
+
+# Characters left unescaped in OData query strings
+QUERY_SAFE_CHARS = "=&$,/:'()@"
+
+
+class DataverseError(RuntimeError):
+    """Raised by the higher-level helpers when a Web API call fails."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+def get_token(org_url: str = DEFAULT_ORG_URL) -> str:
+    """Return the cached PAC CLI access token for the given org."""
+    host = urlsplit(org_url).hostname or ""
+    with open(TOKEN_CACHE_PATH) as f:
+        data = json.load(f)
+    for _k, v in data["AccessToken"].items():
+        if host in v.get("target", ""):
+            return v["secret"]
+    print(f"ERROR: No Dataverse token for {host} found in PAC CLI cache", file=sys.stderr)
+    print(f"Run: pac auth create --environment {org_url}", file=sys.stderr)
+    sys.exit(1)
+
+
+class RateLimiter:
+    """Thread-safe token bucket pacing the requests of one client."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int | None = None):
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+    def settle(self, elapsed: float) -> None:
+        """Account for a request that took ``elapsed`` seconds; only request counts are paced here."""
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request for ``seconds``, e.g. after a 429 with ``Retry-After``."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def close(self) -> None:
+        """Release anything the limiter holds open."""
+
+
+class SharedRateLimiter(RateLimiter):
+    """Token buckets shared by every SimQuip tool the user runs against one org.
+
+    Service-protection limits are per user, so the provisioner, an export and
+    the sweeper running side by side draw on one budget. Two buckets refill
+    at :data:`DEFAULT_RATE` requests and :data:`DEFAULT_EXECUTION_RATE`
+    execution seconds per second. Each request takes one request token and
+    reserves the average execution time seen so far; :meth:`settle` corrects
+    the reservation once the real time is known. A 429 from any process
+    pauses them all until its ``Retry-After`` has passed.
+
+    The state is a small JSON file in :data:`RATE_LIMIT_DIR` updated under an
+    exclusive ``flock``. Where ``fcntl`` is unavailable (Windows), the
+    buckets pace this process only.
+    """
+
+    def __init__(
+        self,
+        org_url: str,
+        rate: float = DEFAULT_RATE,
+        execution_rate: float = DEFAULT_EXECUTION_RATE,
+        state_dir: Path = RATE_LIMIT_DIR,
+    ):
+        super().__init__(rate)
+        self.execution_rate = execution_rate
+        self.execution_capacity = max(1.0, execution_rate)
+        host = urlsplit(org_url).netloc or org_url
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.path = state_dir / f"ratelimit-{host.replace(':', '_')}.json"
+        self._fd: int | None = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    @contextmanager
+    def _state(self) -> Iterator[dict[str, float]]:
+        """Read, refill and yield the shared buckets; changes are written back on exit."""
+        with self._lock:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                try:
+                    saved = json.loads(os.read(self._fd, 4096) or b"{}")
+                except ValueError:
+                    saved = {}  # written by a process killed mid-write; start full
+                now = time.time()
+                elapsed = max(0.0, now - saved.get("updated", now))
+                state = {
+                    "requests": min(self.capacity, saved.get("requests", self.capacity) + elapsed * self.rate),
+                    "execution": min(
+                        self.execution_capacity,
+                        saved.get("execution", self.execution_capacity) + elapsed * self.execution_rate,
+                    ),
+                    "average": saved.get("average", INITIAL_EXECUTION_ESTIMATE),
+                    "updated": now,
+                }
+                yield state
+                data = json.dumps(state).encode()
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.write(self._fd, data)
+                os.ftruncate(self._fd, len(data))
+            finally:
+                if fcntl:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def acquire(self) -> None:
+        with self._state() as state:
+            state["requests"] -= 1
+            state["execution"] -= state["average"]
+            wait = max(0.0, -state["requests"] / self.rate, -state["execution"] / self.execution_rate)
+        if wait:
+            time.sleep(wait)
+
+    def settle(self, elapsed: float) -> None:
+        with self._state() as state:
+            state["execution"] -= elapsed - state["average"]
+            state["average"] += (elapsed - state["average"]) * 0.1
+
+    def pause(self, seconds: float) -> None:
+        with self._state() as state:
+            state["requests"] = min(state["requests"], -seconds * self.rate)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __del__(self) -> None:
+        if getattr(self, "_fd", None) is not None:
+            os.close(self._fd)
+
+
+@dataclass
+class AsyncOperationStatus:
+    """Where a system job (``asyncoperation``) stands, as read by :meth:`DataverseClient.async_operation_status`."""
+
+    status: str
+    done: bool = False
+    ok: bool = False
+    message: str = ""
+
+
+def chunked(items: list[Any], size: int) -> Iterator[list[Any]]:
+    """Yield successive slices of ``items`` with at most ``size`` entries."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_chunks(
+    call: Callable[[list[Any]], Any], items: list[Any], chunk_size: int, workers: int
+) -> list[tuple[list[Any], DataverseError]]:
+    """Run ``call`` on each :func:`chunked` slice of ``items`` on a thread pool.
+
+    Returns the chunks whose call raised :class:`DataverseError`, each with its
+    error, so the caller can report them and count the records that failed.
+    """
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(call, chunk): chunk for chunk in chunked(items, chunk_size)}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except DataverseError as e:
+                failures.append((futures[future], e))
+    return failures
+
+
+def percentile(sorted_values: list[Any], pct: float) -> Any:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class DataverseClient:
+    """Thread-safe Dataverse Web API client for one environment.
+
+    Requests are paced by ``limiter``, by default the :class:`SharedRateLimiter`
+    for the org. Pass ``shared_limit=False`` (and no limiter) to send unpaced.
+    """
+
+    def __init__(
+        self,
+        org_url: str = DEFAULT_ORG_URL,
+        token: str | None = None,
+        limiter: RateLimiter | None = None,
+        shared_limit: bool = True,
+    ):
+        self.org_url = org_url.rstrip("/")
+        self.api_base = f"{self.org_url}/api/data/{API_VERSION}"
+        self.token = token or get_token(self.org_url)
+        if limiter is None and shared_limit:
+            limiter = SharedRateLimiter(self.org_url)
+        self.limiter = limiter
+        parts = urlsplit(self.api_base)
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._base_path = parts.path
+        self._local = threading.local()
+
+    # ── Transport ────────────────────────────────────────────────────────
+
+    def _connection(self) -> HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn_cls = HTTPSConnection if self._scheme == "https" else HTTPConnection
+            conn = conn_cls(self._netloc, timeout=120)
+            self._local.conn = conn
+        return conn
+
+    def _reset_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def _target(self, path: str) -> str:
+        """Encode a path relative to the API base, preserving OData query structure."""
+        if path.startswith("http"):
+            parts = urlsplit(path)
+            return f"{parts.path}?{parts.query}" if parts.query else parts.path
+        if "?" in path:
+            base, query = path.split("?", 1)
+            return f"{self._base_path}/{base}?{quote(query, safe=QUERY_SAFE_CHARS)}"
+        return f"{self._base_path}/{path}"
+
+    def _headers(self, extra: dict[str, str] | None) -> dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "OData-MaxVersion": "4.0",
+            "OData-Version": "4.0",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip",
+            "Content-Type": "application/json",
+        }
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def send(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Send a raw request, retrying throttled and dropped calls.
+
+        Returns ``(status, headers, body)`` with the body already decompressed.
+        """
+        target = self._target(path)
+        all_headers = self._headers(headers)
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.limiter:
+                self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                conn = self._connection()
+                conn.request(method, target, body=body, headers=all_headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (HTTPException, OSError):
+                if self.limiter:
+                    self.limiter.settle(time.monotonic() - started)  # return the unused reservation
+                self._reset_connection()
+                if attempt > MAX_RETRIES:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+                continue
+
+            if self.limiter:
+                self.limiter.settle(time.monotonic() - started)
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            if resp_headers.get("content-encoding") == "gzip":
+                data = gzip.decompress(data)
+            if resp.status in RETRY_STATUSES and attempt <= MAX_RETRIES:
+                retry_after = resp_headers.get("retry-after")
+                delay = float(retry_after) if retry_after else min(2 ** attempt, 30)
+                if resp.status == 429 and self.limiter:
+                    self.limiter.pause(delay)  # holds back every request drawing on the same budget
+                else:
+                    time.sleep(delay)
+                continue
+            if resp_headers.get("connection", "").lower() == "close":
+                self._reset_connection()
+            return resp.status, resp_headers, data
+
+    # ── JSON helpers (same result conventions as provision-tables.py) ────
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> dict[str, Any] | None:
+        """Send a JSON request.
+
+        Returns the parsed body, ``None`` for 204 responses, or an
+        ``{"_error": True, "_status": ..., "_message": ...}`` dict on failure.
+        """
+        data = json.dumps(body).encode() if body is not None else None
+        status, _headers, raw = self.send(method, path, data, headers)
+        if status >= 400:
+            text = raw.decode(errors="replace")
+            try:
+                message = json.loads(text).get("error", {}).get("message", text)
+            except (json.JSONDecodeError, AttributeError):
+                message = text
+            return {"_error": True, "_status": status, "_message": message}
+        if status == 204 or not raw:
+            return None
+        return json.loads(raw)
+
+    def get(self, path: str, headers: dict[str, str] | None = None) -> dict[str, Any] | None:
+        """GET a resource, returning ``None`` on any error."""
+        result = self.request("GET", path, headers=headers)
+        if result and result.get("_error"):
+            return None
+        return result
+
+    def checked(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> dict[str, Any] | None:
+        """Like :meth:`request` but raises :class:`DataverseError` on failure."""
+        result = self.request(method, path, body, headers)
+        if result and result.get("_error"):
+            raise DataverseError(result["_status"], result["_message"])
+        return result
+
+    # ── Paging ───────────────────────────────────────────────────────────
+
+    def iter_pages(
+        self,
+        entity_set: str,
+        select: list[str] | None = None,
+        filter: str | None = None,
+        orderby: str | None = None,
+        page_size: int = MAX_PAGE_SIZE,
+        headers: dict[str, str] | None = None,
+        expand: str | None = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Yield each page of rows, following ``@odata.nextLink`` until exhausted."""
+        params = []
+        if select:
+            params.append("$select=" + ",".join(select))
+        if filter:
+            params.append("$filter=" + filter)
+        if orderby:
+            params.append("$orderby=" + orderby)
+        if expand:
+            params.append("$expand=" + expand)
+        path = entity_set + ("?" + "&".join(params) if params else "")
+        page_headers = dict(headers or {})
+        # Extra preferences (e.g. formatted-value annotations) join the page size rather than replace it
+        prefer = page_headers.get("Prefer")
+        page_headers["Prefer"] = f"odata.maxpagesize={page_size}" + (f",{prefer}" if prefer else "")
+
+        while path:
+            page = self.checked("GET", path, headers=page_headers) or {}
+            yield page.get("value", [])
+            path = page.get("@odata.nextLink")
+
+    def iter_rows(self, entity_set: str, **kwargs: Any) -> Iterator[dict[str, Any]]:
+        """Yield rows one at a time across all pages."""
+        for page in self.iter_pages(entity_set, **kwargs):
+            yield from page
+
+    def iter_changes(
+        self,
+        entity_set: str,
+        select: list[str] | None = None,
+        delta_link: str | None = None,
+        page_size: int = MAX_PAGE_SIZE,
+    ) -> Iterator[tuple[list[dict[str, Any]], list[str], str | None]]:
+        """Yield change-tracking pages as ``(upserts, deleted_ids, delta_link)``.
+
+        Without ``delta_link`` the first run returns every row. ``delta_link``
+        is ``None`` on all but the final page, which carries the
+        ``@odata.deltaLink`` to pass in on the next run.
+        """
+        if delta_link:
+            path = delta_link
+        else:
+            path = entity_set + ("?$select=" + ",".join(select) if select else "")
+        headers = {"Prefer": f"odata.track-changes,odata.maxpagesize={page_size}"}
+
+        while path:
+            page = self.checked("GET", path, headers=headers) or {}
+            upserts, deleted = [], []
+            for row in page.get("value", []):
+                if "$deletedEntity" in row.get("@odata.context", ""):
+                    deleted.append(row["id"])
+                else:
+                    upserts.append(row)
+            path = page.get("@odata.nextLink")
+            yield upserts, deleted, None if path else page.get("@odata.deltaLink")
+
+    # ── Bulk messages ────────────────────────────────────────────────────
+
+    @staticmethod
+    def _targets(logical_name: str, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        odata_type = f"Microsoft.Dynamics.CRM.{logical_name}"
+        return [{"@odata.type": odata_type, **r} for r in records]
+
+    def create_multiple(
+        self, entity_set: str, logical_name: str, records: list[dict[str, Any]]
+    ) -> list[str]:
+        """Create records in one ``CreateMultiple`` call; returns the new ids in order."""
+        result = self.checked(
+            "POST",
+            f"{entity_set}/Microsoft.Dynamics.CRM.CreateMultiple",
+            {"Targets": self._targets(logical_name, records)},
+        )
+        return (result or {}).get("Ids", [])
+
+    def update_multiple(
+        self, entity_set: str, logical_name: str, records: list[dict[str, Any]]
+    ) -> None:
+        """Update records (each carrying its primary key) in one ``UpdateMultiple`` call."""
+        self.checked(
+            "POST",
+            f"{entity_set}/Microsoft.Dynamics.CRM.UpdateMultiple",
+            {"Targets": self._targets(logical_name, records)},
+        )
+
+    def upsert_multiple(
+        self, entity_set: str, logical_name: str, records: list[dict[str, Any]]
+    ) -> list[str]:
+        """Upsert records (each addressed by ``@odata.id`` alternate key or primary key)."""
+        result = self.checked(
+            "POST",
+            f"{entity_set}/Microsoft.Dynamics.CRM.UpsertMultiple",
+            {"Targets": self._targets(logical_name, records)},
+        )
+        return (result or {}).get("Ids", [])
+
+    def batch(
+        self,
+        operations: list[tuple[str, str, Any, dict[str, str] | None]],
+        atomic: bool = False,
+    ) -> list[tuple[int, Any]]:
+        """Send ``(method, path, body, headers)`` operations in one ``$batch`` request.
+
+        Independent operations run with ``odata.continue-on-error``; with
+        ``atomic`` they share one changeset and succeed or fail together.
+        Returns ``(status, parsed_body)`` per operation, in order.
+        """
+        batch_id = f"batch_{uuid.uuid4()}"
+        changeset_id = f"changeset_{uuid.uuid4()}"
+        parts = []
+        for content_id, (method, path, body, headers) in enumerate(operations, start=1):
+            lines = [
+                "Content-Type: application/http",
+                "Content-Transfer-Encoding: binary",
+                f"Content-ID: {content_id}",
+                "",
+                f"{method} {self._target(path)} HTTP/1.1",
+                "Content-Type: application/json",
+            ]
+            lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+            lines += ["", json.dumps(body) if body is not None else ""]
+            parts.append("\r\n".join(lines))
+
+        if atomic:
+            inner = "".join(f"--{changeset_id}\r\n{p}\r\n" for p in parts) + f"--{changeset_id}--"
+            payload = (
+                f"--{batch_id}\r\nContent-Type: multipart/mixed; boundary={changeset_id}\r\n\r\n"
+                f"{inner}\r\n--{batch_id}--\r\n"
+            )
+        else:
+            payload = "".join(f"--{batch_id}\r\n{p}\r\n" for p in parts) + f"--{batch_id}--\r\n"
+
+        status, headers, raw = self.send("POST", "$batch", payload.encode(), {
+            "Content-Type": f"multipart/mixed; boundary={batch_id}",
+            "Prefer": "odata.continue-on-error",
+        })
+        if status >= 400 and "multipart" not in headers.get("content-type", ""):
+            raise DataverseError(status, raw.decode(errors="replace"))
+        return _parse_batch_response(raw.decode(errors="replace"))
+
+    # ── System jobs ──────────────────────────────────────────────────────
+
+    def async_operation_status(self, operation_id: str) -> AsyncOperationStatus:
+        """Read a system job's state: ``Waiting``/``In Progress`` until it completes, then its outcome."""
+        operation = self.checked(
+            "GET", f"asyncoperations({operation_id})?$select=statecode,statuscode,message,friendlymessage"
+        ) or {}
+        if operation.get("statecode") != ASYNC_STATE_COMPLETED:
+            return AsyncOperationStatus("Waiting" if operation.get("statecode") == 0 else "In Progress")
+        status = operation.get("statuscode")
+        return AsyncOperationStatus(
+            ASYNC_STATUS_NAMES.get(status, str(status)),
+            done=True,
+            ok=status == ASYNC_STATUS_SUCCEEDED,
+            message=operation.get("friendlymessage") or operation.get("message") or "",
+        )
+
+    # ── File columns (chunked block upload, ranged download) ─────────────
+
+    def initialize_file_upload(self, logical_name: str, record_id: str, column: str, file_name: str) -> str:
+        """Start a block upload into a file column; returns the ``FileContinuationToken``."""
+        result = self.checked("POST", "InitializeFileBlocksUpload", {
+            "Target": {"@odata.type": f"Microsoft.Dynamics.CRM.{logical_name}", f"{logical_name}id": record_id},
+            "FileAttributeName": column,
+            "FileName": file_name,
+        })
+        return (result or {})["FileContinuationToken"]
+
+    def upload_block(self, token: str, block_id: str, data: bytes) -> None:
+        """Stage one block (at most :data:`MAX_FILE_BLOCK_SIZE` bytes) of an upload."""
+        self.checked("POST", "UploadBlock", {
+            "BlockId": block_id,
+            "BlockData": base64.b64encode(data).decode(),
+            "FileContinuationToken": token,
+        })
+
+    def commit_file_upload(self, token: str, file_name: str, mime_type: str, block_ids: list[str]) -> str:
+        """Commit the staged blocks in order; returns the new file id."""
+        result = self.checked("POST", "CommitFileBlocksUpload", {
+            "FileName": file_name,
+            "MimeType": mime_type,
+            "BlockList": block_ids,
+            "FileContinuationToken": token,
+        })
+        return (result or {}).get("FileId", "")
+
+    def upload_bytes(
+        self, logical_name: str, record_id: str, column: str, file_name: str, mime_type: str, data: bytes
+    ) -> str:
+        """Upload in-memory content into a file column in one go; returns the new file id."""
+        token = self.initialize_file_upload(logical_name, record_id, column, file_name)
+        block_ids = []
+        for index, start in enumerate(range(0, max(len(data), 1), MAX_FILE_BLOCK_SIZE)):
+            block_ids.append(base64.b64encode(f"block-{index:08d}".encode()).decode())
+            self.upload_block(token, block_ids[-1], data[start:start + MAX_FILE_BLOCK_SIZE])
+        return self.commit_file_upload(token, file_name, mime_type, block_ids)
+
+    def download_file(self, entity_set: str, record_id: str, column: str) -> bytes:
+        """Download a file column's content in :data:`MAX_FILE_BLOCK_SIZE` ranges."""
+        path = f"{entity_set}({record_id})/{column}/$value"
+        parts: list[bytes] = []
+        offset, total = 0, None
+        while total is None or offset < total:
+            end = offset + MAX_FILE_BLOCK_SIZE - 1
+            status, headers, data = self.send("GET", path, headers={"Accept": "*/*", "Range": f"bytes={offset}-{end}"})
+            if status >= 400:
+                raise DataverseError(status, data.decode(errors="replace"))
+            parts.append(data)
+            offset += len(data)
+            total = int(headers.get("x-ms-file-size") or offset)
+            if not data or status == 200:
+                break  # empty file, or the server ignored Range and sent it whole
+        return b"".join(parts)
+
+
+def _parse_batch_response(text: str) -> list[tuple[int, Any]]:
+    """Extract ``(status, body)`` for each response part of a ``$batch`` reply."""
+    results = []
+    for match in re.finditer(r"HTTP/1\.1 (\d{3})[^\r\n]*\r?\n(.*?)(?=\r?\n--(?:batch|changeset)resp|\Z)", text, re.S):
+        status = int(match.group(1))
+        sections = re.split(r"\r?\n\r?\n", match.group(2), maxsplit=1)
+        body = sections[1].strip() if len(sections) == 2 else ""
+        try:
+            parsed = json.loads(body) if body else None
+        except json.JSONDecodeError:
+            parsed = body
+        results.append((status, parsed))
+    return results
+
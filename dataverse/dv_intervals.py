@@ -0,0 +1,217 @@
+"""Equipment loan interval index for availability and conflict queries.
+
+Loans are closed date intervals ``[redi_startdate, redi_duedate]`` per
+``redi_equipmentid``. :class:`IntervalIndex` keeps one item's intervals
+sorted by start with a max-end segment tree over them, so
+
+- "is it free between start and due?" is a bisect plus a prefix-max lookup,
+  O(log n);
+- "which loans conflict with this window?" descends only into subtrees whose
+  max end reaches the window, O(log n + k).
+
+:class:`LoanIndex` holds one IntervalIndex per equipment item, built from an
+export-tables.py directory, a mirror-sqlite.py database, or a live paged
+read. :func:`fleet_conflicts` is a sweep-line pass that reports every pair of
+overlapping blocking loans across the fleet in O(n log n + k).
+
+Draft, Active and Overdue loans block an item. An Overdue loan is treated as
+running until at least the as-of date, since the item has not come back.
+"""
+
+import heapq
+import sqlite3
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from dv_client import DataverseClient
+from dv_schema import entity_set_name, get_table, lookup_value_column, option_values, primary_key
+
+LOAN_TABLE = "redi_loantransfer"
+EQUIPMENT_COLUMN = "redi_equipmentid"
+START_COLUMN = "redi_startdate"
+DUE_COLUMN = "redi_duedate"
+STATUS_COLUMN = "redi_loanstatus"
+BLOCKING_STATUSES = ("Draft", "Active", "Overdue")
+
+# Loans without a due date block the item indefinitely
+OPEN_END = date.max
+
+
+@dataclass(frozen=True)
+class Loan:
+    loan_id: str
+    equipment_id: str
+    start: date
+    end: date
+    status: str
+
+
+class IntervalIndex:
+    """Static interval index over one item's loans (closed intervals)."""
+
+    def __init__(self, loans: Iterable[Loan]) -> None:
+        self.loans = sorted(loans, key=lambda loan: (loan.start, loan.end))
+        self.starts = [loan.start for loan in self.loans]
+        size = 1
+        while size < len(self.loans):
+            size *= 2
+        self._size = size
+        self._max_end = [date.min] * (2 * size)
+        for i, loan in enumerate(self.loans):
+            self._max_end[size + i] = loan.end
+        for node in range(size - 1, 0, -1):
+            self._max_end[node] = max(self._max_end[2 * node], self._max_end[2 * node + 1])
+
+    def __len__(self) -> int:
+        return len(self.loans)
+
+    def _prefix_max_end(self, count: int) -> date:
+        """Max end among the first ``count`` loans by start."""
+        best = date.min
+        lo, hi = self._size, self._size + count
+        while lo < hi:
+            if lo & 1:
+                best = max(best, self._max_end[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = max(best, self._max_end[hi])
+            lo //= 2
+            hi //= 2
+        return best
+
+    def is_available(self, start: date, end: date) -> bool:
+        """True if no loan overlaps ``[start, end]``."""
+        candidates = bisect_right(self.starts, end)  # loans starting on or before ``end``
+        return candidates == 0 or self._prefix_max_end(candidates) < start
+
+    def conflicts(self, start: date, end: date) -> list[Loan]:
+        """Every loan overlapping ``[start, end]``, in start order."""
+        candidates = bisect_right(self.starts, end)
+        found: list[Loan] = []
+        if candidates:
+            self._collect(1, 0, self._size, candidates, start, found)
+        return found
+
+    def _collect(self, node: int, lo: int, hi: int, limit: int, start: date, found: list[Loan]) -> None:
+        if lo >= limit or self._max_end[node] < start:
+            return
+        if hi - lo == 1:
+            found.append(self.loans[lo])
+            return
+        mid = (lo + hi) // 2
+        self._collect(2 * node, lo, mid, limit, start, found)
+        self._collect(2 * node + 1, mid, hi, limit, start, found)
+
+
+class LoanIndex:
+    """Blocking loans grouped into one :class:`IntervalIndex` per equipment item."""
+
+    def __init__(self, loans: Iterable[Loan]) -> None:
+        by_item: dict[str, list[Loan]] = {}
+        for loan in loans:
+            by_item.setdefault(loan.equipment_id, []).append(loan)
+        self.items = {item: IntervalIndex(item_loans) for item, item_loans in by_item.items()}
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.items.values())
+
+    def is_available(self, equipment_id: str, start: date, end: date) -> bool:
+        index = self.items.get(equipment_id)
+        return index is None or index.is_available(start, end)
+
+    def conflicts(self, equipment_id: str, start: date, end: date) -> list[Loan]:
+        index = self.items.get(equipment_id)
+        return index.conflicts(start, end) if index else []
+
+
+def fleet_conflicts(loans: Iterable[Loan]) -> Iterator[tuple[Loan, Loan]]:
+    """Sweep each item's loans in start order, yielding every overlapping pair."""
+    by_item: dict[str, list[Loan]] = {}
+    for loan in loans:
+        by_item.setdefault(loan.equipment_id, []).append(loan)
+    for item_loans in by_item.values():
+        item_loans.sort(key=lambda loan: (loan.start, loan.end))
+        open_loans: list[tuple[date, int, Loan]] = []  # min-heap on end
+        for n, loan in enumerate(item_loans):
+            while open_loans and open_loans[0][0] < loan.start:
+                heapq.heappop(open_loans)
+            for _end, _n, other in open_loans:
+                yield other, loan
+            heapq.heappush(open_loans, (loan.end, n, loan))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Loading
+# ═══════════════════════════════════════════════════════════════════════════
+
+def status_labels(schema: dict[str, Any]) -> dict[int, str]:
+    col = next(c for c in get_table(schema, LOAN_TABLE)["columns"] if c["logicalName"] == STATUS_COLUMN)
+    return {value: label for label, value in option_values(col).items()}
+
+
+def to_loan(
+    loan_id: str,
+    equipment_id: str | None,
+    start: str | None,
+    due: str | None,
+    status: int | None,
+    labels: dict[int, str],
+    as_of: date,
+) -> Loan | None:
+    """Build a blocking :class:`Loan`, or ``None`` for rows that cannot block an item."""
+    label = labels.get(status) if status is not None else None
+    if label not in BLOCKING_STATUSES or not equipment_id or not (start or due):
+        return None
+    start_date = date.fromisoformat((start or due)[:10])
+    end_date = date.fromisoformat(due[:10]) if due else OPEN_END
+    if label == "Overdue":
+        end_date = max(end_date, as_of)
+    return Loan(loan_id, equipment_id, start_date, max(start_date, end_date), label)
+
+
+def loans_from_rows(rows: Iterable[dict[str, Any]], schema: dict[str, Any], as_of: date) -> Iterator[Loan]:
+    """Loans from Web API-shaped rows (live reads and export-tables.py output)."""
+    labels = status_labels(schema)
+    pk = primary_key(LOAN_TABLE)
+    for row in rows:
+        loan = to_loan(row[pk], row.get(lookup_value_column(EQUIPMENT_COLUMN)), row.get(START_COLUMN),
+                       row.get(DUE_COLUMN), row.get(STATUS_COLUMN), labels, as_of)
+        if loan:
+            yield loan
+
+
+def loans_from_mirror(db_path: Path, schema: dict[str, Any], as_of: date) -> Iterator[Loan]:
+    """Loans from a mirror-sqlite.py database (lookups stored without ``_value``)."""
+    labels = status_labels(schema)
+    blocking = [value for value, label in labels.items() if label in BLOCKING_STATUSES]
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute(
+            f"SELECT {primary_key(LOAN_TABLE)}, {EQUIPMENT_COLUMN}, {START_COLUMN}, {DUE_COLUMN}, {STATUS_COLUMN} "
+            f"FROM {LOAN_TABLE} WHERE {STATUS_COLUMN} IN ({','.join('?' * len(blocking))})",
+            blocking,
+        )
+        for loan_id, equipment_id, start, due, status in cursor:
+            loan = to_loan(loan_id, equipment_id, start, due, status, labels, as_of)
+            if loan:
+                yield loan
+    finally:
+        conn.close()
+
+
+def loans_from_live(client: DataverseClient, schema: dict[str, Any], as_of: date) -> Iterator[Loan]:
+    """Loans from a paged Web API read, filtered server-side to blocking statuses."""
+    labels = status_labels(schema)
+    blocking = " or ".join(f"{STATUS_COLUMN} eq {value}" for value, label in labels.items()
+                           if label in BLOCKING_STATUSES)
+    rows = client.iter_rows(
+        entity_set_name(LOAN_TABLE),
+        select=[primary_key(LOAN_TABLE), lookup_value_column(EQUIPMENT_COLUMN), START_COLUMN, DUE_COLUMN,
+                STATUS_COLUMN],
+        filter=f"({blocking})",
+    )
+    yield from loans_from_rows(rows, schema, as_of)
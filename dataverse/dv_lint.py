@@ -0,0 +1,197 @@
+"""Performance lint rules for schema.json.
+
+Each rule looks for a schema shape that is cheap to add and expensive to
+run against:
+
+- ``wide-row``: the SimQuip columns of a table need more than
+  ``max_row_bytes`` in-row (``nvarchar`` at two bytes a character, fixed-size
+  types at their SQL size; memo and file columns live off-row), so every
+  read and write spills into row-overflow pages;
+- ``too-many-columns``: more than ``max_columns`` schema columns;
+- ``listed-memo``: a memo column that list queries fetch (``listView``)
+  allowing more than ``listed_memo_warning`` characters, an error past
+  ``listed_memo_error``; every list page then carries it for every row;
+- ``unindexed-lookup`` / ``unindexed-choice``: a lookup or choice column
+  with ``filterable`` turned off, so the joins and ``$filter`` clauses on it
+  scan the table;
+- ``lookup-fanout``: more than ``max_lookups`` lookups on one table, each a
+  relationship whose delete cascade (``RemoveLink``) the parent pays for;
+- ``large-option-set``: a choice column with more than ``max_options``
+  options.
+
+Thresholds and severities come from :data:`THRESHOLDS` and
+:data:`SEVERITIES`, overridden by ``schema-lint.json`` when present::
+
+    {"thresholds": {"max_lookups": 10},
+     "severity": {"wide-row": "error", "too-many-columns": "off"},
+     "ignore": {"redi_location.redi_sq_description:listed-memo": "shown in the list's side panel"}}
+
+``ignore`` maps ``table:rule`` or ``table.column:rule`` to the reason the
+finding is accepted (a plain list of entries is also read).
+"""
+
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from dv_schema import (
+    DEFAULT_MEMO_LENGTH,
+    DEFAULT_STRING_LENGTH,
+    SCRIPT_DIR,
+    all_tables,
+    column_flags,
+    primary_name_column,
+)
+
+CONFIG_PATH = SCRIPT_DIR / "schema-lint.json"
+
+THRESHOLDS = {
+    "max_row_bytes": 8060,
+    "max_columns": 60,
+    "listed_memo_warning": 2000,
+    "listed_memo_error": 20000,
+    "max_lookups": 8,
+    "max_options": 50,
+}
+
+SEVERITIES = {
+    "wide-row": "warning",
+    "too-many-columns": "warning",
+    "listed-memo": "warning",
+    "unindexed-lookup": "error",
+    "unindexed-choice": "warning",
+    "lookup-fanout": "warning",
+    "large-option-set": "warning",
+}
+
+# In-row bytes per column type; String is sized from maxLength, Memo and File are stored off-row
+TYPE_BYTES = {
+    "Integer": 4,
+    "Boolean": 1,
+    "DateOnly": 8,
+    "DateTime": 8,
+    "Choice": 4,
+    "Lookup": 16,
+    "Memo": 0,
+    "File": 16,
+}
+
+@dataclass
+class Finding:
+    rule: str
+    severity: str
+    table: str
+    column: str | None
+    message: str
+    value: int
+    threshold: int
+
+
+@dataclass
+class LintConfig:
+    thresholds: dict[str, int]
+    severity: dict[str, str]
+    ignore: dict[str, str]
+
+
+def load_config(path: Path = CONFIG_PATH) -> LintConfig:
+    """Defaults, overridden by the config file if it exists."""
+    overrides: dict[str, Any] = {}
+    if path.exists():
+        with open(path) as f:
+            overrides = json.load(f)
+    unknown = set(overrides.get("thresholds", {})) - set(THRESHOLDS)
+    unknown |= set(overrides.get("severity", {})) - set(SEVERITIES)
+    if unknown:
+        raise ValueError(f"{path.name}: unknown setting(s) {', '.join(sorted(unknown))}")
+    ignore = overrides.get("ignore", {})
+    if isinstance(ignore, list):
+        ignore = dict.fromkeys(ignore, "")
+    invalid = {v for v in overrides.get("severity", {}).values() if v not in ("error", "warning", "off")}
+    if invalid:
+        raise ValueError(f"{path.name}: severity must be error, warning or off, not {', '.join(sorted(invalid))}")
+    return LintConfig(
+        thresholds={**THRESHOLDS, **overrides.get("thresholds", {})},
+        severity={**SEVERITIES, **overrides.get("severity", {})},
+        ignore=ignore,
+    )
+
+
+def column_bytes(col: dict[str, Any]) -> int:
+    if col["type"] == "String":
+        return col.get("maxLength", DEFAULT_STRING_LENGTH) * 2
+    return TYPE_BYTES.get(col["type"], 0)
+
+
+def lint_table(table: dict[str, Any], config: LintConfig) -> list[Finding]:
+    limits = config.thresholds
+    name = table["logicalName"]
+    findings = []
+
+    def flag(rule: str, column: str | None, message: str, value: int, threshold: int, severity: str = "") -> None:
+        if config.severity[rule] != "off":
+            findings.append(Finding(rule, severity or config.severity[rule], name, column, message, value, threshold))
+
+    columns = table["columns"]
+    primary_name = primary_name_column(table)
+    row_bytes = sum(column_bytes(col) for col in columns)
+    if not any(col["logicalName"] == primary_name for col in columns):
+        row_bytes += DEFAULT_STRING_LENGTH * 2
+    if row_bytes > limits["max_row_bytes"]:
+        flag("wide-row", None, f"about {row_bytes:,} bytes in-row; shorten string columns or move text to memo",
+             row_bytes, limits["max_row_bytes"])
+    if len(columns) > limits["max_columns"]:
+        flag("too-many-columns", None, f"{len(columns)} columns", len(columns), limits["max_columns"])
+
+    lookups = [col for col in columns if col["type"] == "Lookup"]
+    if len(lookups) > limits["max_lookups"]:
+        flag("lookup-fanout", None, f"{len(lookups)} lookups, each cascading on delete of its parent",
+             len(lookups), limits["max_lookups"])
+
+    for col in columns:
+        column = col["logicalName"]
+        if col["type"] == "Memo" and col.get("listView"):
+            length = col.get("maxLength", DEFAULT_MEMO_LENGTH)
+            if length > limits["listed_memo_error"]:
+                flag("listed-memo", column, f"list queries fetch up to {length:,} characters per row",
+                     length, limits["listed_memo_error"], severity="error")
+            elif length > limits["listed_memo_warning"]:
+                flag("listed-memo", column, f"list queries fetch up to {length:,} characters per row",
+                     length, limits["listed_memo_warning"])
+        if col["type"] in ("Lookup", "Choice") and not column_flags(col)["filterable"]:
+            rule = "unindexed-lookup" if col["type"] == "Lookup" else "unindexed-choice"
+            flag(rule, column, "filterable is off, so filters and joins on it scan the table", 0, 0)
+        if col["type"] == "Choice" and len(col.get("options", [])) > limits["max_options"]:
+            count = len(col["options"])
+            flag("large-option-set", column, f"{count} options", count, limits["max_options"])
+
+    return findings
+
+
+def lint(schema: dict[str, Any], config: LintConfig) -> list[Finding]:
+    """Every finding across SimQuip and shared tables, minus ignored and disabled ones."""
+    findings = []
+    for table in all_tables(schema):
+        for finding in lint_table(table, config):
+            target = finding.table + (f".{finding.column}" if finding.column else "")
+            if f"{target}:{finding.rule}" not in config.ignore:
+                findings.append(finding)
+    return findings
+
+
+def report(findings: list[Finding], config: LintConfig) -> dict[str, Any]:
+    """Machine-readable report, e.g. for CI gating on ``summary.errors``."""
+    return {
+        "summary": {
+            "errors": sum(1 for f in findings if f.severity == "error"),
+            "warnings": sum(1 for f in findings if f.severity == "warning"),
+        },
+        "thresholds": config.thresholds,
+        "findings": [asdict(f) for f in findings],
+    }
+
+
+def format_finding(finding: Finding) -> str:
+    target = finding.table + (f".{finding.column}" if finding.column else "")
+    return f"  {finding.severity.upper()} {finding.rule} {target}: {finding.message}"
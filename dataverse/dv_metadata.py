@@ -0,0 +1,178 @@
+"""Persisted Dataverse metadata snapshot kept current with RetrieveMetadataChanges.
+
+The provisioner needs to know which tables, columns and alternate keys
+already exist and how each column's filter/sort/search flags are set.
+Asking ``EntityDefinitions`` for each of those costs a request per column on
+every run. :class:`MetadataSnapshot` instead stores the relevant metadata
+for the SimQuip tables on disk together with the ``ServerVersionStamp``
+returned by ``RetrieveMetadataChanges``:
+
+- a cold run (no file, a different table list, or an expired stamp) makes
+  one full ``RetrieveMetadataChanges`` request;
+- a warm run sends the saved stamp as ``ClientVersionStamp`` and gets back
+  only the entities, attributes and keys changed since then, plus the ids
+  of deleted ones, and merges them into the snapshot.
+
+Either way the current state costs one request. Snapshots are per
+environment, named after the org host.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from dv_client import DataverseClient, DataverseError
+
+SNAPSHOT_VERSION = 1
+
+ENTITY_PROPERTIES = ["LogicalName", "MetadataId", "Attributes", "Keys"]
+ATTRIBUTE_PROPERTIES = [
+    "LogicalName", "MetadataId", "AttributeType", "IsFilterable", "IsSortableEnabled", "IsSearchable", "IsRetrievable",
+]
+KEY_PROPERTIES = ["LogicalName", "MetadataId", "KeyAttributes", "EntityKeyIndexStatus"]
+
+GUID_PATTERN = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+
+def snapshot_path(cache_dir: Path, org_url: str) -> Path:
+    return cache_dir / f"{urlsplit(org_url).netloc.replace(':', '_')}.json"
+
+
+def _query(tables: list[str]) -> dict[str, Any]:
+    """EntityQueryExpression for the given tables, their attributes and keys."""
+    return {
+        "Criteria": {
+            "FilterOperator": "And",
+            "Conditions": [{
+                "PropertyName": "LogicalName",
+                "ConditionOperator": "In",
+                "Value": {"Type": "System.String[]", "Value": json.dumps(tables)},
+            }],
+        },
+        "Properties": {"AllProperties": False, "PropertyNames": ENTITY_PROPERTIES},
+        "AttributeQuery": {"Properties": {"AllProperties": False, "PropertyNames": ATTRIBUTE_PROPERTIES}},
+        "KeyQuery": {"Properties": {"AllProperties": False, "PropertyNames": KEY_PROPERTIES}},
+    }
+
+
+def _deleted_ids(deleted: Any) -> set[str]:
+    """Every MetadataId in a ``DeletedMetadata`` collection, whatever its nesting."""
+    found: set[str] = set()
+    stack = [deleted]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str) and GUID_PATTERN.match(item):
+            found.add(item.lower())
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return found
+
+
+def _slim(item: dict[str, Any], properties: list[str]) -> dict[str, Any]:
+    return {prop: item[prop] for prop in properties if prop in item and prop not in ("Attributes", "Keys")}
+
+
+class MetadataSnapshot:
+    """Entities, attributes and keys for a fixed table list, keyed by logical name."""
+
+    def __init__(self, path: Path, tables: list[str]) -> None:
+        self.path = path
+        self.tables = sorted(tables)
+        self.version_stamp: str | None = None
+        self.entities: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == SNAPSHOT_VERSION and data.get("tables") == self.tables:
+                self.version_stamp = data.get("versionStamp")
+                self.entities = data.get("entities", {})
+
+    # ── Refresh ──────────────────────────────────────────────────────────
+
+    def refresh(self, client: DataverseClient) -> tuple[bool, int]:
+        """Bring the snapshot up to date in one request; returns ``(was_full, entities_changed)``."""
+        if self.version_stamp:
+            result = self._retrieve(client, self.version_stamp)
+            if not result.get("_error"):
+                changed = self._merge(result)
+                self.save()
+                return False, changed
+            # An expired or unknown stamp (or any other failure) falls back to a full read
+        result = self._retrieve(client, None)
+        if result.get("_error"):
+            raise DataverseError(result["_status"], result["_message"])
+        self.entities = {}
+        changed = self._merge(result)
+        self.save()
+        return True, changed
+
+    def _retrieve(self, client: DataverseClient, stamp: str | None) -> dict[str, Any]:
+        params = ["Query=@q"]
+        aliases = [f"@q={json.dumps(_query(self.tables), separators=(',', ':'))}"]
+        if stamp:
+            params += ["ClientVersionStamp=@s", "DeletedMetadataFilters=@d"]
+            aliases += [f"@s='{stamp}'", "@d=Microsoft.Dynamics.CRM.DeletedMetadataFilters'Entity,Attribute'"]
+        return client.request("GET", f"RetrieveMetadataChanges({','.join(params)})?{'&'.join(aliases)}") or {}
+
+    def _merge(self, result: dict[str, Any]) -> int:
+        deleted = _deleted_ids(result.get("DeletedMetadata"))
+        if deleted:
+            for name in [n for n, e in self.entities.items() if str(e.get("MetadataId", "")).lower() in deleted]:
+                del self.entities[name]
+            for entity in self.entities.values():
+                for kind in ("attributes", "keys"):
+                    entity[kind] = {n: a for n, a in entity[kind].items()
+                                    if str(a.get("MetadataId", "")).lower() not in deleted}
+
+        changed = result.get("EntityMetadata", [])
+        for item in changed:
+            entity = self.entities.setdefault(item["LogicalName"], {"attributes": {}, "keys": {}})
+            entity.update(_slim(item, ENTITY_PROPERTIES))
+            for attr in item.get("Attributes") or []:
+                entity["attributes"][attr["LogicalName"]] = _slim(attr, ATTRIBUTE_PROPERTIES)
+            for key in item.get("Keys") or []:
+                entity["keys"][key["LogicalName"]] = _slim(key, KEY_PROPERTIES)
+        self.version_stamp = result.get("ServerVersionStamp")
+        return len(changed)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump({
+                "version": SNAPSHOT_VERSION,
+                "tables": self.tables,
+                "versionStamp": self.version_stamp,
+                "entities": self.entities,
+            }, f, indent=1)
+        temp_path.replace(self.path)
+
+    # ── Lookups ──────────────────────────────────────────────────────────
+
+    def entity(self, table: str) -> dict[str, Any] | None:
+        return self.entities.get(table)
+
+    def attribute(self, table: str, column: str) -> dict[str, Any] | None:
+        entity = self.entities.get(table)
+        return entity["attributes"].get(column) if entity else None
+
+    def key(self, table: str, key_name: str) -> dict[str, Any] | None:
+        entity = self.entities.get(table)
+        return entity["keys"].get(key_name) if entity else None
+
+    # ── Local updates (in memory only; the next refresh brings the server's view) ──
+
+    def record_entity(self, table: str) -> None:
+        self.entities.setdefault(table, {"LogicalName": table, "attributes": {}, "keys": {}})
+
+    def record_attribute(self, table: str, column: str, properties: dict[str, Any] | None = None) -> None:
+        self.record_entity(table)
+        self.entities[table]["attributes"].setdefault(column, {"LogicalName": column}).update(properties or {})
+
+    def record_key(self, table: str, key_name: str, properties: dict[str, Any] | None = None) -> None:
+        self.record_entity(table)
+        self.entities[table]["keys"].setdefault(key_name, {"LogicalName": key_name}).update(properties or {})
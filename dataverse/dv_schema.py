@@ -0,0 +1,214 @@
+"""Helpers for reading schema.json from the SimQuip data tools.
+
+``tables`` holds the SimQuip-created tables that generate-solution.py emits;
+``sharedTables`` describes the SimQuip columns on the pre-existing shared REdI
+tables (person, location, equipment), which are provisioned by
+provision-tables.py but never generated into the solution. A shared table's
+``appFilter`` is the same app-isolation ``$filter`` the front-end adapters
+apply, so tools only see SimQuip rows.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any
+
+SCRIPT_DIR = Path(__file__).parent
+SCHEMA_PATH = SCRIPT_DIR / "schema.json"
+
+# Option value base for SimQuip-created choice columns (see generate-solution.py)
+OPTION_VALUE_BASE = 100000000
+
+# Dataverse's default file column size limit (32 MB), used when a File column omits maxSizeInKB
+DEFAULT_FILE_SIZE_KB = 32768
+
+# String and Memo lengths used when a column omits maxLength
+DEFAULT_STRING_LENGTH = 200
+DEFAULT_MEMO_LENGTH = 2000
+
+# Dependency tiers, in the same order provision-tables.py main() creates them
+LOAD_TIERS = [
+    ["redi_building", "redi_person", "redi_dashboardmetric"],
+    ["redi_team", "redi_level"],
+    ["redi_location", "redi_teammember"],
+    ["redi_equipment", "redi_mediablob"],
+    ["redi_equipmentmedia", "redi_equipmentcontent", "redi_locationmedia", "redi_loantransfer"],
+]
+
+# On shared tables, SimQuip owns only the columns with this prefix; the rest belong to other REdI apps
+SIMQUIP_COLUMN_PREFIX = "redi_sq_"
+
+# Column types that get each search/index flag when a column doesn't set it
+FLAG_DEFAULT_TYPES = {
+    "filterable": {"Lookup", "Choice", "Boolean", "DateOnly", "DateTime"},
+    "sortable": {"Choice", "DateOnly", "DateTime", "Integer"},
+    "searchable": set(),
+    "retrievable": set(),
+}
+
+# An appFilter clause QueryExpression and FetchXML can express: ``column eq null`` / ``column ne null``
+NULL_TEST = re.compile(r"^(\w+) (eq|ne) null$")
+LOOKUP_VALUE = re.compile(r"^_(\w+)_value$")
+
+# Lookups that point "up" a tier; main() adds these in the circular fixup phase
+DEFERRED_LOOKUPS = {
+    ("redi_person", "redi_teamid"),
+    ("redi_team", "redi_mainlocationid"),
+}
+
+
+def load_schema(path: Path = SCHEMA_PATH) -> dict[str, Any]:
+    """Load and return the schema JSON."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def all_tables(schema: dict[str, Any]) -> list[dict[str, Any]]:
+    """Return SimQuip-created and shared table definitions together."""
+    return schema["tables"] + schema.get("sharedTables", [])
+
+
+def get_table(schema: dict[str, Any], logical_name: str) -> dict[str, Any]:
+    for table in all_tables(schema):
+        if table["logicalName"] == logical_name:
+            return table
+    raise KeyError(f"Table {logical_name} is not defined in schema.json")
+
+
+def column_length(table: dict[str, Any], column: str) -> int:
+    """A String or Memo column's ``maxLength``, defaulted the way generate-solution.py emits it."""
+    for col in table["columns"]:
+        if col["logicalName"] == column:
+            return col.get("maxLength", DEFAULT_MEMO_LENGTH if col["type"] == "Memo" else DEFAULT_STRING_LENGTH)
+    raise KeyError(f"Column {column} is not defined on {table['logicalName']} in schema.json")
+
+
+def entity_set_name(logical_name: str) -> str:
+    """Web API entity set name, using the same pluralisation as generate-solution.py."""
+    return logical_name + "es" if logical_name.endswith("s") else logical_name + "s"
+
+
+def primary_key(logical_name: str) -> str:
+    return f"{logical_name}id"
+
+
+def primary_name_column(table: dict[str, Any]) -> str:
+    """The table's primary name column, resolved the way generate-solution.py emits it.
+
+    Uses ``primaryNameColumn`` if set; otherwise a ``redi_name`` column, then
+    the first required string column, then the first string column, and
+    finally the ``<table>_name`` convention.
+    """
+    if "primaryNameColumn" in table:
+        return table["primaryNameColumn"]
+    if any(col["logicalName"] == "redi_name" for col in table["columns"]):
+        return "redi_name"
+    strings = [col for col in table["columns"] if col["type"] == "String"]
+    for col in strings:
+        if col.get("required", False):
+            return col["logicalName"]
+    if strings:
+        return strings[0]["logicalName"]
+    return f"{table['logicalName']}_name"
+
+
+def app_filter(table: dict[str, Any]) -> str | None:
+    return table.get("appFilter")
+
+
+def app_filter_conditions(table: dict[str, Any]) -> list[tuple[str, str]]:
+    """The ``appFilter`` as ``(column, "null" | "not-null")`` conditions ANDed together, for FetchXML and
+    QueryExpression; lookups are named by their logical name. Raises ``ValueError`` for other clauses."""
+    odata_filter = app_filter(table)
+    if not odata_filter:
+        return []
+    conditions = []
+    for clause in re.split(r"\s+and\s+", odata_filter.strip()):
+        m = NULL_TEST.match(clause.strip().strip("()"))
+        if not m:
+            raise ValueError(f"{table['logicalName']}: appFilter clause {clause!r} is not a null test")
+        column, op = m.groups()
+        lookup = LOOKUP_VALUE.match(column)
+        conditions.append((lookup.group(1) if lookup else column, "not-null" if op == "ne" else "null"))
+    return conditions
+
+
+def matches_app_filter(table: dict[str, Any], row: dict[str, Any]) -> bool:
+    """True if a Web API row passes the table's ``appFilter``, for reads that could not apply it server-side."""
+    lookups = {col["logicalName"] for col in lookup_columns(table)}
+    for column, operator in app_filter_conditions(table):
+        value = row.get(lookup_value_column(column) if column in lookups else column)
+        if (value is None) != (operator == "null"):
+            return False
+    return True
+
+
+def alternate_key_ref(logical_name: str, values: dict[str, Any]) -> str:
+    """Address a row by alternate key, e.g. ``redi_teams(redi_teamcode='SIM')``."""
+    parts = []
+    for column, value in values.items():
+        literal = str(value) if isinstance(value, (int, float)) else "'" + str(value).replace("'", "''") + "'"
+        parts.append(f"{column}={literal}")
+    return f"{entity_set_name(logical_name)}({','.join(parts)})"
+
+
+def lookup_value_column(column_name: str) -> str:
+    """Read-side OData property for a lookup (e.g. ``_redi_teamid_value``)."""
+    return f"_{column_name}_value"
+
+
+def option_values(col: dict[str, Any]) -> dict[str, int]:
+    """Map each choice label to its stored integer value."""
+    base = col.get("optionValueBase", OPTION_VALUE_BASE)
+    return {label: base + i for i, label in enumerate(col.get("options", []))}
+
+
+def column_flags(col: dict[str, Any], is_primary_name: bool = False) -> dict[str, bool]:
+    """Resolve ``filterable``/``sortable``/``searchable``/``retrievable`` for a column.
+
+    Explicit values in schema.json win; otherwise the flag follows the column
+    type. The primary name column is always searchable, retrievable and sortable.
+    """
+    flags = {}
+    for flag, types in FLAG_DEFAULT_TYPES.items():
+        default = col["type"] in types or (is_primary_name and flag != "filterable")
+        flags[flag] = bool(col.get(flag, default))
+    return flags
+
+
+def manages_column_flags(col: dict[str, Any]) -> bool:
+    """True if SimQuip may change this shared-table column's flags: it is a ``redi_sq_`` column, or
+    schema.json sets one of its flags explicitly."""
+    return col["logicalName"].startswith(SIMQUIP_COLUMN_PREFIX) or any(flag in col for flag in FLAG_DEFAULT_TYPES)
+
+
+def lookup_columns(table: dict[str, Any]) -> list[dict[str, Any]]:
+    return [col for col in table["columns"] if col["type"] == "Lookup"]
+
+
+def is_deferred_lookup(table_name: str, col: dict[str, Any]) -> bool:
+    """True for lookups that must be set after all tiers are written."""
+    return col["target"] == table_name or (table_name, col["logicalName"]) in DEFERRED_LOOKUPS
+
+
+def in_list_view(col: dict[str, Any]) -> bool:
+    """True if list queries fetch this column; memo columns are detail-only unless ``listView`` is set."""
+    return bool(col.get("listView", col["type"] != "Memo"))
+
+
+def list_columns(table: dict[str, Any]) -> list[str]:
+    """``$select`` list for list pages: :func:`select_columns` without detail-only columns."""
+    detail_only = {col["logicalName"] for col in table["columns"] if not in_list_view(col)}
+    return [name for name in select_columns(table) if name not in detail_only]
+
+
+def select_columns(table: dict[str, Any]) -> list[str]:
+    """Web API ``$select`` list covering every schema-defined column of a table."""
+    logical_name = table["logicalName"]
+    columns = [primary_key(logical_name), primary_name_column(table)]
+    for col in table["columns"]:
+        if col["type"] == "Lookup":
+            columns.append(lookup_value_column(col["logicalName"]))
+        elif col["logicalName"] not in columns:
+            columns.append(col["logicalName"])
+    return columns
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""Local stand-in for the SimQuip slice of the Dataverse Web API.
+
+Serves synthetic rows for every table in schema.json from memory, so the
+data tools and load tests can run without touching a real environment.
+It implements only what the app's ``DataverseDataService`` uses:
+
+- ``GET <entityset>`` with ``$select``, ``$top``, ``$orderby`` and a
+  ``$filter`` subset (``eq``/``ne``/``lt``/``le``/``gt``/``ge`` joined by
+  ``and``, plus parenthesised ``contains(col,'x') or ...`` groups)
+- ``GET <entityset>(<id>)`` with ``$select``
+- ``POST <entityset>`` (``Prefer: return=representation`` honoured),
+  ``PATCH <entityset>(<id>)`` and ``DELETE <entityset>(<id>)``, with
+  ``col@odata.bind`` lookups
+
+Any bearer token is accepted. ``--latency-ms`` adds a fixed server delay.
+
+Usage: python3 dataverse/dv_standin.py [--port 8080] [--rows redi_equipment=3000 ...] [--latency-ms 0]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from dv_client import API_VERSION
+from dv_schema import (
+    LOAD_TIERS,
+    all_tables,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    option_values,
+    primary_key,
+    primary_name_column,
+)
+
+# Rows generated per table unless overridden with --rows
+DEFAULT_ROWS = {
+    "redi_building": 5,
+    "redi_person": 300,
+    "redi_team": 25,
+    "redi_level": 30,
+    "redi_location": 200,
+    "redi_teammember": 400,
+    "redi_equipment": 3000,
+    "redi_mediablob": 4000,
+    "redi_equipmentmedia": 6000,
+    "redi_equipmentcontent": 9000,
+    "redi_locationmedia": 400,
+    "redi_loantransfer": 5000,
+    "redi_dashboardmetric": 4,
+}
+
+# Characters of synthetic text written to memo columns
+MEMO_SIZE = 4000
+
+COMPARISON = re.compile(r"^(\w+) (eq|ne|lt|le|gt|ge) (.+)$")
+CONTAINS = re.compile(r"^contains\((\w+),'((?:[^']|'')*)'\)$")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Synthetic data
+# ═══════════════════════════════════════════════════════════════════════════
+
+def synthetic_value(col: dict[str, Any], n: int, rng: random.Random) -> Any:
+    col_type = col["type"]
+    if col_type == "String":
+        return f"{col['logicalName'].removeprefix('redi_').upper()}-{n:05d}"[: col.get("maxLength", 200)]
+    if col_type == "Memo":
+        return ("lorem ipsum " * (MEMO_SIZE // 12 + 1))[:MEMO_SIZE]
+    if col_type == "Integer":
+        return rng.randint(0, 100)
+    if col_type == "Boolean":
+        return True
+    if col_type in ("DateOnly", "DateTime"):
+        return (date.today() + timedelta(days=rng.randint(-60, 60))).isoformat()
+    if col_type == "Choice":
+        return rng.choice(list(option_values(col).values()))
+    if col_type == "File":
+        return None
+    raise ValueError(f"Unknown column type: {col_type}")
+
+
+def generate_rows(schema: dict[str, Any], counts: dict[str, int], seed: int = 1) -> dict[str, dict[str, dict]]:
+    """Build ``{entity_set: {id: row}}`` with lookups pointing at generated rows."""
+    rng = random.Random(seed)
+    ids: dict[str, list[str]] = {}
+    store: dict[str, dict[str, dict]] = {}
+    ordered = [name for tier in LOAD_TIERS for name in tier]
+    ordered += [t["logicalName"] for t in all_tables(schema) if t["logicalName"] not in ordered]
+
+    for logical_name in ordered:
+        table = get_table(schema, logical_name)
+        pk = primary_key(logical_name)
+        rows = {}
+        for n in range(counts.get(logical_name, DEFAULT_ROWS.get(logical_name, 100))):
+            row_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            row: dict[str, Any] = {pk: row_id, primary_name_column(table): f"{table['displayName']} {n}"}
+            for col in table["columns"]:
+                if col["type"] == "Lookup":
+                    targets = ids.get(col["target"])
+                    row[lookup_value_column(col["logicalName"])] = rng.choice(targets) if targets else None
+                elif col["logicalName"] not in row:
+                    row[col["logicalName"]] = synthetic_value(col, n, rng)
+            rows[row_id] = row
+        ids[logical_name] = list(rows)
+        store[entity_set_name(logical_name)] = rows
+    return store
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# OData subset
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _literal(text: str) -> Any:
+    text = text.strip()
+    if text == "null":
+        return None
+    if text in ("true", "false"):
+        return text == "true"
+    if text.startswith("'"):
+        return text[1:-1].replace("''", "'")
+    try:
+        return int(text)
+    except ValueError:
+        return text  # dates compare correctly as ISO strings
+
+
+def _split_top(expr: str, separator: str) -> list[str]:
+    """Split on ``separator`` outside parentheses and quotes."""
+    parts, depth, quoted, start = [], 0, False, 0
+    i = 0
+    while i < len(expr):
+        ch = expr[i]
+        if ch == "'":
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and expr.startswith(separator, i):
+            parts.append(expr[start:i])
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+    parts.append(expr[start:])
+    return [p.strip() for p in parts]
+
+
+def _wrapped(expr: str) -> bool:
+    """True if ``expr`` is one parenthesised group, e.g. ``(a or b)`` but not ``(a) and (b)``."""
+    if not expr.startswith("("):
+        return False
+    depth, quoted = 0, False
+    for i, ch in enumerate(expr):
+        if ch == "'":
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+            if depth == 0:
+                return i == len(expr) - 1
+    return False
+
+
+def matches(row: dict[str, Any], expr: str) -> bool:
+    """Evaluate the ``$filter`` subset described in the module docstring."""
+    expr = expr.strip()
+    alternatives = _split_top(expr, " or ")
+    if len(alternatives) > 1:
+        return any(matches(row, part) for part in alternatives)
+    clauses = _split_top(expr, " and ")
+    if len(clauses) > 1:
+        return all(matches(row, clause) for clause in clauses)
+    if _wrapped(expr):
+        return matches(row, expr[1:-1])
+    m = CONTAINS.match(expr)
+    if m:
+        needle = m.group(2).replace("''", "'").lower()
+        return needle in str(row.get(m.group(1)) or "").lower()
+    m = COMPARISON.match(expr)
+    if not m:
+        raise ValueError(f"Unsupported $filter clause: {expr}")
+    col, op, value = m.group(1), m.group(2), _literal(m.group(3))
+    current = row.get(col)
+    if op == "eq":
+        return current == value
+    if op == "ne":
+        return current != value
+    if current is None or value is None:
+        return False
+    return {"lt": current < value, "le": current <= value, "gt": current > value, "ge": current >= value}[op]
+
+
+def project(row: dict[str, Any], select: str | None) -> dict[str, Any]:
+    if not select:
+        return dict(row)
+    return {col: row.get(col) for col in select.split(",")}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HTTP server
+# ═══════════════════════════════════════════════════════════════════════════
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store: dict[str, dict[str, dict]] = {}
+    keys: dict[str, str] = {}  # entity set -> primary key column
+    lock = threading.Lock()
+    latency = 0.0
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _reply(self, status: int, body: Any = None, headers: dict[str, str] | None = None) -> None:
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; odata.metadata=minimal")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str) -> None:
+        self._reply(status, {"error": {"code": str(status), "message": message}})
+
+    def _route(self) -> tuple[str, str | None, dict[str, str]] | None:
+        """Return ``(entity_set, record_id, query)`` for the request path."""
+        if self.latency:
+            time.sleep(self.latency)
+        parts = urlsplit(self.path)
+        prefix = f"/api/data/{API_VERSION}/"
+        if not parts.path.startswith(prefix):
+            self._error(404, f"Unknown path {parts.path}")
+            return None
+        resource = unquote(parts.path[len(prefix):])
+        query = {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        m = re.match(r"^(\w+)(?:\(([0-9a-fA-F-]{36})\))?$", resource)
+        if not m or m.group(1) not in self.store:
+            self._error(404, f"Resource not found for the segment '{resource}'")
+            return None
+        return m.group(1), m.group(2), query
+
+    def _body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _apply(self, row: dict[str, Any], body: dict[str, Any]) -> None:
+        for key, value in body.items():
+            if key.endswith("@odata.bind"):
+                column = key[: -len("@odata.bind")]
+                row[lookup_value_column(column)] = re.search(r"\(([^)]+)\)", value).group(1) if value else None
+            elif not key.startswith("@"):
+                row[key] = value
+
+    def do_GET(self) -> None:
+        route = self._route()
+        if not route:
+            return
+        entity_set, record_id, query = route
+        rows = self.store[entity_set]
+        if record_id:
+            row = rows.get(record_id)
+            if row is None:
+                return self._error(404, f"{entity_set} With Id = {record_id} Does Not Exist")
+            return self._reply(200, project(row, query.get("$select")))
+
+        try:
+            with self.lock:
+                selected = [r for r in rows.values() if not query.get("$filter") or matches(r, query["$filter"])]
+        except ValueError as e:
+            return self._error(400, str(e))
+        if query.get("$orderby"):
+            col, _, direction = query["$orderby"].partition(" ")
+            selected.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=direction == "desc")
+        top = min(int(query.get("$top") or 5000), 5000)
+        value = [project(r, query.get("$select")) for r in selected[:top]]
+        self._reply(200, {"@odata.context": f"$metadata#{entity_set}", "value": value})
+
+    def do_POST(self) -> None:
+        route = self._route()
+        if not route:
+            return
+        entity_set, _record_id, _query = route
+        record_id = str(uuid.uuid4())
+        row: dict[str, Any] = {self.keys[entity_set]: record_id}
+        self._apply(row, self._body())
+        with self.lock:
+            self.store[entity_set][record_id] = row
+        headers = {"OData-EntityId": f"http://localhost/api/data/{API_VERSION}/{entity_set}({record_id})"}
+        if "return=representation" in (self.headers.get("Prefer") or ""):
+            return self._reply(201, row, headers)
+        self._reply(204, headers=headers)
+
+    def do_PATCH(self) -> None:
+        route = self._route()
+        if not route:
+            return
+        entity_set, record_id, _query = route
+        with self.lock:
+            row = self.store[entity_set].get(record_id or "")
+            if row is None:
+                return self._error(404, f"{entity_set} With Id = {record_id} Does Not Exist")
+            self._apply(row, self._body())
+        self._reply(204)
+
+    def do_DELETE(self) -> None:
+        route = self._route()
+        if not route:
+            return
+        entity_set, record_id, _query = route
+        with self.lock:
+            if self.store[entity_set].pop(record_id or "", None) is None:
+                return self._error(404, f"{entity_set} With Id = {record_id} Does Not Exist")
+        self._reply(204)
+
+
+def serve(
+    port: int = 0,
+    counts: dict[str, int] | None = None,
+    latency_ms: float = 0,
+) -> tuple[ThreadingHTTPServer, str]:
+    """Start the stand-in on a background thread; returns ``(server, org_url)``."""
+    schema = load_schema()
+    handler = type("Handler", (StandInHandler,), {
+        "store": generate_rows(schema, counts or {}),
+        "keys": {entity_set_name(t["logicalName"]): primary_key(t["logicalName"]) for t in all_tables(schema)},
+        "lock": threading.Lock(),
+        "latency": latency_ms / 1000,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def parse_counts(values: list[str]) -> dict[str, int]:
+    counts = {}
+    for value in values:
+        table, _, count = value.partition("=")
+        counts[table] = int(count)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve synthetic SimQuip tables over a local Web API stand-in.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default 8080)")
+    parser.add_argument("--rows", nargs="*", default=[], metavar="TABLE=N", help="Override generated row counts")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Fixed delay added to every request")
+    args = parser.parse_args()
+
+    server, url = serve(args.port, parse_counts(args.rows), args.latency_ms)
+    print(f"Stand-in serving {sum(len(r) for r in server.RequestHandlerClass.store.values())} rows at {url}")
+    print("Press Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""SimQuip equipment kit hierarchy materialisation.
+
+``redi_parentequipmentid`` nests equipment into kits (a sim kit holding a
+manikin and a defib trainer, and so on), and resolving a whole kit used to
+take one lookup per level. This job reads all equipment in one paged pass,
+builds the parent/child forest in memory and writes three precomputed
+columns back with ``UpdateMultiple``:
+
+- ``redi_sq_hierarchypath``    ``/<root id>/.../<own id>/``
+- ``redi_sq_hierarchydepth``   0 for a top-level item
+- ``redi_sq_rootequipmentid``  the top-level kit (the item itself for roots)
+
+Kit queries then become single filtered reads:
+
+    everything in kit K          _redi_sq_rootequipmentid_value eq K
+    subtree under item X         startswith(redi_sq_hierarchypath,'<X's path>')
+    which kit is X in            read X's redi_sq_rootequipmentid
+
+Only rows whose values changed are written, so re-runs are cheap. Items in
+a parent cycle (or below one), and items nested deeper than ``MAX_DEPTH``
+levels, are reported and left untouched; the depth limit keeps the path
+within its column. A parent that is missing or outside the SimQuip rows is
+treated as no parent.
+
+Usage: python3 dataverse/equipment-hierarchy.py [--chunk-size 500] [--workers 4] [--dry-run]
+"""
+
+import argparse
+import sys
+import time
+from typing import Any
+
+from dv_client import DataverseClient, run_chunks
+from dv_schema import (
+    app_filter,
+    column_length,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    primary_key,
+)
+
+EQUIPMENT_TABLE = "redi_equipment"
+PARENT_COLUMN = "redi_parentequipmentid"
+ROOT_COLUMN = "redi_sq_rootequipmentid"
+PATH_COLUMN = "redi_sq_hierarchypath"
+DEPTH_COLUMN = "redi_sq_hierarchydepth"
+CODE_COLUMN = "redi_equipmentcode"
+
+# Deepest nesting given a path: "/" plus a 36-character id and "/" per level; main() checks that
+# PATH_LENGTH fits redi_sq_hierarchypath's maxLength before writing anything
+MAX_DEPTH = 7
+PATH_LENGTH = 1 + (MAX_DEPTH + 1) * 37
+
+
+def read_equipment(client: DataverseClient, table: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    pk = primary_key(EQUIPMENT_TABLE)
+    rows = client.iter_rows(
+        entity_set_name(EQUIPMENT_TABLE),
+        select=[pk, CODE_COLUMN, lookup_value_column(PARENT_COLUMN), lookup_value_column(ROOT_COLUMN),
+                PATH_COLUMN, DEPTH_COLUMN],
+        filter=app_filter(table),
+    )
+    return {row[pk]: row for row in rows}
+
+
+def build_forest(parents: dict[str, str | None]) -> tuple[dict[str, tuple[str, int, str]], set[str]]:
+    """Compute ``(path, depth, root)`` per item; returns it with the set of items in or below a cycle.
+
+    Walks each item's parent chain once, memoising results, so the whole
+    forest is O(n) regardless of depth and never recurses.
+    """
+    resolved: dict[str, tuple[str, int, str]] = {}
+    cyclic: set[str] = set()
+    for item in parents:
+        chain: list[str] = []
+        on_chain: set[str] = set()
+        node: str | None = item
+        while node is not None and node not in resolved and node not in cyclic:
+            if node in on_chain:
+                cyclic.update(chain)  # the loop and everything that walked into it
+                break
+            chain.append(node)
+            on_chain.add(node)
+            node = parents.get(node)
+        else:
+            if node in cyclic:
+                cyclic.update(chain)
+                continue
+            # ``node`` is None (chain reached a root) or already resolved
+            path, depth, root = resolved[node] if node is not None else ("/", -1, "")
+            for member in reversed(chain):
+                path, depth = f"{path}{member}/", depth + 1
+                root = root or member
+                resolved[member] = (path, depth, root)
+    return resolved, cyclic
+
+
+def changed_records(
+    rows: dict[str, dict[str, Any]],
+    resolved: dict[str, tuple[str, int, str]],
+) -> list[dict[str, Any]]:
+    pk = primary_key(EQUIPMENT_TABLE)
+    records = []
+    for item, (path, depth, root) in resolved.items():
+        row = rows[item]
+        if (row.get(PATH_COLUMN), row.get(DEPTH_COLUMN), row.get(lookup_value_column(ROOT_COLUMN))) == (path, depth, root):
+            continue
+        records.append({
+            pk: item,
+            PATH_COLUMN: path,
+            DEPTH_COLUMN: depth,
+            f"{ROOT_COLUMN}@odata.bind": f"/{entity_set_name(EQUIPMENT_TABLE)}({root})",
+        })
+    return records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Materialise equipment kit paths, depths and roots.")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Items per UpdateMultiple call (default 500)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent update requests (default 4)")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args()
+
+    table = get_table(load_schema(), EQUIPMENT_TABLE)
+    path_column_length = column_length(table, PATH_COLUMN)
+    if path_column_length < PATH_LENGTH:
+        print(f"ERROR: {PATH_COLUMN} holds {path_column_length} characters but a path "
+              f"{MAX_DEPTH} levels deep needs {PATH_LENGTH}; raise its maxLength or lower MAX_DEPTH",
+              file=sys.stderr)
+        sys.exit(1)
+    client = DataverseClient()
+    started = time.monotonic()
+    rows = read_equipment(client, table)
+    print(f"Read {len(rows)} equipment items ({time.monotonic() - started:.1f}s)")
+
+    parents: dict[str, str | None] = {}
+    orphans = 0
+    for item, row in rows.items():
+        parent = row.get(lookup_value_column(PARENT_COLUMN))
+        if parent and parent not in rows:
+            orphans += 1
+            parent = None
+        parents[item] = parent
+    resolved, cyclic = build_forest(parents)
+    too_deep = {item for item, (_path, depth, _root) in resolved.items() if depth > MAX_DEPTH}
+    for item in too_deep:
+        del resolved[item]
+
+    kits = {root for _path, depth, root in resolved.values() if depth > 0}
+    max_depth = max((depth for _path, depth, _root in resolved.values()), default=0)
+    print(f"  {len(kits)} kits, max depth {max_depth}, {orphans} missing parents treated as top-level")
+    if cyclic:
+        print(f"  {len(cyclic)} items are in or below a parent cycle and were skipped:", file=sys.stderr)
+        for item in sorted(cyclic, key=lambda i: rows[i].get(CODE_COLUMN) or i)[:50]:
+            print(f"    {rows[item].get(CODE_COLUMN) or item} -> parent {parents[item]}", file=sys.stderr)
+    if too_deep:
+        print(f"  {len(too_deep)} items are nested more than {MAX_DEPTH} levels deep and were skipped:",
+              file=sys.stderr)
+        for item in sorted(too_deep, key=lambda i: rows[i].get(CODE_COLUMN) or i)[:50]:
+            print(f"    {rows[item].get(CODE_COLUMN) or item}", file=sys.stderr)
+
+    records = changed_records(rows, resolved)
+    print(f"  {len(records)} items need updating")
+    if args.dry_run or not records:
+        sys.exit(1 if cyclic or too_deep else 0)
+
+    failures = run_chunks(
+        lambda chunk: client.update_multiple(entity_set_name(EQUIPMENT_TABLE), EQUIPMENT_TABLE, chunk),
+        records, args.chunk_size, args.workers,
+    )
+    for chunk, e in failures:
+        print(f"  FAILED chunk of {len(chunk)}: {e.message}", file=sys.stderr)
+    failed = sum(len(chunk) for chunk, _e in failures)
+    print(f"Updated {len(records) - failed} items ({time.monotonic() - started:.1f}s)")
+    sys.exit(1 if failed or cyclic or too_deep else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""SimQuip streaming table export.
+
+Pages through SimQuip tables with ``Prefer: odata.maxpagesize`` and
+``@odata.nextLink``, selecting only the columns defined in schema.json, and
+appends each page to ``<table>.jsonl`` (or ``.jsonl.gz``) as soon as it
+arrives. Only one page per table is held in memory, so memory use does not
+grow with table size. Tables are exported concurrently.
+
+Shared tables are limited to SimQuip rows with their schema ``appFilter``
+unless ``--all-rows`` is given. Files are written under a temporary name and
+renamed when the table completes, so a partial export never looks complete.
+
+Usage: python3 dataverse/export-tables.py [TABLE ...] [--out-dir exports] [--gzip] [--page-size 5000] [--workers 4]
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import IO, Any
+
+from dv_client import MAX_PAGE_SIZE, DataverseClient
+from dv_schema import all_tables, app_filter, entity_set_name, get_table, load_schema, select_columns
+
+
+def open_output(path: Path, compress: bool) -> IO[str]:
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+def export_table(
+    client: DataverseClient,
+    table: dict[str, Any],
+    out_dir: Path,
+    compress: bool,
+    page_size: int,
+    all_rows: bool,
+) -> tuple[str, int, int, float]:
+    """Stream one table to JSONL; returns ``(name, rows, pages, seconds)``."""
+    logical_name = table["logicalName"]
+    suffix = ".jsonl.gz" if compress else ".jsonl"
+    final_path = out_dir / f"{logical_name}{suffix}"
+    temp_path = out_dir / f"{logical_name}{suffix}.partial"
+
+    start = time.monotonic()
+    rows = pages = 0
+    with open_output(temp_path, compress) as out:
+        for page in client.iter_pages(
+            entity_set_name(logical_name),
+            select=select_columns(table),
+            filter=None if all_rows else app_filter(table),
+            page_size=page_size,
+        ):
+            for row in page:
+                row.pop("@odata.etag", None)
+                out.write(json.dumps(row, separators=(",", ":")))
+                out.write("\n")
+            rows += len(page)
+            pages += 1
+    temp_path.replace(final_path)
+    return logical_name, rows, pages, time.monotonic() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream SimQuip tables to JSONL files.")
+    parser.add_argument("tables", nargs="*", help="Table logical names (default: all schema tables)")
+    parser.add_argument("--out-dir", type=Path, default=Path("exports"), help="Output directory (default ./exports)")
+    parser.add_argument("--gzip", action="store_true", help="Write .jsonl.gz files")
+    parser.add_argument("--page-size", type=int, default=MAX_PAGE_SIZE, help="odata.maxpagesize (default 5000)")
+    parser.add_argument("--workers", type=int, default=4, help="Tables exported concurrently (default 4)")
+    parser.add_argument("--all-rows", action="store_true", help="Ignore appFilter on shared tables")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    try:
+        tables = [get_table(schema, name) for name in args.tables] or all_tables(schema)
+    except KeyError as e:
+        print(f"ERROR: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+
+    client = DataverseClient()
+    started = time.monotonic()
+    failed = False
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(export_table, client, table, args.out_dir, args.gzip, args.page_size, args.all_rows): table
+            for table in tables
+        }
+        for future in as_completed(futures):
+            logical_name = futures[future]["logicalName"]
+            try:
+                name, rows, pages, elapsed = future.result()
+            except Exception as e:  # report every table, even if one fails
+                print(f"  FAILED {logical_name}: {e}", file=sys.stderr)
+                failed = True
+                continue
+            print(f"  Exported {name}: {rows} rows in {pages} pages ({elapsed:.1f}s)")
+
+    print(f"\nExport written to: {args.out_dir} ({time.monotonic() - started:.1f}s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
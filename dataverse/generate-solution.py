@@ -5,15 +5,32 @@ Generate a Dataverse solution package from schema.json for SimQuip.
 Reads the schema definition and generates the full unpacked solution structure
 that can be packed using `pac solution pack` and imported into Dataverse.
 
+The schema is first checked for performance hazards (see dv_lint.py);
+errors stop the generation. `--lint-only` runs just the check and
+`--lint-report` writes its findings as JSON for CI.
+
+Usage: python3 dataverse/generate-solution.py [--lint-only] [--lint-report lint.json] [--strict] [--skip-lint]
+
 Based on the REdI Trolley Audit solution generator pattern.
 """
 
+import argparse
 import json
 import os
 import shutil
+import sys
 from pathlib import Path
 from typing import Any
 
+import dv_lint
+from dv_schema import (
+    DEFAULT_FILE_SIZE_KB,
+    DEFAULT_MEMO_LENGTH,
+    DEFAULT_STRING_LENGTH,
+    column_flags,
+    primary_name_column,
+)
+
 # Constants
 SOLUTION_NAME = "SimQuipTables"
 SOLUTION_DISPLAY_NAME = "SimQuip Tables"
@@ -39,27 +56,6 @@ def load_schema() -> dict[str, Any]:
         return json.load(f)
 
 
-def get_primary_name_column(table: dict[str, Any]) -> str:
-    """Determine the primary name column for a table.
-
-    Uses the explicit primaryNameColumn from schema if set,
-    otherwise falls back to auto-detection.
-    """
-    if "primaryNameColumn" in table:
-        return table["primaryNameColumn"]
-    for col in table["columns"]:
-        if col["logicalName"] == "redi_name":
-            return "redi_name"
-    for col in table["columns"]:
-        if col["type"] == "String" and col.get("required", False):
-            return col["logicalName"]
-    for col in table["columns"]:
-        if col["type"] == "String":
-            return col["logicalName"]
-    # Default: use entity_name convention
-    return f"{table['logicalName']}_name"
-
-
 def label_json(text: str) -> str:
     return f'<label description="{text}" languagecode="{LANGUAGE_CODE}" />'
 
@@ -77,6 +73,7 @@ def generate_attribute_xml(
     required_level = "required" if required else "none"
 
     physical_name = logical_name
+    flags = column_flags(col, is_primary_name)
 
     display_mask = "ValidForAdvancedFind|ValidForForm|ValidForGrid"
     if is_primary_name:
@@ -104,14 +101,14 @@ def generate_attribute_xml(
           <CanModifyAdditionalSettings>1</CanModifyAdditionalSettings>
           <SourceType>0</SourceType>
           <IsGlobalFilterEnabled>0</IsGlobalFilterEnabled>
-          <IsSortableEnabled>0</IsSortableEnabled>
+          <IsSortableEnabled>{int(flags["sortable"])}</IsSortableEnabled>
           <CanModifyGlobalFilterSettings>1</CanModifyGlobalFilterSettings>
           <CanModifyIsSortableSettings>1</CanModifyIsSortableSettings>
           <IsDataSourceSecret>0</IsDataSourceSecret>
           <AutoNumberFormat></AutoNumberFormat>
-          <IsSearchable>{1 if is_primary_name else 0}</IsSearchable>
-          <IsFilterable>0</IsFilterable>
-          <IsRetrievable>{1 if is_primary_name else 0}</IsRetrievable>
+          <IsSearchable>{int(flags["searchable"])}</IsSearchable>
+          <IsFilterable>{int(flags["filterable"])}</IsFilterable>
+          <IsRetrievable>{int(flags["retrievable"])}</IsRetrievable>
           <IsLocalizable>0</IsLocalizable>
           {{EXTRA_BLOCK}}
           <displaynames>
@@ -120,7 +117,7 @@ def generate_attribute_xml(
         </attribute>"""
 
     if col_type == "String":
-        max_length = col.get("maxLength", 200)
+        max_length = col.get("maxLength", DEFAULT_STRING_LENGTH)
         type_block = "<Type>nvarchar</Type>"
         extra = f"""<Format>text</Format>
           <MaxLength>{max_length}</MaxLength>
@@ -128,8 +125,12 @@ def generate_attribute_xml(
 
     elif col_type == "Memo":
         type_block = "<Type>ntext</Type>"
-        extra = """<Format>textarea</Format>
-          <MaxLength>2000</MaxLength>"""
+        extra = f"""<Format>textarea</Format>
+          <MaxLength>{col.get("maxLength", DEFAULT_MEMO_LENGTH)}</MaxLength>"""
+
+    elif col_type == "File":
+        type_block = "<Type>file</Type>"
+        extra = f"""<MaxSizeInKB>{col.get("maxSizeInKB", DEFAULT_FILE_SIZE_KB)}</MaxSizeInKB>"""
 
     elif col_type == "Integer":
         type_block = "<Type>int</Type>"
@@ -729,6 +730,33 @@ def generate_system_attributes(table_logical_name: str) -> str:
         </attribute>"""
 
 
+def generate_entity_keys_xml(table: dict[str, Any]) -> str:
+    """Generate the EntityKeys block for a table's alternate keys."""
+    keys = table.get("alternateKeys", [])
+    if not keys:
+        return ""
+
+    key_xmls = []
+    for key in keys:
+        attributes = "\n".join(
+            f"            <AttributeName>{column}</AttributeName>" for column in key["columns"]
+        )
+        key_xmls.append(f"""        <EntityKey>
+          <LogicalName>{key["name"]}</LogicalName>
+          <Name>{key["name"]}</Name>
+          <EntityKeyAttributes>
+{attributes}
+          </EntityKeyAttributes>
+          <IntroducedVersion>1.0.0.0</IntroducedVersion>
+          <IsCustomizable>1</IsCustomizable>
+          <displaynames>
+            <displayname description="{key["displayName"]}" languagecode="{LANGUAGE_CODE}" />
+          </displaynames>
+        </EntityKey>""")
+
+    return "\n      <EntityKeys>\n" + "\n".join(key_xmls) + "\n      </EntityKeys>"
+
+
 def generate_entity_xml(table: dict[str, Any]) -> str:
     """Generate the complete Entity.xml for a table."""
     logical_name = table["logicalName"]
@@ -737,7 +765,7 @@ def generate_entity_xml(table: dict[str, Any]) -> str:
     description = table.get("description", f"{display_name} table for SimQuip")
     entity_set_name = logical_name + "es" if logical_name.endswith("s") else logical_name + "s"
 
-    primary_name_col = get_primary_name_column(table)
+    primary_name_col = primary_name_column(table)
 
     custom_attrs = []
     for col in table["columns"]:
@@ -765,6 +793,7 @@ def generate_entity_xml(table: dict[str, Any]) -> str:
 
     system_attrs = generate_system_attributes(logical_name)
     all_attrs = system_attrs + "\n" + "\n".join(custom_attrs)
+    entity_keys = generate_entity_keys_xml(table)
 
     entity_xml = f"""<?xml version="1.0" encoding="utf-8"?>
 <Entity xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
@@ -782,7 +811,7 @@ def generate_entity_xml(table: dict[str, Any]) -> str:
       </Descriptions>
       <attributes>
 {all_attrs}
-      </attributes>
+      </attributes>{entity_keys}
       <EntitySetName>{entity_set_name}</EntitySetName>
       <IsDuplicateCheckSupported>0</IsDuplicateCheckSupported>
       <IsBusinessProcessEnabled>0</IsBusinessProcessEnabled>
@@ -1099,5 +1128,39 @@ def generate_solution() -> None:
     print(f"Relationships: {len(all_relationship_names)}")
 
 
+def lint_schema(report_path: Path | None, strict: bool) -> bool:
+    """Run the performance lint; returns False if the schema should not be generated."""
+    try:
+        config = dv_lint.load_config()
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return False
+    findings = dv_lint.lint(load_schema(), config)
+    report = dv_lint.report(findings, config)
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    for finding in findings:
+        print(dv_lint.format_finding(finding), file=sys.stderr if finding.severity == "error" else sys.stdout)
+    errors, warnings = report["summary"]["errors"], report["summary"]["warnings"]
+    print(f"Schema lint: {errors} error(s), {warnings} warning(s)")
+    return errors == 0 and not (strict and warnings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate the SimQuip solution package from schema.json.")
+    parser.add_argument("--lint-only", action="store_true", help="Check the schema without generating")
+    parser.add_argument("--lint-report", type=Path, help="Write the lint findings to this JSON file")
+    parser.add_argument("--strict", action="store_true", help="Treat lint warnings as errors")
+    parser.add_argument("--skip-lint", action="store_true", help="Generate without checking the schema")
+    args = parser.parse_args()
+
+    if not args.skip_lint and not lint_schema(args.lint_report, args.strict):
+        print("ERROR: Schema lint failed; fix the findings above or adjust schema-lint.json", file=sys.stderr)
+        sys.exit(1)
+    if not args.lint_only:
+        generate_solution()
+
+
 if __name__ == "__main__":
-    generate_solution()
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Generate TypeScript row models and $select projections from schema.json.
+
+Writes ``src/generated/models/SimQuipTablesModel.ts`` with, for every table
+in ``tables`` and ``sharedTables``:
+
+- the choice value maps, in the same ``{value: 'Label'} as const`` shape as
+  the PAC-generated models;
+- a ``<EntitySet>Row`` interface keyed by Web API property names (lookups as
+  ``_<column>_value``);
+- a ``list`` and ``detail`` column projection in ``tableProjections``.
+
+``DataverseDataService`` selects the ``list`` projection for ``getAll`` and
+the ``detail`` projection for ``getById``. Memo columns are detail-only
+unless the column sets ``"listView": true``, so list pages never pull the
+large JSON / description columns.
+
+Run after every schema.json change; ``--check`` exits non-zero if the
+generated file is out of date (for CI).
+
+Usage: python3 dataverse/generate-ts-models.py [--check]
+"""
+
+import argparse
+import re
+import sys
+from typing import Any
+
+from dv_schema import (
+    SCRIPT_DIR,
+    all_tables,
+    entity_set_name,
+    list_columns,
+    load_schema,
+    lookup_value_column,
+    option_values,
+    primary_key,
+    primary_name_column,
+    select_columns,
+)
+
+OUTPUT_PATH = SCRIPT_DIR.parent / "src" / "generated" / "models" / "SimQuipTablesModel.ts"
+
+# Matches .prettierrc
+PRINT_WIDTH = 100
+
+TS_TYPES = {
+    "String": "string",
+    "Memo": "string",
+    "Integer": "number",
+    "Boolean": "boolean",
+    "DateOnly": "string",
+    "DateTime": "string",
+    "File": "string",
+}
+
+HEADER = """/*!
+ * Generated by dataverse/generate-ts-models.py from dataverse/schema.json.
+ * Do not edit this file directly; change schema.json and re-run the generator.
+ */
+"""
+
+
+def type_prefix(logical_name: str) -> str:
+    """PAC-style type prefix, e.g. ``Redi_equipments``."""
+    name = entity_set_name(logical_name)
+    return name[0].upper() + name[1:]
+
+
+def ts_identifier(label: str) -> str:
+    """Choice label as a TS-safe string value, following PAC (``In Use`` -> ``InUse``)."""
+    return re.sub(r"[^0-9A-Za-z_]", "", label.replace("(", "_").replace(")", "_"))
+
+
+def string_array(items: list[str], indent: str) -> str:
+    """Format a string array the way prettier would at PRINT_WIDTH."""
+    one_line = "[" + ", ".join(f"'{item}'" for item in items) + "]"
+    if len(indent) + len(one_line) + 10 <= PRINT_WIDTH:
+        return one_line
+    inner = "".join(f"{indent}  '{item}',\n" for item in items)
+    return f"[\n{inner}{indent}]"
+
+
+def generate_choices(table: dict[str, Any]) -> list[str]:
+    prefix = type_prefix(table["logicalName"])
+    blocks = []
+    for col in table["columns"]:
+        if col["type"] != "Choice":
+            continue
+        name = f"{prefix}{col['logicalName']}"
+        entries = ",\n".join(
+            f"  {value}: '{ts_identifier(label)}'" for label, value in option_values(col).items()
+        )
+        blocks.append(
+            f"export const {name} = {{\n{entries},\n}} as const\n"
+            f"export type {name} = keyof typeof {name}\n"
+        )
+    return blocks
+
+
+def generate_row_interface(table: dict[str, Any]) -> str:
+    logical_name = table["logicalName"]
+    prefix = type_prefix(logical_name)
+    fields = [f"  {primary_key(logical_name)}: string", f"  {primary_name_column(table)}: string | null"]
+    for col in table["columns"]:
+        name = col["logicalName"]
+        if col["type"] == "Lookup":
+            fields.append(f"  {lookup_value_column(name)}: string | null")
+        elif col["type"] == "Choice":
+            fields.append(f"  {name}: {prefix}{name} | null")
+        elif name != primary_name_column(table):
+            fields.append(f"  {name}: {TS_TYPES[col['type']]} | null")
+    body = "\n".join(fields)
+    return f"/** {table['displayName']} row as returned by the Web API. */\nexport interface {prefix}Row {{\n{body}\n}}\n"
+
+
+def generate_projections(tables: list[dict[str, Any]]) -> str:
+    entries = []
+    for table in tables:
+        indent = "    "
+        entries.append(
+            f"  {entity_set_name(table['logicalName'])}: {{\n"
+            f"{indent}list: {string_array(list_columns(table), indent)},\n"
+            f"{indent}detail: {string_array(select_columns(table), indent)},\n"
+            "  },"
+        )
+    return (
+        "/** Column projections per view: `list` for getAll, `detail` for getById. */\n"
+        "export interface TableProjection {\n"
+        "  list: readonly string[]\n"
+        "  detail: readonly string[]\n"
+        "}\n\n"
+        "/** Keyed by entity set name (the adapter `tableName`). */\n"
+        "export const tableProjections: Record<string, TableProjection> = {\n"
+        + "\n".join(entries)
+        + "\n}\n"
+    )
+
+
+def generate(schema: dict[str, Any]) -> str:
+    tables = all_tables(schema)
+    sections = [HEADER]
+    for table in tables:
+        sections.append(f"// ── {table['logicalName']} {'─' * (70 - len(table['logicalName']))}\n")
+        sections.extend(generate_choices(table))
+        sections.append(generate_row_interface(table))
+    sections.append(f"// ── Projections {'─' * 62}\n")
+    sections.append(generate_projections(tables))
+    return "\n".join(sections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate TypeScript models and projections from schema.json.")
+    parser.add_argument("--check", action="store_true", help="Fail if the generated file is out of date")
+    args = parser.parse_args()
+
+    output = generate(load_schema())
+    if args.check:
+        current = OUTPUT_PATH.read_text(encoding="utf-8") if OUTPUT_PATH.exists() else ""
+        if current != output:
+            print(f"{OUTPUT_PATH} is out of date; run dataverse/generate-ts-models.py", file=sys.stderr)
+            sys.exit(1)
+        print(f"{OUTPUT_PATH.name} is up to date")
+        return
+
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_PATH.write_text(output, encoding="utf-8")
+    print(f"Wrote {OUTPUT_PATH.relative_to(SCRIPT_DIR.parent)}")
+
+
+if __name__ == "__main__":
+    main()
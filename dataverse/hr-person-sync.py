@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""SimQuip hash-diff person sync from an HR extract.
+
+``redi_person`` is shared across REdI apps and kept in step with an HR CSV.
+Rather than re-saving everyone, this tool:
+
+1. reads the HR CSV (headers are schema.json logical names, as for
+   load-reference-data.py: ``redi_email``, ``redi_displayname``,
+   ``redi_phone``) and computes a stable hash of each person's synced
+   columns plus ``redi_active = true``;
+2. reads ``redi_person`` once, paged, selecting only those columns, and
+   hashes each row the same way;
+3. matches people by e-mail (case-insensitive) and sends only the
+   difference: new people, people whose hash changed, and
+   deactivations (``redi_active = false``) for active people missing from
+   the extract. Rows that have never been active or inactive
+   (``redi_active`` empty) belong to other apps and are never deactivated.
+
+Changes go out as ``UpsertMultiple`` chunks addressed by primary key (new
+people get a client-generated id), on a few threads. A daily run over
+thousands of staff therefore writes only the handful that changed.
+
+A short or truncated extract would deactivate most of the organisation, so
+the run stops if more than ``--max-deactivate-percent`` of active people
+would be deactivated.
+
+Usage: python3 dataverse/hr-person-sync.py HR_CSV [--chunk-size 200] [--workers 4]
+           [--max-deactivate-percent 5] [--dry-run]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from dv_client import DataverseClient, run_chunks
+from dv_schema import entity_set_name, get_table, load_schema, primary_key, primary_name_column
+
+PERSON_TABLE = "redi_person"
+EMAIL_COLUMN = "redi_email"
+ACTIVE_COLUMN = "redi_active"
+
+
+@dataclass
+class SyncPlan:
+    inserts: list[dict[str, Any]] = field(default_factory=list)
+    updates: list[dict[str, Any]] = field(default_factory=list)
+    deactivations: list[dict[str, Any]] = field(default_factory=list)
+    unchanged: int = 0
+    active: int = 0
+    skipped: int = 0
+
+    def writes(self) -> list[dict[str, Any]]:
+        return self.inserts + self.updates + self.deactivations
+
+
+def sync_columns(schema: dict[str, Any]) -> list[str]:
+    """The person columns HR owns: the primary name and the text columns."""
+    table = get_table(schema, PERSON_TABLE)
+    text_columns = [c["logicalName"] for c in table["columns"] if c["type"] in ("String", "Memo")]
+    return [primary_name_column(table), *text_columns]
+
+
+def normalize(value: Any) -> str:
+    return "" if value is None else " ".join(str(value).split())
+
+
+def email_key(value: Any) -> str:
+    return normalize(value).casefold()
+
+
+def row_hash(columns: list[str], values: dict[str, Any], active: bool) -> str:
+    """Stable hash of the synced values; the same person hashes the same from HR or Dataverse."""
+    payload = {column: normalize(values.get(column)) for column in columns}
+    payload[ACTIVE_COLUMN] = active
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def read_extract(path: Path, columns: list[str]) -> tuple[dict[str, dict[str, str]], list[str]]:
+    """HR rows by case-folded e-mail, plus errors for rows without one or repeated ones."""
+    people, errors = {}, []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in columns if c not in (reader.fieldnames or [])]
+        if EMAIL_COLUMN in missing:
+            raise ValueError(f"{path.name} has no {EMAIL_COLUMN} column")
+        for line_no, raw in enumerate(reader, start=2):
+            email = email_key(raw.get(EMAIL_COLUMN))
+            if not email:
+                errors.append(f"line {line_no}: no {EMAIL_COLUMN}")
+            elif email in people:
+                errors.append(f"line {line_no}: duplicate {EMAIL_COLUMN} {email!r}")
+            else:
+                # Columns the extract lacks are left as they are in Dataverse
+                people[email] = {c: normalize(raw.get(c)) for c in columns if c not in missing}
+    return people, errors
+
+
+def read_people(client: DataverseClient, columns: list[str]) -> tuple[dict[str, dict[str, Any]], set[str]]:
+    """Dataverse people by case-folded e-mail, in one paged read, plus e-mails on more than one row."""
+    pk = primary_key(PERSON_TABLE)
+    people, duplicates = {}, set()
+    for row in client.iter_rows(entity_set_name(PERSON_TABLE), select=[pk, *columns, ACTIVE_COLUMN]):
+        email = email_key(row.get(EMAIL_COLUMN))
+        if not email:
+            continue
+        if email in people:
+            duplicates.add(email)
+        people[email] = row
+    for email in duplicates:
+        del people[email]
+    return people, duplicates
+
+
+def plan_sync(
+    columns: list[str],
+    incoming: dict[str, dict[str, str]],
+    existing: dict[str, dict[str, Any]],
+    duplicates: set[str],
+) -> SyncPlan:
+    """Inserts, updates and deactivations; e-mails on several existing rows are neither written nor inserted."""
+    pk = primary_key(PERSON_TABLE)
+    plan = SyncPlan()
+    for email, values in incoming.items():
+        if email in duplicates:
+            plan.skipped += 1
+            continue
+        row = existing.get(email)
+        if row is None:
+            plan.inserts.append({pk: str(uuid.uuid4()), **values, ACTIVE_COLUMN: True})
+            continue
+        # Compare only the columns the extract carries
+        carried = [c for c in columns if c in values]
+        if row_hash(carried, values, True) == row_hash(carried, row, row.get(ACTIVE_COLUMN) is True):
+            plan.unchanged += 1
+        else:
+            plan.updates.append({pk: row[pk], **values, ACTIVE_COLUMN: True})
+    for email, row in existing.items():
+        if email in duplicates:
+            continue
+        if row.get(ACTIVE_COLUMN) is True:
+            plan.active += 1
+            if email not in incoming:
+                plan.deactivations.append({pk: row[pk], ACTIVE_COLUMN: False})
+    return plan
+
+
+def apply_plan(client: DataverseClient, plan: SyncPlan, chunk_size: int, workers: int) -> list[str]:
+    """Send every change as UpsertMultiple chunks; returns error messages."""
+    entity_set = entity_set_name(PERSON_TABLE)
+    failures = run_chunks(
+        lambda chunk: client.upsert_multiple(entity_set, PERSON_TABLE, chunk), plan.writes(), chunk_size, workers
+    )
+    return [f"upsert chunk of {len(chunk)} failed: {e.message}" for chunk, e in failures]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sync redi_person from an HR CSV, writing only what changed.")
+    parser.add_argument("extract", type=Path, help="HR CSV with schema.json logical names as headers")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Records per UpsertMultiple call (default 200)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent upsert requests (default 4)")
+    parser.add_argument("--max-deactivate-percent", type=float, default=5,
+                        help="Stop if more than this share of active people would be deactivated (default 5)")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+    args = parser.parse_args()
+
+    columns = sync_columns(load_schema())
+    try:
+        incoming, errors = read_extract(args.extract, columns)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Read {len(incoming)} people from {args.extract.name}")
+
+    client = DataverseClient()
+    started = time.monotonic()
+    existing, duplicates = read_people(client, columns)
+    errors += [f"{email!r} is on more than one {PERSON_TABLE} row; left alone" for email in sorted(duplicates)]
+    print(f"Read {len(existing)} {PERSON_TABLE} rows ({time.monotonic() - started:.1f}s)")
+
+    plan = plan_sync(columns, incoming, existing, duplicates)
+    print(f"  {len(plan.inserts)} new, {len(plan.updates)} changed, {len(plan.deactivations)} to deactivate, "
+          f"{plan.unchanged} unchanged, {plan.skipped} skipped as duplicates")
+    limit = plan.active * args.max_deactivate_percent / 100
+    if len(plan.deactivations) > limit:
+        print(f"ERROR: {len(plan.deactivations)} of {plan.active} active people would be deactivated, over the "
+              f"{args.max_deactivate_percent:g}% limit; check the extract or raise --max-deactivate-percent",
+              file=sys.stderr)
+        sys.exit(1)
+
+    if not args.dry_run and plan.writes():
+        errors += apply_plan(client, plan, args.chunk_size, args.workers)
+        print(f"Wrote {len(plan.writes())} changes in {time.monotonic() - started:.1f}s")
+
+    if errors:
+        print(f"\n{len(errors)} error(s):", file=sys.stderr)
+        for message in errors[:50]:
+            print(f"  {message}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
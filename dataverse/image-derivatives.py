@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""SimQuip image derivative pipeline with content-hash deduplication.
+
+The gallery and key-image views load full-size photos even where they only
+show a thumbnail, and the same photo is often attached to several equipment
+and location records. This tool walks the image rows of
+``redi_equipmentmedia`` and ``redi_locationmedia`` in batches and:
+
+1. downloads each image (the ``redi_file`` column, or an http(s)
+   ``redi_fileurl``) on a thread pool and hashes it with SHA-256;
+2. stores each distinct image once as a ``redi_mediablob`` row, keyed by
+   content hash. Images already stored by an earlier run are reused;
+3. renders a thumbnail (240 px) and a preview (1280 px) of each new blob in
+   a process pool and uploads them into the blob's file columns;
+4. links every media row to its blob and sets ``redi_thumbnailurl`` /
+   ``redi_previewurl`` with ``UpdateMultiple``;
+5. sets ``redi_sq_keythumbnailurl`` on equipment whose ``redi_keyimageurl``
+   points at a processed image.
+
+Rows already linked to a blob are skipped unless ``--force`` is given, so
+re-runs only handle new uploads. Pillow is needed for this tool only
+(``pip install Pillow``).
+
+Usage: python3 dataverse/image-derivatives.py [--table redi_equipmentmedia]
+           [--workers 6] [--processes N] [--batch-size 200] [--force] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from dv_client import DataverseClient, DataverseError, chunked
+from dv_schema import (
+    app_filter,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    option_values,
+    primary_key,
+)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # reported in main(); the rest of the tools do not need Pillow
+    Image = ImageOps = None
+
+MEDIA_TABLES = ["redi_equipmentmedia", "redi_locationmedia"]
+BLOB_TABLE = "redi_mediablob"
+BLOB_LOOKUP = "redi_mediablobid"
+FILE_COLUMN = "redi_file"
+EQUIPMENT_TABLE = "redi_equipment"
+KEY_IMAGE_COLUMN = "redi_keyimageurl"
+KEY_THUMBNAIL_COLUMN = "redi_sq_keythumbnailurl"
+
+# derivative -> (longest edge in px, blob file column, media URL column)
+DERIVATIVES = {
+    "thumbnail": (240, "redi_thumbnail", "redi_thumbnailurl"),
+    "preview": (1280, "redi_preview", "redi_previewurl"),
+}
+JPEG_QUALITY = 80
+
+# Linked images are fetched with a plain GET; anything larger is not a photo worth shrinking
+MAX_REMOTE_BYTES = 32 * 1024 * 1024
+REMOTE_TIMEOUT = 60
+
+
+@dataclass
+class MediaImage:
+    table: str
+    row_id: str
+    file_name: str
+    file_url: str
+    has_file: bool
+    content_hash: str = ""
+
+
+@dataclass
+class Derivatives:
+    width: int
+    height: int
+    mime_type: str
+    files: dict[str, tuple[bytes, str]] = field(default_factory=dict)  # name -> (content, mime type)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Rendering (runs in worker processes)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def make_derivatives(data: bytes) -> Derivatives:
+    """Render every size in :data:`DERIVATIVES` from one image.
+
+    Raises ``ValueError`` if the content is not an image Pillow can read.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            result = Derivatives(*img.size, Image.MIME.get(img.format or "", ""))
+            if img.getexif().get(0x0112) in (5, 6, 7, 8):  # EXIF orientation turns it by 90 degrees
+                result.width, result.height = result.height, result.width
+            # Let the JPEG decoder scale down by a power of two up front; the
+            # preview is the largest size needed, so nothing is lost.
+            largest = max(edge for edge, _column, _url in DERIVATIVES.values())
+            img.draft("RGB", (largest, largest))
+            img = ImageOps.exif_transpose(img)
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+            for name, (edge, _column, _url) in DERIVATIVES.items():
+                sized = img.copy()
+                sized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                buf = io.BytesIO()
+                if has_alpha:
+                    sized.save(buf, "PNG", optimize=True)
+                    result.files[name] = (buf.getvalue(), "image/png")
+                else:
+                    sized.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+                    result.files[name] = (buf.getvalue(), "image/jpeg")
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(f"not a readable image ({type(e).__name__})") from None
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Dataverse reads
+# ═══════════════════════════════════════════════════════════════════════════
+
+def read_images(
+    client: DataverseClient,
+    schema: dict[str, Any],
+    table: str,
+    force: bool,
+) -> tuple[list[MediaImage], dict[str, str]]:
+    """Image rows still to process, and file URL -> thumbnail URL for rows already done."""
+    media_def = get_table(schema, table)
+    mediatype = next(c for c in media_def["columns"] if c["logicalName"] == "redi_mediatype")
+    image_type = option_values(mediatype)["Image"]
+    pk = primary_key(table)
+    blob_ref = lookup_value_column(BLOB_LOOKUP)
+    thumbnail_url = DERIVATIVES["thumbnail"][2]
+    pending, done = [], {}
+    rows = client.iter_rows(
+        entity_set_name(table),
+        select=[pk, "redi_filename", "redi_fileurl", FILE_COLUMN, blob_ref, thumbnail_url],
+        filter=f"redi_mediatype eq {image_type}",
+    )
+    for row in rows:
+        file_url = row.get("redi_fileurl") or ""
+        if row.get(blob_ref) and row.get(thumbnail_url) and not force:
+            if file_url:
+                done[file_url] = row[thumbnail_url]
+            continue
+        file_name = row.get("redi_filename") or ""
+        pending.append(MediaImage(table, row[pk], file_name, file_url, bool(row.get(FILE_COLUMN))))
+    return pending, done
+
+
+def read_blobs(client: DataverseClient) -> tuple[dict[str, str], dict[str, str]]:
+    """Blob ids by content hash: those with every derivative uploaded, and those left incomplete."""
+    pk = primary_key(BLOB_TABLE)
+    columns = [column for _edge, column, _url in DERIVATIVES.values()]
+    complete, incomplete = {}, {}
+    for row in client.iter_rows(entity_set_name(BLOB_TABLE), select=[pk, "redi_contenthash", *columns]):
+        if all(row.get(column) for column in columns):
+            complete[row["redi_contenthash"]] = row[pk]
+        else:
+            incomplete[row["redi_contenthash"]] = row[pk]
+    return complete, incomplete
+
+
+def fetch_image(client: DataverseClient, image: MediaImage) -> bytes | None:
+    """The image content, or ``None`` when the row has nothing downloadable."""
+    if image.has_file:
+        return client.download_file(entity_set_name(image.table), image.row_id, FILE_COLUMN)
+    if image.file_url.startswith(client.api_base):
+        return None  # a $value link to an empty file column
+    if image.file_url.startswith(("http://", "https://")):
+        with urlopen(image.file_url, timeout=REMOTE_TIMEOUT) as resp:
+            data = resp.read(MAX_REMOTE_BYTES + 1)
+        if len(data) > MAX_REMOTE_BYTES:
+            raise ValueError(f"larger than {MAX_REMOTE_BYTES // 2**20} MB")
+        return data
+    return None  # blob:, '#' and other placeholders the app wrote
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Batch processing
+# ═══════════════════════════════════════════════════════════════════════════
+
+def derivative_url(client: DataverseClient, blob_id: str, column: str) -> str:
+    return f"{client.api_base}/{entity_set_name(BLOB_TABLE)}({blob_id})/{column}/$value"
+
+
+def upload_derivatives(client: DataverseClient, blob_id: str, content_hash: str, derivatives: Derivatives) -> int:
+    """Upload every rendered size into the blob's file columns; returns bytes sent."""
+    sent = 0
+    for name, (data, mime_type) in derivatives.files.items():
+        column = DERIVATIVES[name][1]
+        extension = "png" if mime_type == "image/png" else "jpg"
+        client.upload_bytes(BLOB_TABLE, blob_id, column, f"{content_hash[:16]}-{name}.{extension}", mime_type, data)
+        sent += len(data)
+    return sent
+
+
+class Pipeline:
+    """Runs batches through download, render, upload and link, keeping totals."""
+
+    def __init__(
+        self,
+        client: DataverseClient,
+        blobs: dict[str, str],
+        incomplete: dict[str, str],
+        workers: int,
+        processes: int,
+    ) -> None:
+        self.client = client
+        self.blobs = blobs
+        self.incomplete = incomplete
+        self.workers = workers
+        self.processes = processes
+        self.linked: dict[str, str] = {}  # file URL -> thumbnail URL, for key images
+        self.stats = {"downloaded": 0, "bytes_in": 0, "new_blobs": 0, "reused": 0,
+                      "bytes_out": 0, "skipped": 0, "unreadable": 0, "failed": 0}
+
+    def fail(self, what: str, error: Exception | str) -> None:
+        self.stats["failed"] += 1
+        print(f"  FAILED {what}: {error}", file=sys.stderr)
+
+    def download(self, batch: list[MediaImage]) -> dict[str, bytes]:
+        """Fetch and hash a batch; returns content by hash (one copy per distinct image)."""
+        contents: dict[str, bytes] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(fetch_image, self.client, image): image for image in batch}
+            for future in as_completed(futures):
+                image = futures[future]
+                try:
+                    data = future.result()
+                except (DataverseError, URLError, OSError, ValueError) as e:
+                    self.fail(f"{image.table} {image.row_id} ({image.file_name})", e)
+                    continue
+                if not data:
+                    self.stats["skipped"] += 1
+                    continue
+                image.content_hash = hashlib.sha256(data).hexdigest()
+                contents.setdefault(image.content_hash, data)
+                self.stats["downloaded"] += 1
+                self.stats["bytes_in"] += len(data)
+        return contents
+
+    def render(
+        self, contents: dict[str, bytes], names: dict[str, str], pool: ProcessPoolExecutor
+    ) -> dict[str, Derivatives]:
+        """Render derivatives for hashes that have no blob yet."""
+        rendered = {}
+        futures = {pool.submit(make_derivatives, data): h for h, data in contents.items() if h not in self.blobs}
+        for future in as_completed(futures):
+            content_hash = futures[future]
+            try:
+                rendered[content_hash] = future.result()
+            except ValueError as e:
+                # Left unlinked, so it is looked at again next run; not a failure of this run
+                self.stats["unreadable"] += 1
+                print(f"  WARNING: {names[content_hash]} ({content_hash[:16]}) is {e}", file=sys.stderr)
+        return rendered
+
+    def store(self, rendered: dict[str, Derivatives], names: dict[str, str]) -> None:
+        """Create blob rows for newly rendered images and upload their derivatives."""
+        pk = primary_key(BLOB_TABLE)
+        # A blob left without derivatives by an interrupted run keeps its row
+        ids = {h: self.incomplete.get(h) or str(uuid.uuid4()) for h in rendered}
+        records = [
+            {
+                pk: ids[h],
+                "redi_mediablob_name": (names.get(h) or h)[:100],
+                "redi_contenthash": h,
+                "redi_mimetype": d.mime_type,
+                "redi_width": d.width,
+                "redi_height": d.height,
+            }
+            for h, d in rendered.items() if h not in self.incomplete
+        ]
+        for chunk in chunked(records, 500):
+            try:
+                self.client.create_multiple(entity_set_name(BLOB_TABLE), BLOB_TABLE, chunk)
+            except DataverseError as e:
+                for record in chunk:
+                    del ids[record["redi_contenthash"]]
+                self.fail(f"creating {len(chunk)} blob rows", e.message)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(upload_derivatives, self.client, blob_id, h, rendered[h]): h
+                for h, blob_id in ids.items()
+            }
+            for future in as_completed(futures):
+                content_hash = futures[future]
+                try:
+                    self.stats["bytes_out"] += future.result()
+                except DataverseError as e:
+                    self.incomplete[content_hash] = ids[content_hash]
+                    self.fail(f"uploading derivatives of {content_hash[:16]}", e.message)
+                    continue
+                self.incomplete.pop(content_hash, None)
+                self.blobs[content_hash] = ids[content_hash]
+                self.stats["new_blobs"] += 1
+
+    def link(self, batch: list[MediaImage], new_hashes: set[str]) -> None:
+        """Point each media row at its blob and set the derivative URLs."""
+        updates: dict[str, list[dict[str, Any]]] = {}
+        for image in batch:
+            blob_id = self.blobs.get(image.content_hash) if image.content_hash else None
+            if not blob_id:
+                continue
+            if image.content_hash not in new_hashes:
+                self.stats["reused"] += 1
+            urls = {url: derivative_url(self.client, blob_id, column) for _edge, column, url in DERIVATIVES.values()}
+            updates.setdefault(image.table, []).append({
+                primary_key(image.table): image.row_id,
+                f"{BLOB_LOOKUP}@odata.bind": f"/{entity_set_name(BLOB_TABLE)}({blob_id})",
+                **urls,
+            })
+            if image.file_url:
+                self.linked[image.file_url] = urls[DERIVATIVES["thumbnail"][2]]
+        for table, records in updates.items():
+            for chunk in chunked(records, 500):
+                try:
+                    self.client.update_multiple(entity_set_name(table), table, chunk)
+                except DataverseError as e:
+                    self.fail(f"linking {len(chunk)} {table} rows", e.message)
+
+    def run(self, images: list[MediaImage], batch_size: int) -> None:
+        started = time.monotonic()
+        processed = 0
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            for batch in chunked(images, batch_size):
+                contents = self.download(batch)
+                names = {}
+                for image in batch:
+                    if image.content_hash:
+                        names.setdefault(image.content_hash, image.file_name)
+                rendered = self.render(contents, names, pool)
+                del contents
+                self.store(rendered, names)
+                self.link(batch, set(rendered))
+                processed += len(batch)
+                elapsed = time.monotonic() - started
+                print(f"  {processed}/{len(images)} rows, {self.stats['new_blobs']} new blobs, "
+                      f"{self.stats['reused']} reused ({processed / max(elapsed, 1e-9):.1f} rows/s)")
+
+
+def update_key_thumbnails(client: DataverseClient, schema: dict[str, Any], thumbnails: dict[str, str]) -> int:
+    """Set the equipment key thumbnail wherever the key image is a processed media file."""
+    table = get_table(schema, EQUIPMENT_TABLE)
+    pk = primary_key(EQUIPMENT_TABLE)
+    updates = []
+    rows = client.iter_rows(
+        entity_set_name(EQUIPMENT_TABLE),
+        select=[pk, KEY_IMAGE_COLUMN, KEY_THUMBNAIL_COLUMN],
+        filter=app_filter(table),
+    )
+    for row in rows:
+        thumbnail = thumbnails.get(row.get(KEY_IMAGE_COLUMN) or "")
+        if thumbnail and thumbnail != row.get(KEY_THUMBNAIL_COLUMN):
+            updates.append({pk: row[pk], KEY_THUMBNAIL_COLUMN: thumbnail})
+    for chunk in chunked(updates, 500):
+        client.update_multiple(entity_set_name(EQUIPMENT_TABLE), EQUIPMENT_TABLE, chunk)
+    return len(updates)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate deduplicated thumbnails and previews for SimQuip media.")
+    parser.add_argument("--table", choices=MEDIA_TABLES, action="append",
+                        help="Media table to process (repeatable; default both)")
+    parser.add_argument("--workers", type=int, default=6, help="Concurrent downloads and uploads (default 6)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 2,
+                        help="Image rendering processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=200, help="Media rows per batch (default 200)")
+    parser.add_argument("--force", action="store_true", help="Re-process rows already linked to a blob")
+    parser.add_argument("--dry-run", action="store_true", help="Report how many rows would be processed")
+    args = parser.parse_args()
+
+    if Image is None and not args.dry_run:
+        print("ERROR: Pillow is required: pip install Pillow", file=sys.stderr)
+        sys.exit(1)
+
+    schema = load_schema()
+    client = DataverseClient()
+    started = time.monotonic()
+    images: list[MediaImage] = []
+    thumbnails: dict[str, str] = {}
+    for table in args.table or MEDIA_TABLES:
+        pending, done = read_images(client, schema, table, args.force)
+        print(f"{table}: {len(pending)} images to process, {len(done)} already done")
+        images.extend(pending)
+        thumbnails.update(done)
+    blobs, incomplete = read_blobs(client)
+    print(f"{len(blobs)} blobs stored, {len(incomplete)} incomplete ({time.monotonic() - started:.1f}s)")
+    if args.dry_run:
+        return
+
+    pipeline = Pipeline(client, blobs, incomplete, args.workers, args.processes)
+    if images:
+        pipeline.run(images, args.batch_size)
+    thumbnails.update(pipeline.linked)
+    try:
+        key_updates = update_key_thumbnails(client, schema, thumbnails)
+    except DataverseError as e:
+        pipeline.fail("updating equipment key thumbnails", e.message)
+        key_updates = 0
+
+    s = pipeline.stats
+    elapsed = time.monotonic() - started
+    print(f"Processed {s['downloaded']} images ({s['bytes_in'] / 2**20:,.1f} MB) in {elapsed:.1f}s: "
+          f"{s['new_blobs']} new blobs ({s['bytes_out'] / 2**20:,.1f} MB of derivatives), "
+          f"{s['reused']} reused an existing blob, {s['skipped']} had no content, {s['unreadable']} unreadable, {s['failed']} failed")
+    print(f"Set {key_updates} equipment key thumbnails")
+    if s["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
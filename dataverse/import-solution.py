@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""SimQuip asynchronous solution import with progress.
+
+``pac solution import`` blocks without showing what it is doing. This tool
+imports through the Web API instead:
+
+1. takes the packed solution ``.zip``, or packs the ``generate-solution.py``
+   output folder with ``pac solution pack`` first;
+2. starts the import with ``ImportSolutionAsync``, which returns straight
+   away with the ``asyncoperation`` running it and the ``importjob`` that
+   records its progress;
+3. polls both. The first poll comes after a couple of seconds; the interval
+   grows while nothing changes, up to ``--poll-interval``, and drops back to
+   the minimum as soon as the import moves, so a finished import is noticed
+   within seconds rather than at the next long poll;
+4. prints each component (table, option set, relationship, ...) as the
+   import job reports it processed, with its result, and the overall
+   percentage.
+
+Pass ``--org-url`` more than once to import into several environments at the
+same time; each gets its own thread and its output lines are prefixed with
+the environment's host name.
+
+Usage: python3 dataverse/import-solution.py [SOLUTION_ZIP_OR_FOLDER] [--org-url URL ...]
+           [--overwrite-unmanaged] [--publish-workflows] [--poll-interval 30] [--timeout 3600]
+"""
+
+import argparse
+import base64
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+from xml.etree import ElementTree
+
+from dv_client import ASYNC_FIRST_POLL, DEFAULT_ORG_URL, DataverseClient, DataverseError
+from dv_schema import SCRIPT_DIR
+
+SOLUTION_DIR = SCRIPT_DIR / "solution_output"
+
+print_lock = threading.Lock()
+
+
+@dataclass
+class Component:
+    kind: str
+    name: str
+    result: str
+    message: str = ""
+
+
+@dataclass
+class Import:
+    org_url: str
+    job_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    operation_id: str = ""
+    progress: float = -1.0
+    status: str = "Not started"
+    message: str = ""
+    reported: set[tuple[str, str]] = field(default_factory=set)
+    failures: list[Component] = field(default_factory=list)
+    done: bool = False
+    ok: bool = False
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.org_url).hostname or self.org_url
+
+    def log(self, message: str, error: bool = False) -> None:
+        with print_lock:
+            print(f"[{self.host}] {message}", file=sys.stderr if error else sys.stdout, flush=True)
+
+
+def read_solution(path: Path) -> bytes:
+    """The solution zip's bytes; an unpacked folder is packed with PAC CLI first."""
+    if path.is_file():
+        return path.read_bytes()
+    if not (path / "Other" / "Solution.xml").exists():
+        raise ValueError(f"{path} is neither a solution .zip nor an unpacked solution folder")
+    with tempfile.TemporaryDirectory() as tmp:
+        zip_path = Path(tmp) / "solution.zip"
+        result = subprocess.run(
+            ["pac", "solution", "pack", "--zipfile", str(zip_path), "--folder", str(path),
+             "--packagetype", "Unmanaged"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise ValueError(f"pac solution pack failed: {(result.stderr or result.stdout).strip()}")
+        return zip_path.read_bytes()
+
+
+def parse_components(data: str) -> list[Component]:
+    """Components the import job log marks processed, with their result."""
+    try:
+        root = ElementTree.fromstring(data)
+    except ElementTree.ParseError:
+        return []
+    components = []
+    for group in root:
+        for element in group.iter():
+            result = element.find("result")
+            if result is None or element.get("processed") != "true":
+                continue
+            components.append(Component(
+                kind=element.tag,
+                name=element.get("LocalizedName") or element.get("name") or element.get("id") or "?",
+                result=result.get("result", ""),
+                message=result.get("errortext", ""),
+            ))
+    return components
+
+
+def start(client: DataverseClient, job: Import, solution: bytes, args: argparse.Namespace) -> None:
+    result = client.checked("POST", "ImportSolutionAsync", {
+        "CustomizationFile": base64.b64encode(solution).decode(),
+        "OverwriteUnmanagedCustomizations": args.overwrite_unmanaged,
+        "PublishWorkflows": args.publish_workflows,
+        "ImportJobId": job.job_id,
+    }) or {}
+    job.operation_id = result["AsyncOperationId"]
+    job.status = "Submitted"
+
+
+def poll(client: DataverseClient, job: Import) -> bool:
+    """Refresh the import; returns True if it moved since the last poll."""
+    moved = False
+    import_job = client.get(f"importjobs({job.job_id})?$select=progress") or {}
+    progress = float(import_job.get("progress") or 0)
+    if progress != job.progress:
+        job.progress, moved = progress, True
+        # The component log is only worth downloading when something changed
+        job_log = client.get(f"importjobs({job.job_id})?$select=data") or {}
+        for component in parse_components(job_log.get("data") or ""):
+            key = (component.kind, component.name)
+            if key in job.reported:
+                continue
+            job.reported.add(key)
+            if component.result == "failure":
+                job.failures.append(component)
+                job.log(f"  FAILED {component.kind} {component.name}: {component.message}", error=True)
+            else:
+                job.log(f"  {component.kind} {component.name}: {component.result}")
+        job.log(f"{progress:.0f}% complete")
+
+    operation = client.async_operation_status(job.operation_id)
+    moved = moved or operation.done or operation.status != job.status
+    job.status = operation.status
+    if operation.done:
+        job.done, job.message = True, operation.message
+        job.ok = operation.ok and not job.failures
+    return moved
+
+
+def run_import(org_url: str, solution: bytes, args: argparse.Namespace) -> Import:
+    """Import into one environment and follow it to the end."""
+    job = Import(org_url)
+    started = time.monotonic()
+    try:
+        client = DataverseClient(org_url)
+        start(client, job, solution, args)
+    except DataverseError as e:
+        job.status, job.message = "Not submitted", e.message
+        job.log(f"FAILED to start the import: {job.message}", error=True)
+        return job
+    job.log(f"Import job {job.job_id} submitted")
+
+    interval = ASYNC_FIRST_POLL
+    deadline = started + args.timeout
+    while not job.done:
+        if time.monotonic() > deadline:
+            job.message = f"still {job.status.lower()} at the timeout; check the solution history"
+            break
+        time.sleep(interval)
+        try:
+            moved = poll(client, job)
+        except DataverseError as e:
+            job.log(f"WARNING: polling: {e.message}", error=True)
+            moved = False
+        interval = ASYNC_FIRST_POLL if moved else min(interval * 1.5, args.poll_interval)
+
+    elapsed = time.monotonic() - started
+    if job.ok:
+        job.log(f"{job.status} in {elapsed:.0f}s")
+    else:
+        failures = f", {len(job.failures)} component(s) failed" if job.failures else ""
+        job.log(f"FAILED: {job.status}{failures} ({elapsed:.0f}s) {job.message}".rstrip(), error=True)
+    return job
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import a solution with ImportSolutionAsync and show its progress.")
+    parser.add_argument("solution", nargs="?", type=Path, default=SOLUTION_DIR,
+                        help="Packed solution .zip or unpacked folder (default: solution_output/)")
+    parser.add_argument("--org-url", action="append", help="Environment to import into (repeatable)")
+    parser.add_argument("--overwrite-unmanaged", action="store_true",
+                        help="Overwrite unmanaged customisations in the target")
+    parser.add_argument("--publish-workflows", action="store_true", help="Activate imported processes")
+    parser.add_argument("--poll-interval", type=float, default=30, help="Longest wait between polls (default 30s)")
+    parser.add_argument("--timeout", type=float, default=3600, help="Give up waiting after this many seconds")
+    args = parser.parse_args()
+
+    try:
+        solution = read_solution(args.solution)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    org_urls = list(dict.fromkeys(args.org_url or [DEFAULT_ORG_URL]))
+    print(f"Importing {args.solution.name} ({len(solution) / 1024:.0f} KB) into {len(org_urls)} environment(s)")
+
+    with ThreadPoolExecutor(max_workers=len(org_urls)) as executor:
+        jobs = list(executor.map(lambda url: run_import(url, solution, args), org_urls))
+
+    failed = [job for job in jobs if not job.ok]
+    if failed:
+        print(f"\n{len(failed)} of {len(jobs)} import(s) failed: {', '.join(job.host for job in failed)}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""SimQuip bulk reference-data loader.
+
+Seeds buildings, levels, locations, people, teams, team members, equipment,
+media and loans from one CSV or JSONL file per table. Lookups are resolved
+against in-memory natural-key indexes (one paged read per table up front)
+instead of per-row queries, and rows are written with CreateMultiple /
+UpdateMultiple in parallel chunks, tier by tier in the same dependency order
+provision-tables.py uses. Circular and self-referencing lookups (team main
+location, parent equipment) are bound in a final UpdateMultiple pass.
+
+Input files live in DATA_DIR and are named after the table logical name,
+e.g. ``redi_building.csv`` or ``redi_equipment.jsonl``. Column headers are
+schema.json logical names. Lookup columns hold the natural key of the target
+row (see NATURAL_KEYS; composite keys are joined with "/", e.g. a level is
+``RBWH/Level 3``). Choice columns accept the label or the integer value.
+Rows whose natural key already exists are updated rather than duplicated.
+
+With ``--use-alternate-keys``, tables whose schema.json alternate key matches
+their natural key (buildings, teams) are written with
+UpsertMultiple addressed by that key, and lookups to them are bound by key
+(``/redi_teams(redi_teamcode='SIM')``) instead of by GUID, so those tables
+need no index read or create/update split. The keys must already be
+provisioned and Active.
+Shared tables carry no alternate keys (their key columns belong to other
+REdI apps), so equipment always takes the indexed create/update path.
+
+Usage: python3 dataverse/load-reference-data.py DATA_DIR [--workers 4] [--chunk-size 200]
+                                               [--use-alternate-keys] [--dry-run]
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+from dv_client import DataverseClient, DataverseError, chunked
+from dv_schema import (
+    LOAD_TIERS,
+    alternate_key_ref,
+    entity_set_name,
+    get_table,
+    is_deferred_lookup,
+    load_schema,
+    lookup_value_column,
+    option_values,
+    primary_key,
+    primary_name_column,
+)
+
+# Columns that identify a row independently of its GUID. Lookup components
+# are written as the natural key of the referenced row.
+NATURAL_KEYS = {
+    "redi_building": ("redi_code",),
+    "redi_person": ("redi_email",),
+    "redi_team": ("redi_teamcode",),
+    "redi_level": ("redi_buildingid", "redi_level_name"),
+    "redi_location": ("redi_departmentname",),
+    "redi_teammember": ("redi_teamid", "redi_personid"),
+    "redi_equipment": ("redi_equipmentcode",),
+    "redi_mediablob": ("redi_contenthash",),
+    "redi_equipmentmedia": ("redi_equipmentid", "redi_filename"),
+    "redi_equipmentcontent": ("redi_equipmentid", "redi_itemkey"),
+    "redi_locationmedia": ("redi_locationid", "redi_filename"),
+    "redi_loantransfer": ("redi_loantransfer_name",),
+    "redi_dashboardmetric": ("redi_metrickey",),
+}
+KEY_SEPARATOR = "/"
+
+TRUE_VALUES = {"true", "1", "yes", "y"}
+FALSE_VALUES = {"false", "0", "no", "n"}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Input
+# ═══════════════════════════════════════════════════════════════════════════
+
+def find_input(data_dir: Path, table_name: str) -> Path | None:
+    for suffix in (".csv", ".jsonl"):
+        path = data_dir / f"{table_name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def read_rows(path: Path) -> list[dict[str, Any]]:
+    """Read a CSV or JSONL file into a list of row dicts."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix == ".csv":
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Natural-key index
+# ═══════════════════════════════════════════════════════════════════════════
+
+class KeyIndex:
+    """Natural key <-> GUID maps for every table touched by a load."""
+
+    def __init__(self) -> None:
+        self._ids: dict[str, dict[str, str]] = defaultdict(dict)
+        self._keys: dict[str, dict[str, str]] = defaultdict(dict)
+
+    def add(self, table_name: str, key: str, record_id: str) -> None:
+        self._ids[table_name][key] = record_id
+        self._keys[table_name][record_id] = key
+
+    def resolve(self, table_name: str, key: str) -> str | None:
+        return self._ids[table_name].get(key)
+
+    def key_for_id(self, table_name: str, record_id: str) -> str | None:
+        return self._keys[table_name].get(record_id)
+
+    def count(self, table_name: str) -> int:
+        return len(self._ids[table_name])
+
+
+def keyed_tables(schema: dict[str, Any]) -> dict[str, str]:
+    """SimQuip-created tables whose first alternate key is their single-column natural key.
+
+    Shared tables are never keyed: UpsertMultiple by key would need a unique
+    index on a column SimQuip does not own.
+    """
+    keyed = {}
+    for table in schema["tables"]:
+        keys = table.get("alternateKeys", [])
+        if keys and tuple(keys[0]["columns"]) == NATURAL_KEYS.get(table["logicalName"]):
+            keyed[table["logicalName"]] = keys[0]["columns"][0]
+    return keyed
+
+
+def key_tables(schema: dict[str, Any], table_names: set[str], keyed: dict[str, str]) -> set[str]:
+    """Expand ``table_names`` with every table that must be indexed to resolve lookups.
+
+    Keyed tables are bound by alternate key, so they are only indexed when
+    another indexed table's composite natural key refers to them.
+    """
+    needed = {name for name in table_names if name not in keyed}
+    pending = list(needed)
+    while pending:
+        table_name = pending.pop()
+        for col in get_table(schema, table_name)["columns"]:
+            target = col.get("target")
+            if col["type"] != "Lookup" or target in needed:
+                continue
+            if target in keyed and col["logicalName"] not in NATURAL_KEYS[table_name]:
+                continue
+            needed.add(target)
+            pending.append(target)
+    return needed
+
+
+def build_index(client: DataverseClient, schema: dict[str, Any], table_names: set[str], index: KeyIndex) -> None:
+    """Read existing rows once per table (tier order) and index them by natural key."""
+    for tier in LOAD_TIERS:
+        for table_name in tier:
+            if table_name not in table_names:
+                continue
+            table = get_table(schema, table_name)
+            lookups = {c["logicalName"]: c["target"] for c in table["columns"] if c["type"] == "Lookup"}
+            key_cols = NATURAL_KEYS[table_name]
+            select = [primary_key(table_name)] + [
+                lookup_value_column(c) if c in lookups else c for c in key_cols
+            ]
+            start = time.monotonic()
+            for row in client.iter_rows(entity_set_name(table_name), select=select):
+                parts = []
+                for col in key_cols:
+                    if col in lookups:
+                        value = row.get(lookup_value_column(col))
+                        value = value and index.key_for_id(lookups[col], value)
+                    else:
+                        value = row.get(col)
+                    if value in (None, ""):
+                        break
+                    parts.append(str(value))
+                else:
+                    index.add(table_name, KEY_SEPARATOR.join(parts), row[primary_key(table_name)])
+            elapsed = time.monotonic() - start
+            print(f"  Indexed {index.count(table_name)} existing {table_name} rows ({elapsed:.1f}s)")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Row conversion
+# ═══════════════════════════════════════════════════════════════════════════
+
+def natural_key(table_name: str, raw: dict[str, Any]) -> str | None:
+    parts = [str(raw.get(col) or "").strip() for col in NATURAL_KEYS[table_name]]
+    if not all(parts):
+        return None
+    return KEY_SEPARATOR.join(parts)
+
+
+def convert_value(col: dict[str, Any], raw: Any) -> Any:
+    """Convert an input cell to the Web API value for the column type."""
+    col_type = col["type"]
+    if col_type == "Boolean":
+        if isinstance(raw, bool):
+            return raw
+        text = str(raw).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError(f"not a boolean: {raw!r}")
+    if col_type == "Integer":
+        return int(raw)
+    if col_type == "File":
+        raise ValueError("file columns are uploaded with media-upload.py, not loaded")
+    if col_type == "Choice":
+        if isinstance(raw, int) or str(raw).strip().isdigit():
+            return int(raw)
+        values = option_values(col)
+        for option_label, value in values.items():
+            if option_label.lower() == str(raw).strip().lower():
+                return value
+        raise ValueError(f"unknown option {raw!r} (expected one of {', '.join(values)})")
+    return str(raw)
+
+
+def lookup_bind(target: str, key: str, index: KeyIndex, keyed: dict[str, str]) -> str | None:
+    """``@odata.bind`` reference for a lookup, by alternate key or resolved GUID."""
+    if target in keyed:
+        return "/" + alternate_key_ref(target, {keyed[target]: key})
+    target_id = index.resolve(target, key)
+    return f"/{entity_set_name(target)}({target_id})" if target_id else None
+
+
+def build_record(
+    table: dict[str, Any],
+    raw: dict[str, Any],
+    index: KeyIndex,
+    keyed: dict[str, str],
+) -> tuple[dict[str, Any], dict[str, tuple[str, str]]]:
+    """Convert an input row into a Web API record.
+
+    Returns ``(record, deferred)`` where ``deferred`` maps lookup columns that
+    must be bound after all tiers are written to ``(target_table, target_key)``.
+    Raises ``ValueError`` for unconvertible values or unresolved lookups.
+    """
+    table_name = table["logicalName"]
+    record: dict[str, Any] = {}
+    deferred: dict[str, tuple[str, str]] = {}
+
+    name_col = primary_name_column(table)
+    if raw.get(name_col) not in (None, ""):
+        record[name_col] = str(raw[name_col])
+
+    for col in table["columns"]:
+        name = col["logicalName"]
+        value = raw.get(name)
+        if value is None or (isinstance(value, str) and value.strip() == ""):
+            continue
+        if col["type"] != "Lookup":
+            try:
+                record[name] = convert_value(col, value)
+            except ValueError as e:
+                raise ValueError(f"{name}: {e}") from None
+            continue
+
+        target = col["target"]
+        key = str(value).strip()
+        if is_deferred_lookup(table_name, col):
+            deferred[name] = (target, key)
+            continue
+        bind = lookup_bind(target, key, index, keyed)
+        if bind is None:
+            raise ValueError(f"{name}: no {target} with key {key!r}")
+        record[f"{name}@odata.bind"] = bind
+
+    return record, deferred
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Writing
+# ═══════════════════════════════════════════════════════════════════════════
+
+class LoadStats:
+    def __init__(self) -> None:
+        self.created: dict[str, int] = defaultdict(int)
+        self.updated: dict[str, int] = defaultdict(int)
+        self.upserted: dict[str, int] = defaultdict(int)
+        self.failed: dict[str, int] = defaultdict(int)
+        self.errors: list[str] = []
+
+    def error(self, table_name: str, message: str, count: int = 1) -> None:
+        self.failed[table_name] += count
+        self.errors.append(f"{table_name}: {message}")
+
+
+class TableLoad:
+    """Prepared writes for one table."""
+
+    def __init__(self, table: dict[str, Any]) -> None:
+        self.table = table
+        self.name = table["logicalName"]
+        self.creates: list[tuple[str, dict[str, Any]]] = []
+        self.updates: list[dict[str, Any]] = []
+        self.upserts: list[tuple[str, dict[str, Any]]] = []
+
+
+def prepare_table(
+    table: dict[str, Any],
+    rows: list[dict[str, Any]],
+    index: KeyIndex,
+    keyed: dict[str, str],
+    stats: LoadStats,
+) -> tuple[TableLoad, list[tuple[str, dict[str, tuple[str, str]]]]]:
+    """Split input rows into creates/updates (or keyed upserts) and deferred lookup binds."""
+    table_name = table["logicalName"]
+    pk = primary_key(table_name)
+    load = TableLoad(table)
+    deferred: list[tuple[str, dict[str, tuple[str, str]]]] = []
+    seen: set[str] = set()
+
+    for line_no, raw in enumerate(rows, start=1):
+        key = natural_key(table_name, raw)
+        if key is None:
+            stats.error(table_name, f"row {line_no}: missing natural key {NATURAL_KEYS[table_name]}")
+            continue
+        if key in seen:
+            stats.error(table_name, f"row {line_no}: duplicate key {key!r}")
+            continue
+        seen.add(key)
+        try:
+            record, row_deferred = build_record(table, raw, index, keyed)
+        except ValueError as e:
+            stats.error(table_name, f"row {line_no} ({key}): {e}")
+            continue
+
+        existing_id = index.resolve(table_name, key)
+        if table_name in keyed:
+            record["@odata.id"] = alternate_key_ref(table_name, {keyed[table_name]: key})
+            load.upserts.append((key, record))
+        elif existing_id:
+            record[pk] = existing_id
+            load.updates.append(record)
+        else:
+            load.creates.append((key, record))
+        if row_deferred:
+            deferred.append((key, row_deferred))
+
+    return load, deferred
+
+
+def load_tier(
+    client: DataverseClient,
+    executor: ThreadPoolExecutor,
+    tier_loads: list[TableLoad],
+    index: KeyIndex,
+    stats: LoadStats,
+    chunk_size: int,
+    dry_run: bool,
+) -> None:
+    """Write every chunk of every table in one tier concurrently."""
+    futures = {}
+    for load in tier_loads:
+        table_name = load.name
+        entity_set = entity_set_name(table_name)
+        for chunk in chunked(load.creates, chunk_size):
+            if dry_run:
+                for key, _record in chunk:
+                    index.add(table_name, key, f"dry-run:{key}")
+                stats.created[table_name] += len(chunk)
+                continue
+            records = [record for _key, record in chunk]
+            future = executor.submit(client.create_multiple, entity_set, table_name, records)
+            futures[future] = (table_name, "create", chunk)
+        for chunk in chunked(load.updates, chunk_size):
+            if dry_run:
+                stats.updated[table_name] += len(chunk)
+                continue
+            future = executor.submit(client.update_multiple, entity_set, table_name, chunk)
+            futures[future] = (table_name, "update", chunk)
+        for chunk in chunked(load.upserts, chunk_size):
+            if dry_run:
+                stats.upserted[table_name] += len(chunk)
+                continue
+            records = [record for _key, record in chunk]
+            future = executor.submit(client.upsert_multiple, entity_set, table_name, records)
+            futures[future] = (table_name, "upsert", chunk)
+
+    for future in as_completed(futures):
+        table_name, action, chunk = futures[future]
+        try:
+            result = future.result()
+        except DataverseError as e:
+            stats.error(table_name, f"{action} chunk of {len(chunk)} failed: {e.message}", len(chunk))
+            continue
+        if action in ("create", "upsert"):
+            # Upserted ids are indexed too, for composite keys that refer to keyed tables
+            for (key, _record), new_id in zip(chunk, result):
+                index.add(table_name, key, new_id)
+        if action == "create":
+            stats.created[table_name] += len(chunk)
+        elif action == "upsert":
+            stats.upserted[table_name] += len(chunk)
+        else:
+            stats.updated[table_name] += len(chunk)
+
+
+def bind_deferred(
+    client: DataverseClient,
+    executor: ThreadPoolExecutor,
+    deferred: dict[str, list[tuple[str, dict[str, tuple[str, str]]]]],
+    index: KeyIndex,
+    keyed: dict[str, str],
+    stats: LoadStats,
+    chunk_size: int,
+    dry_run: bool,
+) -> None:
+    """Bind circular/self lookups once every referenced row exists."""
+    futures = {}
+    for table_name, rows in deferred.items():
+        pk = primary_key(table_name)
+        updates = []
+        for key, binds in rows:
+            record: dict[str, Any]
+            if table_name in keyed:
+                record = {"@odata.id": alternate_key_ref(table_name, {keyed[table_name]: key})}
+            else:
+                record_id = index.resolve(table_name, key)
+                if record_id is None:
+                    continue  # the row itself failed to load; already reported
+                record = {pk: record_id}
+            for col_name, (target, target_key) in binds.items():
+                bind = lookup_bind(target, target_key, index, keyed)
+                if bind is None:
+                    stats.error(table_name, f"{key}: {col_name}: no {target} with key {target_key!r}")
+                    continue
+                record[f"{col_name}@odata.bind"] = bind
+            if len(record) > 1:
+                updates.append(record)
+        print(f"  {table_name}: {len(updates)} deferred lookup updates")
+        if dry_run:
+            continue
+        # Keyed rows are addressed by @odata.id, which only UpsertMultiple accepts
+        write = client.upsert_multiple if table_name in keyed else client.update_multiple
+        for chunk in chunked(updates, chunk_size):
+            future = executor.submit(write, entity_set_name(table_name), table_name, chunk)
+            futures[future] = (table_name, chunk)
+
+    for future in as_completed(futures):
+        table_name, chunk = futures[future]
+        try:
+            future.result()
+        except DataverseError as e:
+            stats.error(table_name, f"deferred lookup chunk of {len(chunk)} failed: {e.message}", len(chunk))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Main Execution
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load SimQuip reference data into Dataverse.")
+    parser.add_argument("data_dir", type=Path, help="Directory of <table>.csv / <table>.jsonl files")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent bulk requests (default 4)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Records per CreateMultiple/UpdateMultiple call")
+    parser.add_argument("--use-alternate-keys", action="store_true",
+                        help="Upsert keyed tables and bind lookups to them by alternate key")
+    parser.add_argument("--dry-run", action="store_true", help="Resolve and validate only; write nothing")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    inputs: dict[str, list[dict[str, Any]]] = {}
+    for tier in LOAD_TIERS:
+        for table_name in tier:
+            path = find_input(args.data_dir, table_name)
+            if path:
+                inputs[table_name] = read_rows(path)
+                print(f"Read {len(inputs[table_name])} rows from {path.name}")
+    if not inputs:
+        print(f"ERROR: No <table>.csv or <table>.jsonl files found in {args.data_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    client = DataverseClient()
+    index = KeyIndex()
+    stats = LoadStats()
+    started = time.monotonic()
+
+    print("\n=== Indexing existing rows ===")
+    keyed = keyed_tables(schema) if args.use_alternate_keys else {}
+    build_index(client, schema, key_tables(schema, set(inputs), keyed), index)
+
+    deferred: dict[str, list[tuple[str, dict[str, tuple[str, str]]]]] = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for tier_no, tier in enumerate(LOAD_TIERS, start=1):
+            tier_names = [t for t in tier if t in inputs]
+            if not tier_names:
+                continue
+            print(f"\n=== Tier {tier_no}: {', '.join(tier_names)} ===")
+            tier_loads = []
+            for table_name in tier_names:
+                table = get_table(schema, table_name)
+                load, table_deferred = prepare_table(table, inputs[table_name], index, keyed, stats)
+                tier_loads.append(load)
+                if table_deferred:
+                    deferred[table_name] = table_deferred
+                if table_name in keyed:
+                    print(f"  {table_name}: {len(load.upserts)} to upsert by {keyed[table_name]}")
+                else:
+                    print(f"  {table_name}: {len(load.creates)} to create, {len(load.updates)} to update")
+            load_tier(client, executor, tier_loads, index, stats, args.chunk_size, args.dry_run)
+
+        if deferred:
+            print("\n=== Binding deferred lookups ===")
+            bind_deferred(client, executor, deferred, index, keyed, stats, args.chunk_size, args.dry_run)
+
+    print()
+    print("=" * 60)
+    for table_name in inputs:
+        upserted = f"{stats.upserted[table_name]} upserted, " if table_name in keyed else ""
+        print(f"  {table_name}: {stats.created[table_name]} created, "
+              f"{stats.updated[table_name]} updated, {upserted}{stats.failed[table_name]} failed")
+    print(f"  Elapsed: {time.monotonic() - started:.1f}s{' (dry run)' if args.dry_run else ''}")
+    print("=" * 60)
+
+    if stats.errors:
+        print(f"\n{len(stats.errors)} error(s):", file=sys.stderr)
+        for message in stats.errors[:50]:
+            print(f"  {message}", file=sys.stderr)
+        if len(stats.errors) > 50:
+            print(f"  ... and {len(stats.errors) - 50} more", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""Synthetic load generator for the SimQuip OData query mix.
+
+Replays the request shapes ``DataverseDataService`` issues - ``getAll``
+list queries with the generated ``$select`` projection, app-isolation
+``$filter``, search ``contains()`` groups, ``$orderby`` and ``$top``;
+``getById`` detail reads; loan ``create`` and ``update`` - from a pool of
+concurrent virtual users, then reports throughput and latency percentiles
+per query type.
+
+By default it starts the local stand-in (dv_standin.py) in-process, so the
+numbers show client/concurrency behaviour without touching an org. Pass
+``--org-url`` to target a sandbox environment (PAC CLI token required).
+Loans created by the run are named ``LOADTEST-...`` and deleted at the end
+unless ``--keep``; ``--read-only`` drops the write shapes altogether. Write
+shapes are refused against the production org.
+
+Usage: python3 dataverse/load-test.py [--org-url URL] [--users 50] [--duration 60] [--read-only]
+                                      [--think-ms 0] [--json report.json]
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+import dv_standin
+from dv_client import DEFAULT_ORG_URL, DataverseClient, percentile
+from dv_schema import (
+    app_filter,
+    entity_set_name,
+    get_table,
+    list_columns,
+    load_schema,
+    option_values,
+    primary_key,
+    select_columns,
+)
+
+LOAN_TABLE = "redi_loantransfer"
+LOAN_NAME_PREFIX = "LOADTEST-"
+
+# Search terms used for the contains() shapes
+SEARCH_TERMS = ["defib", "manikin", "00", "sim", "trolley", "ultra"]
+
+# Wait before retrying when no selected shape has anything to act on and there is no think time
+IDLE_BACKOFF = 0.05
+
+Request = tuple[str, str, bytes | None, dict[str, str] | None]
+
+
+@dataclass
+class QueryShape:
+    """One kind of request the app makes, with its share of the traffic."""
+
+    name: str
+    weight: int
+    build: Callable[["LoadContext", random.Random], Request | None]
+    writes: bool = False
+
+
+class LoadContext:
+    """Ids sampled before the run, plus loans created during it."""
+
+    def __init__(self, schema: dict[str, Any]) -> None:
+        self.schema = schema
+        self.ids: dict[str, list[str]] = {}
+        self.created_loans: list[str] = []
+        self._lock = threading.Lock()
+
+    def sample(self, client: DataverseClient, logical_name: str, top: int = 500) -> None:
+        pk = primary_key(logical_name)
+        table = get_table(self.schema, logical_name)
+        path = f"{entity_set_name(logical_name)}?$select={pk}&$top={top}"
+        if app_filter(table):
+            path += f"&$filter={app_filter(table)}"
+        page = client.checked("GET", path) or {}
+        self.ids[logical_name] = [row[pk] for row in page.get("value", [])]
+
+    def pick(self, logical_name: str, rng: random.Random) -> str | None:
+        ids = self.ids.get(logical_name)
+        return rng.choice(ids) if ids else None
+
+    def add_loan(self, loan_id: str) -> None:
+        with self._lock:
+            self.created_loans.append(loan_id)
+
+    def pick_loan(self, rng: random.Random) -> str | None:
+        with self._lock:
+            return rng.choice(self.created_loans) if self.created_loans else None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Query shapes (mirroring src/services/dataverseDataService.ts)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def list_query(
+    ctx: LoadContext,
+    logical_name: str,
+    top: int,
+    extra_filter: str | None = None,
+    orderby: str | None = None,
+) -> Request:
+    """``getAll``: list projection, default filter, optional filter/sort, ``$top``."""
+    table = get_table(ctx.schema, logical_name)
+    params = ["$select=" + ",".join(list_columns(table)), f"$top={top}"]
+    if orderby:
+        params.append(f"$orderby={orderby}")
+    filters = [f for f in (app_filter(table), extra_filter) if f]
+    if filters:
+        params.append("$filter=" + " and ".join(filters))
+    return "GET", f"{entity_set_name(logical_name)}?{'&'.join(params)}", None, None
+
+
+def detail_query(ctx: LoadContext, logical_name: str, record_id: str | None) -> Request | None:
+    """``getById``: detail projection for one row."""
+    if record_id is None:
+        return None
+    table = get_table(ctx.schema, logical_name)
+    select = ",".join(select_columns(table))
+    return "GET", f"{entity_set_name(logical_name)}({record_id})?$select={select}", None, None
+
+
+def search_filter(columns: list[str], term: str) -> str:
+    return "(" + " or ".join(f"contains({col},'{term}')" for col in columns) + ")"
+
+
+def loan_status(ctx: LoadContext, label: str) -> int:
+    col = next(c for c in get_table(ctx.schema, LOAN_TABLE)["columns"] if c["logicalName"] == "redi_loanstatus")
+    return option_values(col)[label]
+
+
+def create_loan(ctx: LoadContext, rng: random.Random) -> Request | None:
+    equipment_id = ctx.pick("redi_equipment", rng)
+    origin, recipient = ctx.pick("redi_team", rng), ctx.pick("redi_team", rng)
+    if not (equipment_id and origin and recipient):
+        return None
+    start = date.today()
+    body = {
+        "redi_loantransfer_name": f"{LOAN_NAME_PREFIX}{uuid.uuid4().hex[:12]}",
+        "redi_startdate": start.isoformat(),
+        "redi_duedate": (start + timedelta(days=rng.randint(1, 28))).isoformat(),
+        "redi_loanstatus": loan_status(ctx, "Draft"),
+        "redi_isinternaltransfer": False,
+        "redi_equipmentid@odata.bind": f"/{entity_set_name('redi_equipment')}({equipment_id})",
+        "redi_originteamid@odata.bind": f"/{entity_set_name('redi_team')}({origin})",
+        "redi_recipientteamid@odata.bind": f"/{entity_set_name('redi_team')}({recipient})",
+    }
+    return "POST", entity_set_name(LOAN_TABLE), json.dumps(body).encode(), {"Prefer": "return=representation"}
+
+
+def update_loan(ctx: LoadContext, rng: random.Random) -> Request | None:
+    loan_id = ctx.pick_loan(rng)
+    if loan_id is None:
+        return None
+    body = {"redi_loanstatus": loan_status(ctx, rng.choice(["Active", "Returned"]))}
+    return "PATCH", f"{entity_set_name(LOAN_TABLE)}({loan_id})", json.dumps(body).encode(), None
+
+
+def query_shapes() -> list[QueryShape]:
+    """The app's request mix, weighted roughly by how often pages issue each call."""
+    today = date.today().isoformat()
+    return [
+        QueryShape("equipment.getAll", 10, lambda ctx, rng: list_query(ctx, "redi_equipment", 5000)),
+        QueryShape("equipment.search", 5, lambda ctx, rng: list_query(
+            ctx, "redi_equipment", 50,
+            search_filter(["redi_itemname", "redi_equipmentcode", "redi_sq_description"], rng.choice(SEARCH_TERMS)),
+        )),
+        QueryShape("equipment.getById", 15, lambda ctx, rng: detail_query(
+            ctx, "redi_equipment", ctx.pick("redi_equipment", rng))),
+        QueryShape("equipmentmedia.byEquipment", 10, lambda ctx, rng: list_query(
+            ctx, "redi_equipmentmedia", 500, f"_redi_equipmentid_value eq {ctx.pick('redi_equipment', rng)}")),
+        QueryShape("loantransfer.getAll", 5, lambda ctx, rng: list_query(ctx, LOAN_TABLE, 5000)),
+        QueryShape("loantransfer.overdue", 3, lambda ctx, rng: list_query(
+            ctx, LOAN_TABLE, 500,
+            f"redi_loanstatus eq {loan_status(ctx, 'Active')} and redi_duedate lt {today}",
+            "redi_duedate asc",
+        )),
+        QueryShape("loantransfer.getById", 8, lambda ctx, rng: detail_query(
+            ctx, LOAN_TABLE, ctx.pick_loan(rng) or ctx.pick(LOAN_TABLE, rng))),
+        QueryShape("person.getAll", 8, lambda ctx, rng: list_query(
+            ctx, "redi_person", 500, orderby="redi_displayname asc")),
+        QueryShape("team.getAll", 8, lambda ctx, rng: list_query(ctx, "redi_team", 500)),
+        QueryShape("location.getAll", 6, lambda ctx, rng: list_query(ctx, "redi_location", 500)),
+        QueryShape("loantransfer.create", 2, create_loan, writes=True),
+        QueryShape("loantransfer.update", 2, update_loan, writes=True),
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Runner
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Results:
+    """Latency samples per shape, merged from every virtual user."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.bytes: dict[str, int] = {}
+        self.first_error: dict[str, str] = {}
+
+    def merge(self, samples: list[tuple[str, float, int, int, bytes]]) -> None:
+        with self._lock:
+            for name, seconds, status, size, body in samples:
+                self.latencies.setdefault(name, []).append(seconds)
+                self.bytes[name] = self.bytes.get(name, 0) + size
+                if status >= 400:
+                    self.errors[name] = self.errors.get(name, 0) + 1
+                    self.first_error.setdefault(name, f"HTTP {status}: {body[:200].decode(errors='replace')}")
+
+
+def virtual_user(
+    client: DataverseClient,
+    ctx: LoadContext,
+    shapes: list[QueryShape],
+    deadline: float,
+    think: float,
+    seed: int,
+    results: Results,
+) -> None:
+    rng = random.Random(seed)
+    weights = [shape.weight for shape in shapes]
+    samples = []
+    while time.monotonic() < deadline:
+        shape = rng.choices(shapes, weights)[0]
+        request = shape.build(ctx, rng)
+        if request is None:
+            # Nothing to act on yet (e.g. update before any create); wait rather than spin
+            time.sleep(think or IDLE_BACKOFF)
+            continue
+        method, path, body, headers = request
+        started = time.perf_counter()
+        status, resp_headers, data = client.send(method, path, body, headers)
+        samples.append((shape.name, time.perf_counter() - started, status, len(data), data if status >= 400 else b""))
+        if shape.name == "loantransfer.create" and status < 300:
+            entity_id = resp_headers.get("odata-entityid", "")
+            ctx.add_loan(entity_id[entity_id.rfind("(") + 1:-1])
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+    results.merge(samples)
+
+
+def summarise(results: Results, elapsed: float) -> list[dict[str, Any]]:
+    rows = []
+    every: list[float] = []
+    for name in sorted(results.latencies):
+        values = sorted(results.latencies[name])
+        every.extend(values)
+        rows.append(summary_row(name, values, results.errors.get(name, 0), results.bytes.get(name, 0), elapsed))
+    if every:
+        rows.append(summary_row("TOTAL", sorted(every), sum(results.errors.values()),
+                                sum(results.bytes.values()), elapsed))
+    return rows
+
+
+def summary_row(name: str, values: list[float], errors: int, size: int, elapsed: float) -> dict[str, Any]:
+    return {
+        "query": name,
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p90_ms": round(percentile(values, 90) * 1000, 1),
+        "p95_ms": round(percentile(values, 95) * 1000, 1),
+        "p99_ms": round(percentile(values, 99) * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1),
+        "avg_kb": round(size / len(values) / 1024, 1),
+    }
+
+
+def print_report(rows: list[dict[str, Any]]) -> None:
+    header = f"{'Query':<28} {'Count':>7} {'Err':>5} {'req/s':>8} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8} {'avg KB':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if row["query"] == "TOTAL":
+            print("-" * len(header))
+        print(f"{row['query']:<28} {row['count']:>7} {row['errors']:>5} {row['rps']:>8} "
+              f"{row['p50_ms']:>8} {row['p90_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} "
+              f"{row['max_ms']:>8} {row['avg_kb']:>8}")
+    print("(latencies in ms, including any 429 Retry-After waits)")
+
+
+def cleanup(client: DataverseClient, ctx: LoadContext) -> None:
+    """Delete the loans this run created."""
+    entity_set = entity_set_name(LOAN_TABLE)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = executor.map(lambda loan_id: client.send("DELETE", f"{entity_set}({loan_id})")[0],
+                                ctx.created_loans)
+        deleted = sum(1 for status in statuses if status < 300)
+    print(f"Deleted {deleted} of {len(ctx.created_loans)} {LOAN_NAME_PREFIX} loans")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay the SimQuip OData query mix with concurrent virtual users.")
+    parser.add_argument("--org-url", help="Sandbox environment to target (default: local stand-in)")
+    parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users (default 50)")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run (default 60)")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean pause between a user's requests")
+    parser.add_argument("--read-only", action="store_true", help="Skip the create/update shapes")
+    parser.add_argument("--only", nargs="*", help="Run only these query shapes")
+    parser.add_argument("--keep", action="store_true", help="Keep the loans the run created")
+    parser.add_argument("--standin-latency-ms", type=float, default=0, help="Server delay added by the stand-in")
+    parser.add_argument("--json", type=Path, help="Also write the report as JSON (for CI)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the request mix")
+    args = parser.parse_args()
+
+    shapes = [s for s in query_shapes() if not (args.read_only and s.writes)]
+    if args.only:
+        unknown = set(args.only) - {s.name for s in shapes}
+        if unknown:
+            print(f"ERROR: Unknown query shape(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+            sys.exit(1)
+        shapes = [s for s in shapes if s.name in args.only]
+
+    if args.org_url:
+        if not args.read_only and urlsplit(args.org_url).hostname == urlsplit(DEFAULT_ORG_URL).hostname:
+            print("ERROR: Refusing to run write shapes against production; use a sandbox or --read-only",
+                  file=sys.stderr)
+            sys.exit(1)
+        # Unpaced: the point is to see where the service starts throttling
+        client = DataverseClient(args.org_url, shared_limit=False)
+        target = args.org_url
+    else:
+        _server, url = dv_standin.serve(latency_ms=args.standin_latency_ms)
+        client = DataverseClient(url, token="stand-in", shared_limit=False)
+        target = f"local stand-in ({url})"
+
+    ctx = LoadContext(load_schema())
+    for logical_name in ("redi_equipment", "redi_team", LOAN_TABLE):
+        ctx.sample(client, logical_name)
+    print(f"Target: {target}")
+    print(f"{args.users} users for {args.duration:.0f}s, shapes: {', '.join(s.name for s in shapes)}\n")
+
+    results = Results()
+    deadline = time.monotonic() + args.duration
+    started = time.monotonic()
+    users = [
+        threading.Thread(
+            target=virtual_user,
+            args=(client, ctx, shapes, deadline, args.think_ms / 1000, args.seed + n, results),
+            daemon=True,
+        )
+        for n in range(args.users)
+    ]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.monotonic() - started
+
+    rows = summarise(results, elapsed)
+    print_report(rows)
+    for name, message in results.first_error.items():
+        print(f"  {name}: first error {message}", file=sys.stderr)
+    if args.json:
+        args.json.write_text(json.dumps({"target": target, "users": args.users, "seconds": round(elapsed, 1),
+                                         "queries": rows}, indent=2))
+
+    if ctx.created_loans and not args.keep:
+        cleanup(client, ctx)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""SimQuip equipment availability and loan conflict checks.
+
+Builds the dv_intervals loan index once from an export-tables.py directory
+(``--from-export``), a mirror-sqlite.py database (``--from-mirror``) or a
+live paged read (default), then answers:
+
+    available EQUIPMENT START DUE   is the item free for the whole window?
+    conflicts EQUIPMENT START DUE   which blocking loans overlap the window?
+    report                          every overlapping pair of blocking loans, fleet-wide
+
+EQUIPMENT is a ``redi_equipmentid`` GUID or a ``redi_equipmentcode``.
+Dates are ``YYYY-MM-DD`` and inclusive, matching how loans are entered.
+
+Usage:
+  python3 dataverse/loan-conflicts.py [--from-export DIR | --from-mirror DB] available EQ-0042 2026-03-02 2026-03-06
+  python3 dataverse/loan-conflicts.py --from-mirror simquip.db report [--out conflicts.csv]
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sqlite3
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterator
+
+from dv_client import DataverseClient
+from dv_intervals import (
+    Loan,
+    LoanIndex,
+    fleet_conflicts,
+    loans_from_live,
+    loans_from_mirror,
+    loans_from_rows,
+)
+from dv_schema import entity_set_name, load_schema, primary_key
+
+EQUIPMENT_TABLE = "redi_equipment"
+CODE_COLUMN = "redi_equipmentcode"
+
+
+def read_export(export_dir: Path, table_name: str) -> Iterator[dict[str, Any]]:
+    path = next((p for p in (export_dir / f"{table_name}.jsonl", export_dir / f"{table_name}.jsonl.gz")
+                 if p.exists()), None)
+    if path is None:
+        print(f"ERROR: No {table_name} export in {export_dir}", file=sys.stderr)
+        sys.exit(1)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_loans(args: argparse.Namespace, schema: dict[str, Any], as_of: date) -> list[Loan]:
+    if args.from_export:
+        return list(loans_from_rows(read_export(args.from_export, "redi_loantransfer"), schema, as_of))
+    if args.from_mirror:
+        return list(loans_from_mirror(args.from_mirror, schema, as_of))
+    return list(loans_from_live(DataverseClient(), schema, as_of))
+
+
+def equipment_codes(args: argparse.Namespace) -> dict[str, str]:
+    """Map equipment id -> code from the same source as the loans."""
+    pk = primary_key(EQUIPMENT_TABLE)
+    if args.from_export:
+        return {row[pk]: row.get(CODE_COLUMN) or "" for row in read_export(args.from_export, EQUIPMENT_TABLE)}
+    if args.from_mirror:
+        conn = sqlite3.connect(f"file:{args.from_mirror}?mode=ro", uri=True)
+        try:
+            return dict(conn.execute(f"SELECT {pk}, {CODE_COLUMN} FROM {EQUIPMENT_TABLE}").fetchall())
+        finally:
+            conn.close()
+    rows = DataverseClient().iter_rows(entity_set_name(EQUIPMENT_TABLE), select=[pk, CODE_COLUMN])
+    return {row[pk]: row.get(CODE_COLUMN) or "" for row in rows}
+
+
+def resolve_equipment(value: str, codes: dict[str, str]) -> str:
+    if value in codes:
+        return value
+    matches = [item for item, code in codes.items() if code == value]
+    if len(matches) != 1:
+        print(f"ERROR: {value!r} matches {len(matches)} equipment items", file=sys.stderr)
+        sys.exit(1)
+    return matches[0]
+
+
+def describe(loan: Loan) -> str:
+    return f"{loan.loan_id}  {loan.status:<8} {loan.start} -> {loan.end}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check equipment availability and loan conflicts.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--from-export", type=Path, metavar="DIR", help="Read export-tables.py output")
+    source.add_argument("--from-mirror", type=Path, metavar="DB", help="Read a mirror-sqlite.py database")
+    parser.add_argument("--as-of", help="Treat this date (YYYY-MM-DD) as today for Overdue loans")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("available", "conflicts"):
+        sub = commands.add_parser(name)
+        sub.add_argument("equipment", help="Equipment id or equipment code")
+        sub.add_argument("start", type=date.fromisoformat)
+        sub.add_argument("due", type=date.fromisoformat)
+    report = commands.add_parser("report")
+    report.add_argument("--out", type=Path, help="Write conflicts to CSV instead of stdout")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    as_of = date.fromisoformat(args.as_of) if args.as_of else date.today()
+    started = time.perf_counter()
+    loans = load_loans(args, schema, as_of)
+    codes = equipment_codes(args)
+    print(f"Loaded {len(loans)} blocking loans ({(time.perf_counter() - started) * 1000:.0f} ms)", file=sys.stderr)
+
+    if args.command == "report":
+        started = time.perf_counter()
+        pairs = list(fleet_conflicts(loans))
+        out = open(args.out, "w", newline="") if args.out else sys.stdout
+        try:
+            writer = csv.writer(out)
+            writer.writerow(["equipment_code", "equipment_id", "loan_a", "status_a", "loan_b", "status_b",
+                             "overlap_start", "overlap_end"])
+            for a, b in pairs:
+                writer.writerow([codes.get(a.equipment_id, ""), a.equipment_id, a.loan_id, a.status,
+                                 b.loan_id, b.status, max(a.start, b.start), min(a.end, b.end)])
+        finally:
+            if args.out:
+                out.close()
+        items = len({a.equipment_id for a, _b in pairs})
+        print(f"{len(pairs)} conflicting pairs on {items} items ({(time.perf_counter() - started) * 1000:.0f} ms)",
+              file=sys.stderr)
+        sys.exit(1 if pairs else 0)
+
+    if args.due < args.start:
+        print("ERROR: due date is before start date", file=sys.stderr)
+        sys.exit(1)
+    index = LoanIndex(loans)
+    equipment_id = resolve_equipment(args.equipment, codes)
+    if args.command == "available":
+        free = index.is_available(equipment_id, args.start, args.due)
+        print("available" if free else "not available")
+        sys.exit(0 if free else 1)
+    clashes = index.conflicts(equipment_id, args.start, args.due)
+    for loan in clashes:
+        print(describe(loan))
+    print(f"{len(clashes)} conflicting loan(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
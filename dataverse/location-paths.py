@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""SimQuip location path materialisation.
+
+Showing a location as "Building > Level > Location" used to take separate
+lookups through ``redi_sq_buildingid`` and ``redi_sq_levelid``. This job
+reads buildings, levels and SimQuip locations in three paged passes, joins
+them in memory and writes two columns back with ``UpdateMultiple``:
+
+- ``redi_sq_locationpath``     ``Main Education Centre > Level 1 > Simulation Laboratory``
+- ``redi_sq_locationsortkey``  building code, level sort order, level and location
+                               names, so ``$orderby`` gives picker order
+
+Location pickers can then filter with ``contains(redi_sq_locationpath,...)``
+and sort with ``$orderby=redi_sq_locationsortkey`` in one query. Only rows
+whose values changed are written, so re-runs after a rename touch just the
+affected locations.
+
+Usage: python3 dataverse/location-paths.py [--chunk-size 500] [--workers 4] [--dry-run]
+"""
+
+import argparse
+import sys
+import time
+from typing import Any
+
+from dv_client import DataverseClient, run_chunks
+from dv_schema import (
+    app_filter,
+    column_length,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    primary_key,
+    primary_name_column,
+)
+
+BUILDING_TABLE = "redi_building"
+LEVEL_TABLE = "redi_level"
+LOCATION_TABLE = "redi_location"
+PATH_COLUMN = "redi_sq_locationpath"
+SORT_KEY_COLUMN = "redi_sq_locationsortkey"
+PATH_SEPARATOR = " > "
+
+# Level sort orders are offset so basements (negative orders) sort first and
+# still compare correctly as fixed-width text; levels without one sort last.
+SORT_ORDER_OFFSET = 50000
+SORT_ORDER_MISSING = 99999
+
+
+def read_table(client: DataverseClient, table: dict[str, Any], select: list[str]) -> dict[str, dict[str, Any]]:
+    pk = primary_key(table["logicalName"])
+    rows = client.iter_rows(
+        entity_set_name(table["logicalName"]),
+        select=[pk, *select],
+        filter=app_filter(table),
+    )
+    return {row[pk]: row for row in rows}
+
+
+def sort_key(building: dict[str, Any] | None, level: dict[str, Any] | None, location_name: str) -> str:
+    """Fixed-width, case-folded key: building, level order, level name, location name."""
+    if level and level.get("redi_sortorder") is not None:
+        order = min(max(level["redi_sortorder"] + SORT_ORDER_OFFSET, 0), SORT_ORDER_MISSING)
+    else:
+        order = SORT_ORDER_MISSING
+    parts = [
+        (building.get("redi_code") or building.get("redi_building_name") or "") if building else "~",
+        f"{order:05d}",
+        (level.get("redi_level_name") or "") if level else "~",
+        location_name,
+    ]
+    return "|".join(part.casefold() for part in parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Materialise location paths and sort keys.")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Locations per UpdateMultiple call (default 500)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent update requests (default 4)")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    location_table = get_table(schema, LOCATION_TABLE)
+    location_name = primary_name_column(location_table)
+    building_ref = lookup_value_column("redi_sq_buildingid")
+    level_ref = lookup_value_column("redi_sq_levelid")
+    level_building_ref = lookup_value_column("redi_buildingid")
+    max_path = column_length(location_table, PATH_COLUMN)
+    max_sort_key = column_length(location_table, SORT_KEY_COLUMN)
+
+    client = DataverseClient()
+    started = time.monotonic()
+    buildings = read_table(client, get_table(schema, BUILDING_TABLE), ["redi_building_name", "redi_code"])
+    levels = read_table(client, get_table(schema, LEVEL_TABLE),
+                        ["redi_level_name", "redi_sortorder", level_building_ref])
+    locations = read_table(client, location_table,
+                           [location_name, building_ref, level_ref, PATH_COLUMN, SORT_KEY_COLUMN])
+    print(f"Read {len(buildings)} buildings, {len(levels)} levels, {len(locations)} locations "
+          f"({time.monotonic() - started:.1f}s)")
+
+    pk = primary_key(LOCATION_TABLE)
+    records: list[dict[str, Any]] = []
+    mismatched = 0
+    for location_id, row in locations.items():
+        level = levels.get(row.get(level_ref) or "")
+        building_id = row.get(building_ref) or (level or {}).get(level_building_ref)
+        if level and row.get(building_ref) and level.get(level_building_ref) != row[building_ref]:
+            mismatched += 1
+            print(f"  WARNING: {row.get(location_name)!r} is on a level of a different building", file=sys.stderr)
+        building = buildings.get(building_id or "")
+
+        name = row.get(location_name) or ""
+        path_parts = [
+            building.get("redi_building_name") if building else None,
+            level.get("redi_level_name") if level else None,
+            name,
+        ]
+        path = PATH_SEPARATOR.join(part for part in path_parts if part)[:max_path]
+        key = sort_key(building, level, name)[:max_sort_key]
+        if (row.get(PATH_COLUMN), row.get(SORT_KEY_COLUMN)) != (path, key):
+            records.append({pk: location_id, PATH_COLUMN: path, SORT_KEY_COLUMN: key})
+
+    print(f"  {len(records)} locations need updating, {mismatched} with a building/level mismatch")
+    if args.dry_run or not records:
+        for record in records[:20]:
+            print(f"    {record[PATH_COLUMN]}")
+        return
+
+    failures = run_chunks(
+        lambda chunk: client.update_multiple(entity_set_name(LOCATION_TABLE), LOCATION_TABLE, chunk),
+        records, args.chunk_size, args.workers,
+    )
+    for chunk, e in failures:
+        print(f"  FAILED chunk of {len(chunk)}: {e.message}", file=sys.stderr)
+    failed = sum(len(chunk) for chunk, _e in failures)
+    print(f"Updated {len(records) - failed} locations ({time.monotonic() - started:.1f}s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
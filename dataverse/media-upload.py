@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""SimQuip bulk media ingester for the ``redi_file`` file columns.
+
+Uploads a local photo/document library into ``redi_equipmentmedia`` or
+``redi_locationmedia``. The library is laid out one folder per owner:
+
+    photos/SIM-KIT-001/front.jpg        equipment: folder = redi_equipmentcode
+    photos/Simulation Laboratory/1.jpg  location:  folder = redi_departmentname
+
+For each file the tool creates a media row (or reuses the row a previous run
+created for the same owner and file name) and uploads the file in 4 MB
+blocks with ``InitializeFileBlocksUpload`` / ``UploadBlock`` /
+``CommitFileBlocksUpload``. Files are read through ``mmap``, so a block is
+sliced straight from the page cache. Several files upload at once on a
+thread pool, each thread with its own persistent connection.
+
+Each staged block is appended to a JSONL journal. If a run is interrupted,
+the next run carries on from the last staged block of every partly
+uploaded file, provided the continuation token is still accepted. A file
+that changed on disk, whose token has expired, or that was started with a
+different ``--block-size-mb``, starts again.
+Rows whose file column is already set are skipped. ``redi_fileurl`` is set
+to the file's ``$value`` download URL.
+
+Usage: python3 dataverse/media-upload.py {equipment,location} LIBRARY_DIR
+           [--workers 6] [--block-size-mb 4] [--journal PATH] [--dry-run]
+"""
+
+import argparse
+import base64
+import json
+import mimetypes
+import mmap
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from dv_client import MAX_FILE_BLOCK_SIZE, DataverseClient, DataverseError, chunked
+from dv_schema import (
+    SCRIPT_DIR,
+    app_filter,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    option_values,
+    primary_key,
+    primary_name_column,
+)
+
+FILE_COLUMN = "redi_file"
+
+# owner kind -> (media table, owner lookup on the media table, owner folder key column or None for primary name)
+MEDIA_TABLES = {
+    "equipment": ("redi_equipmentmedia", "redi_equipmentid", "redi_equipmentcode"),
+    "location": ("redi_locationmedia", "redi_locationid", None),
+}
+
+DEFAULT_JOURNAL = SCRIPT_DIR / ".media-upload-journal.jsonl"
+PROGRESS_EVERY = 50
+
+
+@dataclass
+class MediaFile:
+    path: Path
+    owner_id: str
+    file_name: str
+    size: int
+    mtime: float
+    mime_type: str
+    row_id: str = ""
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Resume journal
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Journal:
+    """JSONL record of upload progress, keyed by absolute file path.
+
+    Lines are ``start`` (a new continuation token for a given size/mtime/block size),
+    ``block`` (one block staged) and ``done`` (committed). Replaying them
+    gives the resume point of every file. On open, the journal is rewritten
+    to hold only the files still in progress.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.state: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # a line cut short by an interrupted run
+        # Rewrite with only the files still in progress, so the journal stays small
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "w")
+        for key, state in self.state.items():
+            self._write({"event": "start", "path": key, "row": state["row"], "token": state["token"],
+                         "size": state["size"], "mtime": state["mtime"], "block_size": state["block_size"]})
+            for block in sorted(state["blocks"]):
+                self._write({"event": "block", "path": key, "block": block})
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        key = entry["path"]
+        if entry["event"] == "start":
+            self.state[key] = {
+                "row": entry["row"], "token": entry["token"], "size": entry["size"],
+                "mtime": entry["mtime"], "block_size": entry.get("block_size"), "blocks": set(),
+            }
+        elif entry["event"] == "block" and key in self.state:
+            self.state[key]["blocks"].add(entry["block"])
+        elif entry["event"] == "done":
+            self.state.pop(key, None)
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def record(self, **entry: Any) -> None:
+        with self._lock:
+            self._apply(entry)
+            self._write(entry)
+
+    def resume_point(self, media: MediaFile, block_size: int) -> tuple[str, set[int]] | None:
+        """``(token, staged blocks)`` if ``media`` was part-uploaded into the same row, is unchanged and was
+        staged in blocks of ``block_size`` (blocks are matched by index)."""
+        with self._lock:
+            state = self.state.get(str(media.path))
+            current = (media.row_id, media.size, media.mtime, block_size)
+            if state and (state["row"], state["size"], state["mtime"], state["block_size"]) == current:
+                return state["token"], set(state["blocks"])
+        return None
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Upload
+# ═══════════════════════════════════════════════════════════════════════════
+
+def block_id(index: int) -> str:
+    """Fixed-length block id; the same index always gives the same id, so resumed blocks line up."""
+    return base64.b64encode(f"block-{index:08d}".encode()).decode()
+
+
+def upload_file(
+    client: DataverseClient,
+    media_table: str,
+    media: MediaFile,
+    block_size: int,
+    journal: Journal,
+) -> tuple[int, bool]:
+    """Upload one file into its row's file column; returns ``(bytes sent, resumed)``."""
+    block_count = max(1, -(-media.size // block_size))
+    resume = journal.resume_point(media, block_size)
+    token, staged = resume if resume else (None, set())
+    sent = 0
+
+    with open(media.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for attempt in (1, 2):
+            if token is None:
+                token = client.initialize_file_upload(media_table, media.row_id, FILE_COLUMN, media.file_name)
+                staged = set()
+                journal.record(event="start", path=str(media.path), row=media.row_id, token=token,
+                               size=media.size, mtime=media.mtime, block_size=block_size)
+            try:
+                for index in range(block_count):
+                    if index in staged:
+                        continue
+                    start = index * block_size
+                    block = data[start:start + block_size]
+                    client.upload_block(token, block_id(index), block)
+                    sent += len(block)
+                    journal.record(event="block", path=str(media.path), block=index)
+                break
+            except DataverseError:
+                if resume is None or attempt == 2:
+                    raise
+                token = None  # the saved continuation token has expired; start this file again
+
+        client.commit_file_upload(token, media.file_name, media.mime_type,
+                                  [block_id(i) for i in range(block_count)])
+    journal.record(event="done", path=str(media.path))
+    return sent, resume is not None and token == resume[0]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Library scan and media rows
+# ═══════════════════════════════════════════════════════════════════════════
+
+def scan_library(root: Path, owners: dict[str, str]) -> tuple[list[MediaFile], list[str], int]:
+    """Files under owner folders; returns them with unmatched folder names and the count of empty files."""
+    files, unmatched, empty = [], [], 0
+    for folder in sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")):
+        owner_id = owners.get(folder.name.casefold())
+        if owner_id is None:
+            unmatched.append(folder.name)
+            continue
+        for path in sorted(p for p in folder.rglob("*") if p.is_file() and not p.name.startswith(".")):
+            stat = path.stat()
+            if stat.st_size == 0:
+                empty += 1
+                continue
+            mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            files.append(MediaFile(path.resolve(), owner_id, path.name, stat.st_size, stat.st_mtime, mime_type))
+    return files, unmatched, empty
+
+
+def read_owners(
+    client: DataverseClient,
+    schema: dict[str, Any],
+    owner_table: str,
+    key_column: str | None,
+) -> dict[str, str]:
+    """Case-folded folder key -> owner id for the SimQuip owner rows."""
+    table = get_table(schema, owner_table)
+    pk = primary_key(owner_table)
+    key_column = key_column or primary_name_column(table)
+    owners = {}
+    for row in client.iter_rows(entity_set_name(owner_table), select=[pk, key_column], filter=app_filter(table)):
+        if row.get(key_column):
+            owners[row[key_column].casefold()] = row[pk]
+    return owners
+
+
+def read_media_rows(
+    client: DataverseClient,
+    media_table: str,
+    owner_column: str,
+) -> dict[tuple[str, str], dict[str, Any]]:
+    """Existing media rows by ``(owner id, file name)``."""
+    pk = primary_key(media_table)
+    owner_ref = lookup_value_column(owner_column)
+    rows = client.iter_rows(entity_set_name(media_table), select=[pk, owner_ref, "redi_filename", FILE_COLUMN])
+    return {(row.get(owner_ref) or "", row.get("redi_filename") or ""): row for row in rows}
+
+
+def new_media_record(
+    client: DataverseClient,
+    media_def: dict[str, Any],
+    owner_column: str,
+    owner_table: str,
+    media: MediaFile,
+    sort_order: int,
+) -> dict[str, Any]:
+    media_table = media_def["logicalName"]
+    media_types = option_values(next(c for c in media_def["columns"] if c["logicalName"] == "redi_mediatype"))
+    entity_set = entity_set_name(media_table)
+    return {
+        primary_key(media_table): media.row_id,
+        primary_name_column(media_def): media.file_name[:200],
+        "redi_mediatype": media_types["Image" if media.mime_type.startswith("image/") else "Attachment"],
+        "redi_filename": media.file_name,
+        "redi_mimetype": media.mime_type,
+        "redi_fileurl": f"{client.api_base}/{entity_set}({media.row_id})/{FILE_COLUMN}/$value",
+        "redi_sortorder": sort_order,
+        f"{owner_column}@odata.bind": f"/{entity_set_name(owner_table)}({media.owner_id})",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Upload a local media library into SimQuip file columns.")
+    parser.add_argument("owner", choices=sorted(MEDIA_TABLES), help="Whose media the library holds")
+    parser.add_argument("library", type=Path, help="Folder with one sub-folder per equipment code / location name")
+    parser.add_argument("--workers", type=int, default=6, help="Files uploaded concurrently (default 6)")
+    parser.add_argument("--block-size-mb", type=float, default=MAX_FILE_BLOCK_SIZE / 2**20,
+                        help="UploadBlock size in MB (default and maximum 4)")
+    parser.add_argument("--journal", type=Path, default=DEFAULT_JOURNAL, help="Resume journal (JSONL)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be uploaded")
+    args = parser.parse_args()
+
+    block_size = min(int(args.block_size_mb * 2**20), MAX_FILE_BLOCK_SIZE)
+    media_table, owner_column, key_column = MEDIA_TABLES[args.owner]
+    schema = load_schema()
+    media_def = get_table(schema, media_table)
+    owner_table = next(c["target"] for c in media_def["columns"] if c["logicalName"] == owner_column)
+    max_kb = next(c.get("maxSizeInKB") for c in media_def["columns"] if c["logicalName"] == FILE_COLUMN)
+
+    client = DataverseClient()
+    started = time.monotonic()
+    owners = read_owners(client, schema, owner_table, key_column)
+    files, unmatched, empty = scan_library(args.library, owners)
+    existing = read_media_rows(client, media_table, owner_column)
+    print(f"Found {len(files)} files for {len(owners)} {args.owner} rows "
+          f"({sum(m.size for m in files) / 2**20:,.1f} MB, {time.monotonic() - started:.1f}s)")
+    for name in unmatched[:20]:
+        print(f"  WARNING: no {args.owner} matches folder {name!r}", file=sys.stderr)
+    if empty:
+        print(f"  Skipping {empty} empty files", file=sys.stderr)
+
+    to_create, pending, skipped, too_large = [], [], 0, 0
+    next_sort: dict[str, int] = {}
+    for row in existing.values():
+        owner = row.get(lookup_value_column(owner_column)) or ""
+        next_sort[owner] = next_sort.get(owner, 0) + 1
+    for media in files:
+        if max_kb and media.size > max_kb * 1024:
+            too_large += 1
+            print(f"  SKIPPED {media.path}: {media.size / 2**20:.1f} MB exceeds the {max_kb // 1024} MB limit",
+                  file=sys.stderr)
+            continue
+        row = existing.get((media.owner_id, media.file_name))
+        if row and row.get(FILE_COLUMN):
+            skipped += 1
+            continue
+        if row:
+            media.row_id = row[primary_key(media_table)]
+        else:
+            media.row_id = str(uuid.uuid4())
+            sort_order = next_sort.get(media.owner_id, 0)
+            next_sort[media.owner_id] = sort_order + 1
+            to_create.append(new_media_record(client, media_def, owner_column, owner_table, media, sort_order))
+        pending.append(media)
+    print(f"  {len(pending)} to upload ({len(to_create)} new rows), {skipped} already uploaded, {too_large} too large")
+    if args.dry_run or not pending:
+        return
+
+    failed: set[str] = set()
+    for chunk in chunked(to_create, 500):
+        try:
+            client.create_multiple(entity_set_name(media_table), media_table, chunk)
+        except DataverseError as e:
+            failed.update(record[primary_key(media_table)] for record in chunk)
+            print(f"  FAILED creating {len(chunk)} media rows: {e.message}", file=sys.stderr)
+    pending = [m for m in pending if m.row_id not in failed]
+
+    journal = Journal(args.journal)
+    uploaded = resumed = sent = 0
+    upload_started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = {
+                executor.submit(upload_file, client, media_table, media, block_size, journal): media
+                for media in pending
+            }
+            for future in as_completed(futures):
+                media = futures[future]
+                try:
+                    file_sent, was_resumed = future.result()
+                except (DataverseError, OSError) as e:
+                    failed.add(media.row_id)
+                    print(f"  FAILED {media.path}: {e}", file=sys.stderr)
+                    continue
+                uploaded += 1
+                resumed += was_resumed
+                sent += file_sent
+                if uploaded % PROGRESS_EVERY == 0:
+                    elapsed = time.monotonic() - upload_started
+                    print(f"  {uploaded}/{len(pending)} files, {sent / 2**20:,.1f} MB "
+                          f"({sent / 2**20 / max(elapsed, 1e-9):.1f} MB/s)")
+    finally:
+        journal.close()
+
+    elapsed = time.monotonic() - upload_started
+    print(f"Uploaded {uploaded} files ({resumed} resumed), {sent / 2**20:,.1f} MB in {elapsed:.1f}s "
+          f"({sent / 2**20 / max(elapsed, 1e-9):.1f} MB/s); {len(failed)} failed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
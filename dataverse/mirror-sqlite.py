@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""SimQuip local SQLite mirror for reporting.
+
+Materialises the SimQuip tables into a SQLite database whose tables and
+indexes are derived from schema.json:
+
+- the primary key is ``<table>id TEXT PRIMARY KEY``
+- lookups become ``TEXT REFERENCES <target>`` columns (named after the lookup,
+  without the ``_..._value`` wrapper) with an index each
+- choice columns are stored as their integer values and indexed, with labels
+  in ``choice_labels`` for readable reports
+- booleans are 0/1 integers; dates are ISO ``YYYY-MM-DD`` text (indexed)
+
+Rows can come from a live paged read of the Web API (default, full refresh),
+from an export-tables.py directory (``--from-export``), or incrementally from
+sync-changes.py change files (``--from-sync``), which only applies files not
+seen before. If schema.json changes, the mirror tables are rebuilt.
+
+Usage:
+  python3 dataverse/mirror-sqlite.py [--db simquip.db] [--from-export DIR | --from-sync DIR] [--workers 4]
+  python3 dataverse/mirror-sqlite.py --db simquip.db --report overdue-loans-by-team
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterator
+
+from dv_client import DataverseClient, DataverseError
+from dv_schema import (
+    all_tables,
+    app_filter,
+    entity_set_name,
+    get_table,
+    load_schema,
+    lookup_value_column,
+    matches_app_filter,
+    option_values,
+    primary_key,
+    primary_name_column,
+    select_columns,
+)
+
+SQL_TYPES = {
+    "String": "TEXT",
+    "Memo": "TEXT",
+    "Integer": "INTEGER",
+    "Boolean": "INTEGER",
+    "Choice": "INTEGER",
+    "DateOnly": "TEXT",
+    "DateTime": "TEXT",
+    "Lookup": "TEXT",
+    "File": "TEXT",
+}
+INDEXED_TYPES = {"Lookup", "Choice", "DateOnly", "DateTime"}
+
+# Bounded so fetch threads cannot outrun the single SQLite writer
+PAGE_QUEUE_SIZE = 8
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DDL
+# ═══════════════════════════════════════════════════════════════════════════
+
+def schema_hash(schema: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+
+def table_columns(table: dict[str, Any]) -> list[tuple[str, dict[str, Any] | None]]:
+    """Mirror columns in order as ``(sqlite_name, schema_column)``."""
+    logical_name = table["logicalName"]
+    columns: list[tuple[str, dict[str, Any] | None]] = [
+        (primary_key(logical_name), None),
+        (primary_name_column(table), None),
+    ]
+    names = {name for name, _col in columns}
+    for col in table["columns"]:
+        if col["logicalName"] not in names:
+            columns.append((col["logicalName"], col))
+            names.add(col["logicalName"])
+    return columns
+
+
+def create_table_sql(table: dict[str, Any], table_names: set[str]) -> list[str]:
+    logical_name = table["logicalName"]
+    defs = []
+    for name, col in table_columns(table):
+        if col is None:
+            sql_type = "TEXT PRIMARY KEY" if name == primary_key(logical_name) else "TEXT"
+        else:
+            sql_type = SQL_TYPES[col["type"]]
+            if col["type"] == "Lookup" and col["target"] in table_names:
+                sql_type += f" REFERENCES {col['target']}({primary_key(col['target'])})"
+        defs.append(f"{name} {sql_type}")
+    statements = [f"CREATE TABLE {logical_name} (\n  " + ",\n  ".join(defs) + "\n)"]
+    for col in table["columns"]:
+        if col["type"] in INDEXED_TYPES:
+            name = col["logicalName"]
+            statements.append(f"CREATE INDEX ix_{logical_name}_{name} ON {logical_name} ({name})")
+    return statements
+
+
+def ensure_schema(conn: sqlite3.Connection, schema: dict[str, Any]) -> bool:
+    """Create (or rebuild after a schema.json change) the mirror tables.
+
+    Returns True when the tables were (re)created and need a full load.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS mirror_state (key TEXT PRIMARY KEY, value TEXT)")
+    current = schema_hash(schema)
+    row = conn.execute("SELECT value FROM mirror_state WHERE key = 'schema_hash'").fetchone()
+    if row and row[0] == current:
+        return False
+
+    tables = all_tables(schema)
+    table_names = {t["logicalName"] for t in tables}
+    with conn:
+        for table in tables:
+            conn.execute(f"DROP TABLE IF EXISTS {table['logicalName']}")
+        conn.execute("DROP TABLE IF EXISTS choice_labels")
+        conn.execute("DELETE FROM mirror_state")
+        for table in tables:
+            for statement in create_table_sql(table, table_names):
+                conn.execute(statement)
+        conn.execute(
+            "CREATE TABLE choice_labels (table_name TEXT, column_name TEXT, value INTEGER, label TEXT,"
+            " PRIMARY KEY (table_name, column_name, value))"
+        )
+        for table in tables:
+            for col in table["columns"]:
+                if col["type"] == "Choice":
+                    conn.executemany(
+                        "INSERT INTO choice_labels VALUES (?, ?, ?, ?)",
+                        [(table["logicalName"], col["logicalName"], v, lbl) for lbl, v in option_values(col).items()],
+                    )
+        conn.execute("INSERT INTO mirror_state VALUES ('schema_hash', ?)", (current,))
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Row writing
+# ═══════════════════════════════════════════════════════════════════════════
+
+class TableWriter:
+    """Converts Web API rows to mirror rows and upserts/deletes them."""
+
+    def __init__(self, conn: sqlite3.Connection, table: dict[str, Any]) -> None:
+        self.conn = conn
+        self.name = table["logicalName"]
+        self.pk = primary_key(self.name)
+        self.columns = table_columns(table)
+        names = ", ".join(name for name, _col in self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        self.upsert_sql = f"INSERT OR REPLACE INTO {self.name} ({names}) VALUES ({marks})"
+
+    def _values(self, row: dict[str, Any]) -> tuple[Any, ...]:
+        values = []
+        for name, col in self.columns:
+            if col is not None and col["type"] == "Lookup":
+                value = row.get(lookup_value_column(name))
+            else:
+                value = row.get(name)
+            if col is not None and col["type"] == "Boolean" and value is not None:
+                value = int(value)
+            values.append(value)
+        return tuple(values)
+
+    def truncate(self) -> None:
+        self.conn.execute(f"DELETE FROM {self.name}")
+
+    def upsert(self, rows: list[dict[str, Any]]) -> None:
+        self.conn.executemany(self.upsert_sql, [self._values(r) for r in rows])
+
+    def delete(self, ids: list[str]) -> None:
+        self.conn.executemany(f"DELETE FROM {self.name} WHERE {self.pk} = ?", [(i,) for i in ids])
+
+
+def read_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def batched(rows: Iterator[dict[str, Any]], size: int = 5000) -> Iterator[list[dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Sources
+# ═══════════════════════════════════════════════════════════════════════════
+
+def load_live(conn: sqlite3.Connection, tables: list[dict[str, Any]], workers: int) -> None:
+    """Full refresh from the Web API; tables are fetched concurrently, written serially."""
+    client = DataverseClient()
+    pages: queue.Queue = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+    writers = {t["logicalName"]: TableWriter(conn, t) for t in tables}
+    counts = dict.fromkeys(writers, 0)
+
+    # Set when the writer gives up, so fetchers stop instead of blocking on a full queue
+    stop = threading.Event()
+
+    def put(item: tuple[str, list[dict[str, Any]] | None, Exception | None]) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(table: dict[str, Any]) -> None:
+        name = table["logicalName"]
+        if stop.is_set():
+            return
+        try:
+            for page in client.iter_pages(
+                entity_set_name(name),
+                select=select_columns(table),
+                filter=app_filter(table),
+            ):
+                if not put((name, page, None)):
+                    return
+        except Exception as e:  # surfaced to the writer thread below
+            put((name, None, e))
+            return
+        put((name, None, None))
+
+    with conn:
+        for writer in writers.values():
+            writer.truncate()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for table in tables:
+                executor.submit(fetch, table)
+            try:
+                remaining = len(tables)
+                while remaining:
+                    name, page, error = pages.get()
+                    if error is not None:
+                        raise error
+                    if page is None:
+                        remaining -= 1
+                        print(f"  Mirrored {name}: {counts[name]} rows")
+                        continue
+                    writers[name].upsert(page)
+                    counts[name] += len(page)
+            finally:
+                stop.set()
+
+
+def load_export(conn: sqlite3.Connection, tables: list[dict[str, Any]], export_dir: Path) -> None:
+    """Full refresh from export-tables.py output."""
+    for table in tables:
+        name = table["logicalName"]
+        path = next((p for p in (export_dir / f"{name}.jsonl", export_dir / f"{name}.jsonl.gz") if p.exists()), None)
+        if path is None:
+            print(f"  No export for {name}, leaving it unchanged")
+            continue
+        writer = TableWriter(conn, table)
+        count = 0
+        with conn:
+            writer.truncate()
+            for batch in batched(read_jsonl(path)):
+                writer.upsert(batch)
+                count += len(batch)
+        print(f"  Mirrored {name}: {count} rows from {path.name}")
+
+
+def load_sync(conn: sqlite3.Connection, tables: list[dict[str, Any]], sync_dir: Path) -> None:
+    """Apply sync-changes.py change files not yet applied to the mirror."""
+    for table in tables:
+        name = table["logicalName"]
+        files = sorted((sync_dir / "changes" / name).glob("*.jsonl"))
+        state_key = f"sync:{name}"
+        row = conn.execute("SELECT value FROM mirror_state WHERE key = ?", (state_key,)).fetchone()
+        last_applied = row[0] if row else ""
+        pending = [f for f in files if f.name > last_applied]
+        fulls = [f for f in pending if f.stem.endswith("-full")]
+        if fulls:
+            pending = [f for f in pending if f.name >= fulls[-1].name]
+        elif not last_applied and pending:
+            print(f"  {name}: no -full snapshot to start from; run sync-changes.py --full", file=sys.stderr)
+            continue
+        if not pending:
+            print(f"  {name}: up to date")
+            continue
+
+        writer = TableWriter(conn, table)
+        upserts = deletes = 0
+        with conn:
+            for path in pending:
+                if path.stem.endswith("-full"):
+                    writer.truncate()
+                for batch in batched(read_jsonl(path)):
+                    rows = [c["row"] for c in batch if c["op"] == "upsert"]
+                    ids = [c["id"] for c in batch if c["op"] == "delete"]
+                    # Change tracking cannot take $filter, so shared tables carry every app's rows:
+                    # keep SimQuip's and delete any that no longer (or never did) match appFilter
+                    kept = [r for r in rows if matches_app_filter(table, r)]
+                    ids += [r[writer.pk] for r in rows if not matches_app_filter(table, r)]
+                    writer.upsert(kept)
+                    writer.delete(ids)
+                    upserts += len(kept)
+                    deletes += len(ids)
+            conn.execute("INSERT OR REPLACE INTO mirror_state VALUES (?, ?)", (state_key, pending[-1].name))
+        print(f"  {name}: applied {len(pending)} file(s), {upserts} upserts, {deletes} deletes")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Reports
+# ═══════════════════════════════════════════════════════════════════════════
+
+def choice_value(schema: dict[str, Any], table_name: str, column: str, option: str) -> int:
+    col = next(c for c in get_table(schema, table_name)["columns"] if c["logicalName"] == column)
+    return option_values(col)[option]
+
+
+def report_overdue_loans_by_team(conn: sqlite3.Connection, schema: dict[str, Any]) -> list[tuple[Any, ...]]:
+    active = choice_value(schema, "redi_loantransfer", "redi_loanstatus", "Active")
+    overdue = choice_value(schema, "redi_loantransfer", "redi_loanstatus", "Overdue")
+    return conn.execute(
+        """
+        SELECT t.redi_team_name, COUNT(*) AS overdue_loans, MIN(l.redi_duedate) AS oldest_due
+        FROM redi_loantransfer l
+        JOIN redi_team t ON t.redi_teamid = l.redi_recipientteamid
+        WHERE l.redi_loanstatus = ? OR (l.redi_loanstatus = ? AND l.redi_duedate < ?)
+        GROUP BY t.redi_teamid
+        ORDER BY overdue_loans DESC
+        """,
+        (overdue, active, date.today().isoformat()),
+    ).fetchall()
+
+
+def report_equipment_by_status(conn: sqlite3.Connection, schema: dict[str, Any]) -> list[tuple[Any, ...]]:
+    return conn.execute(
+        """
+        SELECT COALESCE(c.label, e.redi_sq_status) AS status, COUNT(*) AS items
+        FROM redi_equipment e
+        LEFT JOIN choice_labels c
+          ON c.table_name = 'redi_equipment' AND c.column_name = 'redi_sq_status' AND c.value = e.redi_sq_status
+        GROUP BY e.redi_sq_status
+        ORDER BY items DESC
+        """
+    ).fetchall()
+
+
+REPORTS = {
+    "overdue-loans-by-team": report_overdue_loans_by_team,
+    "equipment-by-status": report_equipment_by_status,
+}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Main Execution
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mirror SimQuip tables into a local SQLite database.")
+    parser.add_argument("--db", type=Path, default=Path("simquip.db"), help="SQLite database path (default ./simquip.db)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--from-export", type=Path, metavar="DIR", help="Load export-tables.py output")
+    source.add_argument("--from-sync", type=Path, metavar="DIR", help="Apply sync-changes.py change files")
+    parser.add_argument("--workers", type=int, default=4, help="Tables fetched concurrently in live mode")
+    parser.add_argument("--report", choices=sorted(REPORTS), help="Run a canned report against the mirror and exit")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
+    if args.report:
+        start = time.perf_counter()
+        for row in REPORTS[args.report](conn, schema):
+            print("  " + " | ".join("" if v is None else str(v) for v in row))
+        print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return
+
+    rebuilt = ensure_schema(conn, schema)
+    if rebuilt:
+        print(f"Created mirror tables in {args.db}")
+    tables = all_tables(schema)
+    started = time.monotonic()
+    if args.from_export:
+        load_export(conn, tables, args.from_export)
+    elif args.from_sync:
+        load_sync(conn, tables, args.from_sync)
+    else:
+        try:
+            load_live(conn, tables, args.workers)
+        except DataverseError as e:
+            print(f"ERROR: live refresh failed, mirror left unchanged: {e.message}", file=sys.stderr)
+            sys.exit(1)
+    conn.execute("PRAGMA optimize")
+    conn.close()
+    print(f"\nMirror updated: {args.db} ({time.monotonic() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,36 +4,93 @@
 Uses the PAC CLI's cached MSAL token to call the Dataverse Web API directly.
 This avoids the need for PowerShell or separate Azure CLI auth.
 
-Usage: python3 dataverse/provision-tables.py
+Several environments (e.g. dev, test and prod) can be provisioned in one
+run. Each gets its own token, connection and rate limiter and runs on its
+own thread, so rolling a schema change out takes about as long as the
+slowest org; a combined report is printed at the end. Each limiter shares
+its org's service-protection budget with any other SimQuip tools running.
+
+Usage:
+  python3 dataverse/provision-tables.py
+  python3 dataverse/provision-tables.py --org-url https://dev.crm6.dynamics.com --org-url https://test.crm6.dynamics.com
+  ORG_URL=https://dev.crm6.dynamics.com,https://test.crm6.dynamics.com python3 dataverse/provision-tables.py
 """
 
-import json
+import argparse
+import os
 import sys
+import threading
 import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.parse import quote
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+from dv_client import DEFAULT_ORG_URL, DEFAULT_RATE, DataverseClient, DataverseError, SharedRateLimiter
+from dv_metadata import MetadataSnapshot, snapshot_path
+from dv_schema import (
+    DEFAULT_FILE_SIZE_KB,
+    SCRIPT_DIR,
+    all_tables,
+    column_flags,
+    load_schema,
+    manages_column_flags,
+    primary_name_column,
+)
 
-ORG_URL = "https://redi.crm6.dynamics.com"
-API_BASE = f"{ORG_URL}/api/data/v9.2"
 PREFIX = "redi"
 SOLUTION_NAME = "SimQuip"
+METADATA_CACHE_DIR = SCRIPT_DIR / ".metadata-cache"
 
+# schema.json column flag -> AttributeMetadata property
+FLAG_PROPERTIES = {
+    "filterable": "IsFilterable",
+    "sortable": "IsSortableEnabled",
+    "searchable": "IsSearchable",
+    "retrievable": "IsRetrievable",
+}
 
-def get_token():
-    cache_path = Path.home() / ".local/share/Microsoft/PowerAppsCli/tokencache_msalv3.dat"
-    with open(cache_path) as f:
-        data = json.load(f)
-    for _k, v in data["AccessToken"].items():
-        if "redi.crm6" in v.get("target", ""):
-            return v["secret"]
-    print("ERROR: No Dataverse token found in PAC CLI cache", file=sys.stderr)
-    print("Run: pac auth create --environment https://redi.crm6.dynamics.com", file=sys.stderr)
-    sys.exit(1)
 
+class ProvisioningError(RuntimeError):
+    """Stops provisioning of one environment; the others carry on."""
 
-TOKEN = get_token()
+
+class Environment:
+    """One target org: its own client (token, connections), rate limiter and metadata snapshot, plus its results."""
+
+    def __init__(self, org_url, rate=DEFAULT_RATE, cache_dir=METADATA_CACHE_DIR):
+        self.org_url = org_url.rstrip("/")
+        self.name = urlsplit(self.org_url).netloc
+        self.client = DataverseClient(self.org_url, limiter=SharedRateLimiter(self.org_url, rate))
+        tables = [table["logicalName"] for table in all_tables(load_schema())]
+        self.metadata = MetadataSnapshot(snapshot_path(cache_dir, self.org_url), tables)
+        self.changes = 0
+        self.failures = []
+        self.error = None
+        self.elapsed = 0.0
+
+
+_current = threading.local()
+_print_lock = threading.Lock()
+_prefix_output = False
+
+
+def env():
+    return _current.env
+
+
+def log(message="", changed=False, failed=False):
+    """Print a progress line for the current environment and record its outcome."""
+    environment = env()
+    if changed:
+        environment.changes += 1
+    if failed:
+        environment.failures.append(message.strip())
+    with _print_lock:
+        if not _prefix_output:
+            print(message)
+        elif message.strip():
+            print(f"[{environment.name}] {message.lstrip()}")
 
 
 def label(text):
@@ -49,69 +106,26 @@ def label(text):
     }
 
 
-def _encode_url(path):
-    """Encode URL path, preserving OData query structure."""
-    if "?" in path:
-        base, query = path.split("?", 1)
-        return f"{API_BASE}/{base}?{quote(query, safe='=&$\'()')}"
-    return f"{API_BASE}/{path}"
-
-
-def dv_request(method, path, body=None):
-    url = _encode_url(path)
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "OData-MaxVersion": "4.0",
-        "OData-Version": "4.0",
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-    }
-    data = json.dumps(body).encode() if body else None
-    req = Request(url, data=data, headers=headers, method=method)
-    try:
-        resp = urlopen(req)
-        if resp.status == 204:
-            return None
-        return json.loads(resp.read())
-    except HTTPError as e:
-        error_body = e.read().decode()
-        try:
-            error_json = json.loads(error_body)
-            return {"_error": True, "_status": e.code, "_message": error_json.get("error", {}).get("message", error_body)}
-        except json.JSONDecodeError:
-            return {"_error": True, "_status": e.code, "_message": error_body}
+def dv_request(method, path, body=None, extra_headers=None):
+    return env().client.request(method, path, body, extra_headers)
 
 
 def dv_get(path):
-    url = _encode_url(path)
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "OData-MaxVersion": "4.0",
-        "OData-Version": "4.0",
-        "Accept": "application/json",
-    }
-    req = Request(url, headers=headers, method="GET")
-    try:
-        resp = urlopen(req)
-        return json.loads(resp.read())
-    except HTTPError:
-        return None
+    return env().client.get(path)
 
 
 def table_exists(logical_name):
-    result = dv_get(f"EntityDefinitions(LogicalName='{logical_name}')?$select=LogicalName")
-    return result is not None
+    return env().metadata.entity(logical_name) is not None
 
 
 def column_exists(table, column):
-    result = dv_get(f"EntityDefinitions(LogicalName='{table}')/Attributes(LogicalName='{column}')?$select=LogicalName")
-    return result is not None
+    return env().metadata.attribute(table, column) is not None
 
 
 def create_table(schema_name, display_name, plural_name, description):
     logical = schema_name.lower()
     if table_exists(logical):
-        print(f"  Table {schema_name} already exists, skipping.")
+        log(f"  Table {schema_name} already exists, skipping.")
         return True
 
     primary_name = f"{logical}_name"
@@ -139,9 +153,10 @@ def create_table(schema_name, display_name, plural_name, description):
 
     result = dv_request("POST", "EntityDefinitions", entity)
     if result and result.get("_error"):
-        print(f"  FAILED to create table {schema_name}: {result['_message']}")
+        log(f"  FAILED to create table {schema_name}: {result['_message']}", failed=True)
         return False
-    print(f"  Created table: {schema_name}")
+    env().metadata.record_attribute(logical, primary_name)
+    log(f"  Created table: {schema_name}", changed=True)
     time.sleep(1)  # Brief pause for Dataverse to process
     return True
 
@@ -150,15 +165,16 @@ def add_column(table, col_def):
     table_lower = table.lower()
     col_lower = col_def["SchemaName"].lower()
     if column_exists(table_lower, col_lower):
-        print(f"    Column {col_def['SchemaName']} already exists, skipping.")
+        log(f"    Column {col_def['SchemaName']} already exists, skipping.")
         return True
 
     result = dv_request("POST", f"EntityDefinitions(LogicalName='{table_lower}')/Attributes", col_def)
     if result and result.get("_error"):
-        print(f"    FAILED column {col_def['SchemaName']}: {result['_message']}")
+        log(f"    FAILED column {col_def['SchemaName']}: {result['_message']}", failed=True)
         return False
+    env().metadata.record_attribute(table_lower, col_lower)
     col_type = col_def.get("@odata.type", "").split(".")[-1].replace("AttributeMetadata", "")
-    print(f"    + Column: {col_def['SchemaName']} ({col_type})")
+    log(f"    + Column: {col_def['SchemaName']} ({col_type})", changed=True)
     return True
 
 
@@ -182,6 +198,16 @@ def memo_col(schema_name, display_name, max_length=100000):
     }
 
 
+def file_col(schema_name, display_name, max_size_kb=DEFAULT_FILE_SIZE_KB):
+    return {
+        "@odata.type": "Microsoft.Dynamics.CRM.FileAttributeMetadata",
+        "SchemaName": schema_name,
+        "MaxSizeInKB": max_size_kb,
+        "RequiredLevel": {"Value": "None"},
+        "DisplayName": label(display_name),
+    }
+
+
 def bool_col(schema_name, display_name, default=True):
     return {
         "@odata.type": "Microsoft.Dynamics.CRM.BooleanAttributeMetadata",
@@ -222,12 +248,12 @@ def choice_col(schema_name, display_name, options):
     }
 
 
-def date_col(schema_name, display_name):
+def date_col(schema_name, display_name, date_format="DateOnly"):
     return {
         "@odata.type": "Microsoft.Dynamics.CRM.DateTimeAttributeMetadata",
         "SchemaName": schema_name,
         "RequiredLevel": {"Value": "None"},
-        "Format": "DateOnly",
+        "Format": date_format,
         "DisplayName": label(display_name),
     }
 
@@ -237,7 +263,7 @@ def add_lookup(from_table, lookup_schema, display_name, to_table, required=False
     lookup_lower = lookup_schema.lower()
 
     if column_exists(from_lower, lookup_lower):
-        print(f"    Lookup {lookup_schema} already exists, skipping.")
+        log(f"    Lookup {lookup_schema} already exists, skipping.")
         return True
 
     rel_schema = f"{from_lower}_{lookup_lower}"
@@ -258,16 +284,117 @@ def add_lookup(from_table, lookup_schema, display_name, to_table, required=False
 
     result = dv_request("POST", "RelationshipDefinitions", relationship)
     if result and result.get("_error"):
-        print(f"    FAILED lookup {lookup_schema}: {result['_message']}")
+        log(f"    FAILED lookup {lookup_schema}: {result['_message']}", failed=True)
+        return False
+    env().metadata.record_attribute(from_lower, lookup_lower)
+    log(f"    + Lookup: {lookup_schema} -> {to_table}", changed=True)
+    return True
+
+
+def flag_changes(attr, flags):
+    """Names of the schema.json flags that differ from an attribute's current settings."""
+    changes = []
+    for flag, prop in FLAG_PROPERTIES.items():
+        current = attr.get(prop)
+        if isinstance(current, dict):  # BooleanManagedProperty (IsSortableEnabled)
+            current = current.get("Value")
+        if current != flags[flag]:
+            changes.append(flag)
+    return changes
+
+
+def apply_column_flags(table, column, flags):
+    """Bring a column's filter/sort/search settings in line with schema.json.
+
+    The metadata snapshot answers "already correct" without a request; the
+    full attribute is only fetched when it has to be PUT back.
+    Returns True if the column was updated (and its table needs publishing).
+    """
+    cached = env().metadata.attribute(table, column)
+    if cached is None:
+        log(f"    Column {column} not found, skipping flags.")
+        return False
+    if all(prop in cached for prop in FLAG_PROPERTIES.values()) and not flag_changes(cached, flags):
+        return False
+
+    path = f"EntityDefinitions(LogicalName='{table}')/Attributes(LogicalName='{column}')"
+    attr = dv_get(path)
+    if not attr:
+        log(f"    Column {column} not found, skipping flags.")
+        return False
+    changes = flag_changes(attr, flags)
+    if not changes:
+        cached.update({prop: attr.get(prop) for prop in FLAG_PROPERTIES.values()})
+        return False
+
+    for flag in changes:
+        prop = FLAG_PROPERTIES[flag]
+        if isinstance(attr.get(prop), dict):
+            attr[prop]["Value"] = flags[flag]
+        else:
+            attr[prop] = flags[flag]
+    attr.pop("@odata.context", None)
+    result = dv_request("PUT", path, attr, {"MSCRM.MergeLabels": "true"})
+    if result and result.get("_error"):
+        log(f"    FAILED flags on {column}: {result['_message']}", failed=True)
         return False
-    print(f"    + Lookup: {lookup_schema} -> {to_table}")
+    cached.update({prop: attr.get(prop) for prop in FLAG_PROPERTIES.values()})
+    log(f"    ~ {column}: {', '.join(f'{flag}={flags[flag]}' for flag in changes)}", changed=True)
     return True
 
 
+def add_alternate_key(table, key):
+    table_lower = table.lower()
+    if env().metadata.key(table_lower, key["name"]):
+        log(f"    Key {key['name']} already exists, skipping.")
+        return True
+
+    body = {
+        "SchemaName": key["name"],
+        "DisplayName": label(key["displayName"]),
+        "KeyAttributes": key["columns"],
+    }
+    result = dv_request("POST", f"EntityDefinitions(LogicalName='{table_lower}')/Keys", body)
+    if result and result.get("_error"):
+        log(f"    FAILED key {key['name']}: {result['_message']}", failed=True)
+        return False
+    env().metadata.record_key(table_lower, key["name"], {"EntityKeyIndexStatus": "Pending"})
+    log(f"    + Key: {key['name']} ({', '.join(key['columns'])})", changed=True)
+    return True
+
+
+def wait_for_key(table, key_name, timeout=1800):
+    """Poll the async index build behind an alternate key until it is Active."""
+    cached = env().metadata.key(table.lower(), key_name)
+    if cached and cached.get("EntityKeyIndexStatus") == "Active":
+        log(f"    Key {key_name} is Active")
+        return True
+
+    key_path = f"EntityDefinitions(LogicalName='{table.lower()}')/Keys(LogicalName='{key_name}')"
+    delay = 2
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        key = dv_get(f"{key_path}?$select=EntityKeyIndexStatus")
+        status = key.get("EntityKeyIndexStatus") if key else None
+        if status == "Active":
+            log(f"    Key {key_name} is Active")
+            return True
+        if status == "Failed":
+            log(f"    Key {key_name} index build FAILED (check for duplicate values)", failed=True)
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, 30)
+    log(f"    Timed out waiting for key {key_name} (last status: {status})", failed=True)
+    return False
+
+
 def add_to_solution(table_name):
-    entity_meta = dv_get(f"EntityDefinitions(LogicalName='{table_name}')?$select=MetadataId")
+    entity_meta = env().metadata.entity(table_name)
+    if not entity_meta or not entity_meta.get("MetadataId"):
+        # Created during this run, so not in the snapshot yet
+        entity_meta = dv_get(f"EntityDefinitions(LogicalName='{table_name}')?$select=MetadataId")
     if not entity_meta:
-        print(f"  Could not find MetadataId for {table_name}")
+        log(f"  Could not find MetadataId for {table_name}", failed=True)
         return False
 
     metadata_id = entity_meta["MetadataId"]
@@ -279,9 +406,9 @@ def add_to_solution(table_name):
     }
     result = dv_request("POST", "AddSolutionComponent", body)
     if result and result.get("_error"):
-        print(f"  Could not add {table_name}: {result['_message']}")
+        log(f"  Could not add {table_name}: {result['_message']}", failed=True)
         return False
-    print(f"  Added {table_name} to solution")
+    log(f"  Added {table_name} to solution")
     return True
 
 
@@ -289,27 +416,28 @@ def add_to_solution(table_name):
 # Main Execution
 # ═══════════════════════════════════════════════════════════════════════════
 
-def main():
-    print("Extracting Dataverse token from PAC CLI cache...")
-    print("Verifying Dataverse connection...")
+def provision():
+    """Run every provisioning phase against the current environment."""
+    log(f"Verifying Dataverse connection to {env().org_url}...")
     whoami = dv_get("WhoAmI")
     if not whoami:
-        print("ERROR: Failed to connect to Dataverse!", file=sys.stderr)
-        sys.exit(1)
-    print(f"Connected as: {whoami.get('UserId', 'unknown')}")
+        raise ProvisioningError("Failed to connect to Dataverse")
+    log(f"Connected as: {whoami.get('UserId', 'unknown')}")
+
+    was_full, changed = env().metadata.refresh(env().client)
+    log(f"Metadata snapshot: {'full read' if was_full else 'changes since last run'}, {changed} table(s) updated")
 
     # ── Phase 1: Create Solution ──────────────────────────────────────────
-    print("\n=== Phase 1: Ensuring SimQuip Solution ===")
+    log("\n=== Phase 1: Ensuring SimQuip Solution ===")
     solutions = dv_get(f"solutions?$filter=uniquename eq '{SOLUTION_NAME}'&$select=solutionid")
     if solutions and solutions.get("value"):
-        print(f"Solution '{SOLUTION_NAME}' already exists.")
+        log(f"Solution '{SOLUTION_NAME}' already exists.")
     else:
         publishers = dv_get(f"publishers?$filter=customizationprefix eq '{PREFIX}'&$select=publisherid")
         if not publishers or not publishers.get("value"):
-            print("ERROR: Publisher with prefix 'redi' not found!", file=sys.stderr)
-            sys.exit(1)
+            raise ProvisioningError(f"Publisher with prefix '{PREFIX}' not found")
         publisher_id = publishers["value"][0]["publisherid"]
-        print(f"Found publisher: {publisher_id}")
+        log(f"Found publisher: {publisher_id}")
 
         result = dv_request("POST", "solutions", {
             "uniquename": SOLUTION_NAME,
@@ -319,48 +447,58 @@ def main():
             "publisherid@odata.bind": f"/publishers({publisher_id})",
         })
         if result and result.get("_error"):
-            print(f"Solution creation: {result['_message']}")
+            log(f"Solution creation: {result['_message']}", failed=True)
         else:
-            print(f"Created solution: {SOLUTION_NAME}")
+            log(f"Created solution: {SOLUTION_NAME}", changed=True)
 
     # ── Phase 2: Tier 1 Tables (no foreign keys) ─────────────────────────
-    print("\n=== Phase 2: Creating Tier 1 Tables ===")
+    log("\n=== Phase 2: Creating Tier 1 Tables ===")
 
-    print("Creating redi_building...")
+    log("Creating redi_building...")
     create_table(f"{PREFIX}_building", "Building", "Buildings",
                  "Physical buildings containing simulation spaces")
     add_column(f"{PREFIX}_building", string_col(f"{PREFIX}_code", "Building Code", 20, required=True))
 
-    print("\nAdding missing columns to existing redi_person...")
+    log("Creating redi_dashboardmetric...")
+    create_table(f"{PREFIX}_dashboardmetric", "Dashboard Metric", "Dashboard Metrics",
+                 "Precomputed dashboard figures, refreshed by dashboard-summary.py")
+    add_column(f"{PREFIX}_dashboardmetric", string_col(f"{PREFIX}_metrickey", "Metric Key", 100, required=True))
+    add_column(f"{PREFIX}_dashboardmetric", int_col(f"{PREFIX}_total", "Total"))
+    add_column(f"{PREFIX}_dashboardmetric", memo_col(f"{PREFIX}_payloadjson", "Payload JSON", 100000))
+    add_column(f"{PREFIX}_dashboardmetric", date_col(f"{PREFIX}_computedon", "Computed On", "DateAndTime"))
+
+    log("\nAdding missing columns to existing redi_person...")
     add_column(f"{PREFIX}_person", string_col(f"{PREFIX}_phone", "Phone", 50))
     add_column(f"{PREFIX}_person", bool_col(f"{PREFIX}_active", "Active", default=True))
 
     # ── Phase 3: Tier 2 Tables ────────────────────────────────────────────
-    print("\n=== Phase 3: Creating Tier 2 Tables ===")
+    log("\n=== Phase 3: Creating Tier 2 Tables ===")
 
-    print("Creating redi_team...")
+    log("Creating redi_team...")
     create_table(f"{PREFIX}_team", "Team", "Teams",
                  "Organisational teams that own and manage equipment")
     add_column(f"{PREFIX}_team", string_col(f"{PREFIX}_teamcode", "Team Code", 20, required=True))
     add_column(f"{PREFIX}_team", bool_col(f"{PREFIX}_active", "Active", default=True))
     add_lookup(f"{PREFIX}_team", f"{PREFIX}_maincontactpersonid", "Main Contact", f"{PREFIX}_person")
 
-    print("\nCreating redi_level...")
+    log("\nCreating redi_level...")
     create_table(f"{PREFIX}_level", "Level", "Levels",
                  "Floor levels within buildings")
     add_column(f"{PREFIX}_level", int_col(f"{PREFIX}_sortorder", "Sort Order"))
     add_lookup(f"{PREFIX}_level", f"{PREFIX}_buildingid", "Building", f"{PREFIX}_building", required=True)
 
     # ── Phase 4: Tier 3 Tables ────────────────────────────────────────────
-    print("\n=== Phase 4: Creating Tier 3 Tables ===")
+    log("\n=== Phase 4: Creating Tier 3 Tables ===")
 
-    print("Adding columns/lookups to existing redi_location...")
+    log("Adding columns/lookups to existing redi_location...")
     add_column(f"{PREFIX}_location", memo_col(f"{PREFIX}_sq_description", "Description", 5000))
     add_lookup(f"{PREFIX}_location", f"{PREFIX}_sq_buildingid", "Building", f"{PREFIX}_building")
     add_lookup(f"{PREFIX}_location", f"{PREFIX}_sq_levelid", "Level", f"{PREFIX}_level")
+    add_column(f"{PREFIX}_location", string_col(f"{PREFIX}_sq_locationpath", "Location Path", 1000))
+    add_column(f"{PREFIX}_location", string_col(f"{PREFIX}_sq_locationsortkey", "Location Sort Key", 400))
     add_lookup(f"{PREFIX}_location", f"{PREFIX}_contactpersonid", "Contact Person", f"{PREFIX}_person")
 
-    print("\nCreating redi_teammember...")
+    log("\nCreating redi_teammember...")
     create_table(f"{PREFIX}_teammember", "Team Member", "Team Members",
                  "Association between people and teams with role")
     add_column(f"{PREFIX}_teammember", string_col(f"{PREFIX}_role", "Role", 200))
@@ -368,7 +506,7 @@ def main():
     add_lookup(f"{PREFIX}_teammember", f"{PREFIX}_personid", "Person", f"{PREFIX}_person", required=True)
 
     # ── Phase 5: Equipment columns ────────────────────────────────────────
-    print("\n=== Phase 5: Adding SimQuip columns to existing redi_equipment ===")
+    log("\n=== Phase 5: Adding SimQuip columns to existing redi_equipment ===")
 
     add_column(f"{PREFIX}_equipment", string_col(f"{PREFIX}_equipmentcode", "Equipment Code", 50, required=True))
     add_column(f"{PREFIX}_equipment", memo_col(f"{PREFIX}_sq_description", "Description", 10000))
@@ -380,18 +518,32 @@ def main():
     ]))
     add_column(f"{PREFIX}_equipment", bool_col(f"{PREFIX}_sq_active", "Active", default=True))
     add_column(f"{PREFIX}_equipment", string_col(f"{PREFIX}_keyimageurl", "Key Image URL", 2000))
+    add_column(f"{PREFIX}_equipment", string_col(f"{PREFIX}_sq_keythumbnailurl", "Key Image Thumbnail URL", 400))
     add_column(f"{PREFIX}_equipment", memo_col(f"{PREFIX}_contentslistjson", "Contents List JSON", 100000))
     add_column(f"{PREFIX}_equipment", memo_col(f"{PREFIX}_quickstartflowchartjson", "Quick Start Flowchart JSON", 100000))
+    add_column(f"{PREFIX}_equipment", string_col(f"{PREFIX}_sq_hierarchypath", "Kit Hierarchy Path", 300))
+    add_column(f"{PREFIX}_equipment", int_col(f"{PREFIX}_sq_hierarchydepth", "Kit Hierarchy Depth"))
     add_lookup(f"{PREFIX}_equipment", f"{PREFIX}_ownerteamid", "Owner Team", f"{PREFIX}_team")
     add_lookup(f"{PREFIX}_equipment", f"{PREFIX}_ownerpersonid", "Owner Person", f"{PREFIX}_person")
     add_lookup(f"{PREFIX}_equipment", f"{PREFIX}_sq_contactpersonid", "Contact Person", f"{PREFIX}_person")
     add_lookup(f"{PREFIX}_equipment", f"{PREFIX}_sq_homelocationid", "Home Location", f"{PREFIX}_location")
     add_lookup(f"{PREFIX}_equipment", f"{PREFIX}_parentequipmentid", "Parent Equipment", f"{PREFIX}_equipment")
+    add_lookup(f"{PREFIX}_equipment", f"{PREFIX}_sq_rootequipmentid", "Root Kit", f"{PREFIX}_equipment")
 
     # ── Phase 6: Leaf Entity Tables ───────────────────────────────────────
-    print("\n=== Phase 6: Creating Leaf Entity Tables ===")
-
-    print("Creating redi_equipmentmedia...")
+    log("\n=== Phase 6: Creating Leaf Entity Tables ===")
+
+    log("Creating redi_mediablob...")
+    create_table(f"{PREFIX}_mediablob", "Media Blob", "Media Blobs",
+                 "Unique image content, stored once per content hash, with its thumbnail and preview")
+    add_column(f"{PREFIX}_mediablob", string_col(f"{PREFIX}_contenthash", "Content Hash", 64, required=True))
+    add_column(f"{PREFIX}_mediablob", string_col(f"{PREFIX}_mimetype", "MIME Type", 200))
+    add_column(f"{PREFIX}_mediablob", int_col(f"{PREFIX}_width", "Width"))
+    add_column(f"{PREFIX}_mediablob", int_col(f"{PREFIX}_height", "Height"))
+    add_column(f"{PREFIX}_mediablob", file_col(f"{PREFIX}_thumbnail", "Thumbnail", 1024))
+    add_column(f"{PREFIX}_mediablob", file_col(f"{PREFIX}_preview", "Preview", 4096))
+
+    log("\nCreating redi_equipmentmedia...")
     create_table(f"{PREFIX}_equipmentmedia", "Equipment Media", "Equipment Media",
                  "Images, documents, and attachments for equipment")
     add_column(f"{PREFIX}_equipmentmedia", choice_col(f"{PREFIX}_mediatype", "Media Type", [
@@ -400,10 +552,23 @@ def main():
     add_column(f"{PREFIX}_equipmentmedia", string_col(f"{PREFIX}_filename", "File Name", 500))
     add_column(f"{PREFIX}_equipmentmedia", string_col(f"{PREFIX}_mimetype", "MIME Type", 200))
     add_column(f"{PREFIX}_equipmentmedia", string_col(f"{PREFIX}_fileurl", "File URL", 2000))
+    add_column(f"{PREFIX}_equipmentmedia", file_col(f"{PREFIX}_file", "File"))
+    add_column(f"{PREFIX}_equipmentmedia", string_col(f"{PREFIX}_thumbnailurl", "Thumbnail URL", 400))
+    add_column(f"{PREFIX}_equipmentmedia", string_col(f"{PREFIX}_previewurl", "Preview URL", 400))
     add_column(f"{PREFIX}_equipmentmedia", int_col(f"{PREFIX}_sortorder", "Sort Order"))
     add_lookup(f"{PREFIX}_equipmentmedia", f"{PREFIX}_equipmentid", "Equipment", f"{PREFIX}_equipment", required=True)
-
-    print("\nCreating redi_locationmedia...")
+    add_lookup(f"{PREFIX}_equipmentmedia", f"{PREFIX}_mediablobid", "Media Blob", f"{PREFIX}_mediablob")
+
+    log("\nCreating redi_equipmentcontent...")
+    create_table(f"{PREFIX}_equipmentcontent", "Equipment Content", "Equipment Contents",
+                 "Items in an equipment kit's contents checklist")
+    add_column(f"{PREFIX}_equipmentcontent", string_col(f"{PREFIX}_itemkey", "Item Key", 100, required=True))
+    add_column(f"{PREFIX}_equipmentcontent", bool_col(f"{PREFIX}_checked", "Checked", default=False))
+    add_column(f"{PREFIX}_equipmentcontent", date_col(f"{PREFIX}_lastchecked", "Last Checked", "DateAndTime"))
+    add_column(f"{PREFIX}_equipmentcontent", int_col(f"{PREFIX}_sortorder", "Sort Order"))
+    add_lookup(f"{PREFIX}_equipmentcontent", f"{PREFIX}_equipmentid", "Equipment", f"{PREFIX}_equipment", required=True)
+
+    log("\nCreating redi_locationmedia...")
     create_table(f"{PREFIX}_locationmedia", "Location Media", "Location Media",
                  "Images and attachments for locations")
     add_column(f"{PREFIX}_locationmedia", choice_col(f"{PREFIX}_mediatype", "Media Type", [
@@ -412,10 +577,14 @@ def main():
     add_column(f"{PREFIX}_locationmedia", string_col(f"{PREFIX}_filename", "File Name", 500))
     add_column(f"{PREFIX}_locationmedia", string_col(f"{PREFIX}_mimetype", "MIME Type", 200))
     add_column(f"{PREFIX}_locationmedia", string_col(f"{PREFIX}_fileurl", "File URL", 2000))
+    add_column(f"{PREFIX}_locationmedia", file_col(f"{PREFIX}_file", "File"))
+    add_column(f"{PREFIX}_locationmedia", string_col(f"{PREFIX}_thumbnailurl", "Thumbnail URL", 400))
+    add_column(f"{PREFIX}_locationmedia", string_col(f"{PREFIX}_previewurl", "Preview URL", 400))
     add_column(f"{PREFIX}_locationmedia", int_col(f"{PREFIX}_sortorder", "Sort Order"))
     add_lookup(f"{PREFIX}_locationmedia", f"{PREFIX}_locationid", "Location", f"{PREFIX}_location", required=True)
+    add_lookup(f"{PREFIX}_locationmedia", f"{PREFIX}_mediablobid", "Media Blob", f"{PREFIX}_mediablob")
 
-    print("\nCreating redi_loantransfer...")
+    log("\nCreating redi_loantransfer...")
     create_table(f"{PREFIX}_loantransfer", "Loan Transfer", "Loan Transfers",
                  "Equipment loan and transfer records")
     add_column(f"{PREFIX}_loantransfer", date_col(f"{PREFIX}_startdate", "Start Date"))
@@ -434,31 +603,104 @@ def main():
     add_lookup(f"{PREFIX}_loantransfer", f"{PREFIX}_approverpersonid", "Approver", f"{PREFIX}_person")
 
     # ── Phase 7: Circular Reference Fixups ────────────────────────────────
-    print("\n=== Phase 7: Circular Reference Fixups ===")
+    log("\n=== Phase 7: Circular Reference Fixups ===")
 
-    print("Adding Person -> Team lookup...")
+    log("Adding Person -> Team lookup...")
     add_lookup(f"{PREFIX}_person", f"{PREFIX}_teamid", "Team", f"{PREFIX}_team")
 
-    print("Adding Team -> Location lookup...")
+    log("Adding Team -> Location lookup...")
     add_lookup(f"{PREFIX}_team", f"{PREFIX}_mainlocationid", "Main Location", f"{PREFIX}_location")
 
-    # ── Phase 8: Add Tables to Solution ───────────────────────────────────
-    print("\n=== Phase 8: Adding Tables to SimQuip Solution ===")
+    # ── Phase 8: Column Filter/Sort/Search Flags ─────────────────────────
+    log("\n=== Phase 8: Applying Column Filter/Sort/Search Flags ===")
+
+    changed_tables = []
+    schema = load_schema()
+    shared_tables = {t["logicalName"] for t in schema.get("sharedTables", [])}
+    for table in all_tables(schema):
+        table_name = table["logicalName"]
+        log(f"Checking {table_name}...")
+        primary = {"logicalName": primary_name_column(table), "type": "String"}
+        columns = [(primary, True)] + [(col, False) for col in table["columns"]]
+        if table_name in shared_tables:
+            # Other REdI apps own the rest of a shared table; leave their columns as they are
+            columns = [(col, is_primary) for col, is_primary in columns if manages_column_flags(col)]
+        updated = False
+        for col, is_primary in columns:
+            if apply_column_flags(table_name, col["logicalName"], column_flags(col, is_primary)):
+                updated = True
+        if updated:
+            changed_tables.append(table_name)
+
+    if changed_tables:
+        entities = "".join(f"<entity>{name}</entity>" for name in changed_tables)
+        dv_request("POST", "PublishXml", {
+            "ParameterXml": f"<importexportxml><entities>{entities}</entities></importexportxml>",
+        })
+        log(f"Published {len(changed_tables)} table(s)")
+
+    # ── Phase 9: Alternate Keys ───────────────────────────────────────────
+    log("\n=== Phase 9: Creating Alternate Keys ===")
+
+    # Only SimQuip-created tables: a key on a shared table would put a unique index on other apps' columns
+    pending_keys = []
+    for table in load_schema()["tables"]:
+        for key in table.get("alternateKeys", []):
+            log(f"Adding key to {table['logicalName']}...")
+            if add_alternate_key(table["logicalName"], key):
+                pending_keys.append((table["logicalName"], key["name"]))
+
+    # Keys are created immediately but their unique indexes build asynchronously
+    for table_name, key_name in pending_keys:
+        wait_for_key(table_name, key_name)
+
+    # ── Phase 10: Add Tables to Solution ──────────────────────────────────
+    log("\n=== Phase 10: Adding Tables to SimQuip Solution ===")
 
     tables = [
         f"{PREFIX}_building", f"{PREFIX}_person", f"{PREFIX}_team",
         f"{PREFIX}_level", f"{PREFIX}_location", f"{PREFIX}_teammember",
-        f"{PREFIX}_equipment", f"{PREFIX}_equipmentmedia",
-        f"{PREFIX}_locationmedia", f"{PREFIX}_loantransfer",
+        f"{PREFIX}_equipment", f"{PREFIX}_mediablob", f"{PREFIX}_equipmentmedia", f"{PREFIX}_equipmentcontent",
+        f"{PREFIX}_locationmedia", f"{PREFIX}_loantransfer", f"{PREFIX}_dashboardmetric",
     ]
 
     for t in tables:
         add_to_solution(t)
 
-    # ── Done ──────────────────────────────────────────────────────────────
+
+def run_environment(environment):
+    _current.env = environment
+    started = time.monotonic()
+    try:
+        provision()
+    except (ProvisioningError, DataverseError, OSError) as e:
+        environment.error = str(e)
+        log(f"ERROR: {e}")
+    except Exception as e:
+        # Anything else is a bug; keep the traceback so the other environments still report
+        environment.error = traceback.format_exc().rstrip()
+        log(f"ERROR: unexpected {type(e).__name__}: {e}")
+    finally:
+        environment.elapsed = time.monotonic() - started
+
+
+def print_report(environments, elapsed):
     print()
     print("=" * 60)
-    print("  SimQuip Dataverse schema provisioning complete!")
+    print("  SimQuip Dataverse schema provisioning report")
+    print()
+    for environment in environments:
+        status = "ERROR" if environment.error else "FAILED" if environment.failures else "OK"
+        print(f"  {environment.name:<32} {status:<7} {environment.changes:>4} changes  "
+              f"{len(environment.failures):>3} failures  {environment.elapsed:6.1f}s")
+        if environment.error:
+            for line in environment.error.splitlines():
+                print(f"      {line}")
+        for failure in environment.failures[:10]:
+            print(f"      {failure}")
+        if len(environment.failures) > 10:
+            print(f"      ... and {len(environment.failures) - 10} more")
+    print(f"  Total time: {elapsed:.1f}s")
     print()
     print("  Next steps:")
     print("  1. Register data sources: pac code add-data-source")
@@ -466,5 +708,40 @@ def main():
     print("=" * 60)
 
 
+def main():
+    global _prefix_output
+    parser = argparse.ArgumentParser(description="Provision SimQuip tables in one or more Dataverse environments.")
+    parser.add_argument("--org-url", action="append",
+                        help="Environment URL; repeat to provision several concurrently "
+                             "(default: comma-separated $ORG_URL, else the REdI org)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"Requests per second per environment, shared with other tools "
+                             f"(default {DEFAULT_RATE:g})")
+    parser.add_argument("--metadata-cache", type=Path, default=METADATA_CACHE_DIR,
+                        help="Directory for per-environment metadata snapshots (default dataverse/.metadata-cache)")
+    parser.add_argument("--full-metadata", action="store_true",
+                        help="Ignore saved snapshots and read all metadata again")
+    args = parser.parse_args()
+
+    org_urls = args.org_url or [url for url in os.environ.get("ORG_URL", DEFAULT_ORG_URL).split(",") if url.strip()]
+    org_urls = list(dict.fromkeys(url.strip().rstrip("/") for url in org_urls))
+
+    # Tokens are read up front so a missing login stops the run before any org is touched
+    print("Extracting Dataverse tokens from PAC CLI cache...")
+    environments = [Environment(url, args.rate, args.metadata_cache) for url in org_urls]
+    if args.full_metadata:
+        for environment in environments:
+            environment.metadata.version_stamp = None
+    _prefix_output = len(environments) > 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(environments)) as executor:
+        list(executor.map(run_environment, environments))
+
+    print_report(environments, time.monotonic() - started)
+    if any(e.error or e.failures for e in environments):
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
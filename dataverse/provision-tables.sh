@@ -210,6 +210,38 @@ ENDJSON
   fi
 }
 
+add_file_column() {
+  local TABLE="$1"
+  local SCHEMA_NAME="$2"
+  local DISPLAY_NAME="$3"
+  local MAX_SIZE_KB="${4:-32768}"
+  local TABLE_LOWER=$(echo "$TABLE" | tr '[:upper:]' '[:lower:]')
+  local COL_LOWER=$(echo "$SCHEMA_NAME" | tr '[:upper:]' '[:lower:]')
+
+  if column_exists "$TABLE_LOWER" "$COL_LOWER"; then
+    echo "    Column $SCHEMA_NAME already exists, skipping."
+    return 0
+  fi
+
+  local BODY=$(cat <<ENDJSON
+{
+  "@odata.type": "Microsoft.Dynamics.CRM.FileAttributeMetadata",
+  "SchemaName": "$SCHEMA_NAME",
+  "MaxSizeInKB": $MAX_SIZE_KB,
+  "RequiredLevel": {"Value": "None"},
+  "DisplayName": $(label_json "$DISPLAY_NAME")
+}
+ENDJSON
+)
+
+  local STATUS=$(dv_request_status "POST" "EntityDefinitions(LogicalName='$TABLE_LOWER')/Attributes" "$BODY")
+  if [ "$STATUS" = "204" ] || [ "$STATUS" = "200" ]; then
+    echo "    + Column: $SCHEMA_NAME (File)"
+  else
+    echo "    FAILED column $SCHEMA_NAME (HTTP $STATUS)"
+  fi
+}
+
 add_bool_column() {
   local TABLE="$1"
   local SCHEMA_NAME="$2"
@@ -319,6 +351,7 @@ add_date_column() {
   local TABLE="$1"
   local SCHEMA_NAME="$2"
   local DISPLAY_NAME="$3"
+  local FORMAT="${4:-DateOnly}"
   local TABLE_LOWER=$(echo "$TABLE" | tr '[:upper:]' '[:lower:]')
   local COL_LOWER=$(echo "$SCHEMA_NAME" | tr '[:upper:]' '[:lower:]')
 
@@ -332,7 +365,7 @@ add_date_column() {
   "@odata.type": "Microsoft.Dynamics.CRM.DateTimeAttributeMetadata",
   "SchemaName": "$SCHEMA_NAME",
   "RequiredLevel": {"Value": "None"},
-  "Format": "DateOnly",
+  "Format": "$FORMAT",
   "DisplayName": $(label_json "$DISPLAY_NAME")
 }
 ENDJSON
@@ -481,6 +514,13 @@ echo "Creating ${PREFIX}_building..."
 create_table "${PREFIX}_building" "Building" "Buildings" "Physical buildings containing simulation spaces"
 add_string_column "${PREFIX}_building" "${PREFIX}_code" "Building Code" 20 "ApplicationRequired"
 
+echo "Creating ${PREFIX}_dashboardmetric..."
+create_table "${PREFIX}_dashboardmetric" "Dashboard Metric" "Dashboard Metrics" "Precomputed dashboard figures, refreshed by dashboard-summary.py"
+add_string_column "${PREFIX}_dashboardmetric" "${PREFIX}_metrickey" "Metric Key" 100 "ApplicationRequired"
+add_int_column "${PREFIX}_dashboardmetric" "${PREFIX}_total" "Total"
+add_memo_column "${PREFIX}_dashboardmetric" "${PREFIX}_payloadjson" "Payload JSON" 100000
+add_date_column "${PREFIX}_dashboardmetric" "${PREFIX}_computedon" "Computed On" "DateAndTime"
+
 echo ""
 echo "Adding missing columns to existing ${PREFIX}_person..."
 add_string_column "${PREFIX}_person" "${PREFIX}_phone" "Phone" 50
@@ -516,6 +556,8 @@ echo "Adding missing columns/lookups to existing ${PREFIX}_location..."
 add_memo_column "${PREFIX}_location" "${PREFIX}_description" "Description" 5000
 add_lookup "${PREFIX}_location" "${PREFIX}_sq_buildingid" "Building" "${PREFIX}_building"
 add_lookup "${PREFIX}_location" "${PREFIX}_sq_levelid" "Level" "${PREFIX}_level"
+add_string_column "${PREFIX}_location" "${PREFIX}_sq_locationpath" "Location Path" 1000
+add_string_column "${PREFIX}_location" "${PREFIX}_sq_locationsortkey" "Location Sort Key" 400
 add_lookup "${PREFIX}_location" "${PREFIX}_contactpersonid" "Contact Person" "${PREFIX}_person"
 
 echo ""
@@ -538,13 +580,17 @@ add_choice_column "${PREFIX}_equipment" "${PREFIX}_sq_ownertype" "Owner Type" "$
 add_choice_column "${PREFIX}_equipment" "${PREFIX}_sq_status" "Equipment Status" "$EQUIPMENT_STATUS_OPTIONS"
 add_bool_column "${PREFIX}_equipment" "${PREFIX}_sq_active" "Active" true
 add_string_column "${PREFIX}_equipment" "${PREFIX}_keyimageurl" "Key Image URL" 2000
+add_string_column "${PREFIX}_equipment" "${PREFIX}_sq_keythumbnailurl" "Key Image Thumbnail URL" 400
 add_memo_column "${PREFIX}_equipment" "${PREFIX}_contentslistjson" "Contents List JSON" 100000
 add_memo_column "${PREFIX}_equipment" "${PREFIX}_quickstartflowchartjson" "Quick Start Flowchart JSON" 100000
+add_string_column "${PREFIX}_equipment" "${PREFIX}_sq_hierarchypath" "Kit Hierarchy Path" 300
+add_int_column "${PREFIX}_equipment" "${PREFIX}_sq_hierarchydepth" "Kit Hierarchy Depth"
 add_lookup "${PREFIX}_equipment" "${PREFIX}_ownerteamid" "Owner Team" "${PREFIX}_team"
 add_lookup "${PREFIX}_equipment" "${PREFIX}_ownerpersonid" "Owner Person" "${PREFIX}_person"
 add_lookup "${PREFIX}_equipment" "${PREFIX}_sq_contactpersonid" "Contact Person" "${PREFIX}_person"
 add_lookup "${PREFIX}_equipment" "${PREFIX}_sq_homelocationid" "Home Location" "${PREFIX}_location"
 add_lookup "${PREFIX}_equipment" "${PREFIX}_parentequipmentid" "Parent Equipment" "${PREFIX}_equipment"
+add_lookup "${PREFIX}_equipment" "${PREFIX}_sq_rootequipmentid" "Root Kit" "${PREFIX}_equipment"
 
 # ═══════════════════════════════════════════════════════════════════════════
 # Phase 6: Create Leaf Entity Tables
@@ -553,14 +599,37 @@ add_lookup "${PREFIX}_equipment" "${PREFIX}_parentequipmentid" "Parent Equipment
 echo ""
 echo "=== Phase 6: Creating Leaf Entity Tables ==="
 
+echo "Creating ${PREFIX}_mediablob..."
+create_table "${PREFIX}_mediablob" "Media Blob" "Media Blobs" "Unique image content, stored once per content hash, with its thumbnail and preview"
+add_string_column "${PREFIX}_mediablob" "${PREFIX}_contenthash" "Content Hash" 64 "ApplicationRequired"
+add_string_column "${PREFIX}_mediablob" "${PREFIX}_mimetype" "MIME Type" 200
+add_int_column "${PREFIX}_mediablob" "${PREFIX}_width" "Width"
+add_int_column "${PREFIX}_mediablob" "${PREFIX}_height" "Height"
+add_file_column "${PREFIX}_mediablob" "${PREFIX}_thumbnail" "Thumbnail" 1024
+add_file_column "${PREFIX}_mediablob" "${PREFIX}_preview" "Preview" 4096
+
+echo ""
 echo "Creating ${PREFIX}_equipmentmedia..."
 create_table "${PREFIX}_equipmentmedia" "Equipment Media" "Equipment Media" "Images, documents, and attachments for equipment"
 add_choice_column "${PREFIX}_equipmentmedia" "${PREFIX}_mediatype" "Media Type" "$MEDIA_TYPE_OPTIONS"
 add_string_column "${PREFIX}_equipmentmedia" "${PREFIX}_filename" "File Name" 500
 add_string_column "${PREFIX}_equipmentmedia" "${PREFIX}_mimetype" "MIME Type" 200
 add_string_column "${PREFIX}_equipmentmedia" "${PREFIX}_fileurl" "File URL" 2000
+add_file_column "${PREFIX}_equipmentmedia" "${PREFIX}_file" "File" 32768
+add_string_column "${PREFIX}_equipmentmedia" "${PREFIX}_thumbnailurl" "Thumbnail URL" 400
+add_string_column "${PREFIX}_equipmentmedia" "${PREFIX}_previewurl" "Preview URL" 400
 add_int_column "${PREFIX}_equipmentmedia" "${PREFIX}_sortorder" "Sort Order"
 add_lookup "${PREFIX}_equipmentmedia" "${PREFIX}_equipmentid" "Equipment" "${PREFIX}_equipment" "ApplicationRequired"
+add_lookup "${PREFIX}_equipmentmedia" "${PREFIX}_mediablobid" "Media Blob" "${PREFIX}_mediablob"
+
+echo ""
+echo "Creating ${PREFIX}_equipmentcontent..."
+create_table "${PREFIX}_equipmentcontent" "Equipment Content" "Equipment Contents" "Items in an equipment kit's contents checklist"
+add_string_column "${PREFIX}_equipmentcontent" "${PREFIX}_itemkey" "Item Key" 100 "ApplicationRequired"
+add_bool_column "${PREFIX}_equipmentcontent" "${PREFIX}_checked" "Checked" false
+add_date_column "${PREFIX}_equipmentcontent" "${PREFIX}_lastchecked" "Last Checked" "DateAndTime"
+add_int_column "${PREFIX}_equipmentcontent" "${PREFIX}_sortorder" "Sort Order"
+add_lookup "${PREFIX}_equipmentcontent" "${PREFIX}_equipmentid" "Equipment" "${PREFIX}_equipment" "ApplicationRequired"
 
 echo ""
 echo "Creating ${PREFIX}_locationmedia..."
@@ -569,8 +638,12 @@ add_choice_column "${PREFIX}_locationmedia" "${PREFIX}_mediatype" "Media Type" "
 add_string_column "${PREFIX}_locationmedia" "${PREFIX}_filename" "File Name" 500
 add_string_column "${PREFIX}_locationmedia" "${PREFIX}_mimetype" "MIME Type" 200
 add_string_column "${PREFIX}_locationmedia" "${PREFIX}_fileurl" "File URL" 2000
+add_file_column "${PREFIX}_locationmedia" "${PREFIX}_file" "File" 32768
+add_string_column "${PREFIX}_locationmedia" "${PREFIX}_thumbnailurl" "Thumbnail URL" 400
+add_string_column "${PREFIX}_locationmedia" "${PREFIX}_previewurl" "Preview URL" 400
 add_int_column "${PREFIX}_locationmedia" "${PREFIX}_sortorder" "Sort Order"
 add_lookup "${PREFIX}_locationmedia" "${PREFIX}_locationid" "Location" "${PREFIX}_location" "ApplicationRequired"
+add_lookup "${PREFIX}_locationmedia" "${PREFIX}_mediablobid" "Media Blob" "${PREFIX}_mediablob"
 
 echo ""
 echo "Creating ${PREFIX}_loantransfer..."
@@ -615,7 +688,8 @@ SOLUTION_EXISTS=$(echo "$SOLUTION_INFO" | python3 -c "import json,sys; print(len
 if [ "$SOLUTION_EXISTS" -gt "0" ]; then
   for TABLE in ${PREFIX}_building ${PREFIX}_person ${PREFIX}_team ${PREFIX}_level \
                ${PREFIX}_location ${PREFIX}_teammember ${PREFIX}_equipment \
-               ${PREFIX}_equipmentmedia ${PREFIX}_locationmedia ${PREFIX}_loantransfer; do
+               ${PREFIX}_mediablob ${PREFIX}_equipmentmedia ${PREFIX}_equipmentcontent ${PREFIX}_locationmedia ${PREFIX}_loantransfer \
+               ${PREFIX}_dashboardmetric; do
 
     # Get entity MetadataId
     ENTITY_META=$(curl -sf -H "Authorization: Bearer $TOKEN" \
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""SimQuip schema drift detector for exported solutions.
+
+Compares an exported solution against schema.json so changes made directly
+in the shared REdI org show up before generate-solution.py is run. Accepts:
+
+- the exported ``.zip`` (``customizations.xml`` is streamed straight out of
+  the archive, without extracting it);
+- an extracted export folder containing ``customizations.xml``;
+- a ``pac solution unpack`` folder (``Entities/*/Entity.xml`` and
+  ``Other/Relationships/*.xml``).
+
+The XML is read with ``iterparse`` and every element is cleared and detached
+once it has been read, so memory stays flat even for shared solutions several
+hundred MB in size. Before parsing, top-level ``<Entity>`` blocks for tables
+that schema.json does not define are dropped at the byte level. The parser
+therefore only builds the SimQuip entities and the relationships, which
+keeps a large shared solution down to seconds. If that pre-filter ever
+produces invalid XML, the document is parsed again in full.
+
+Checked for every schema.json table: that the entity exists; attribute
+presence, type, max length, required level and filter/sort/search flags;
+choice option values and labels; alternate keys; and lookup relationships.
+Custom attributes and relationships on SimQuip-created tables that
+schema.json does not know about are reported as extras. On shared tables,
+only ``redi_sq_`` extras are reported.
+
+Usage:
+  python3 dataverse/solution-drift.py REDI_Shared_1_0_0_12.zip
+  python3 dataverse/solution-drift.py unpacked/ --json drift.json
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+import zipfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator
+from xml.etree.ElementTree import Element, ParseError, iterparse
+
+from dv_schema import SIMQUIP_COLUMN_PREFIX, all_tables, column_flags, load_schema, option_values, primary_name_column
+
+# schema.json column type -> customizations.xml <Type>
+XML_TYPES = {
+    "String": "nvarchar",
+    "Memo": "ntext",
+    "Integer": "int",
+    "Boolean": "bit",
+    "DateTime": "datetime",
+    "DateOnly": "datetime",
+    "Lookup": "lookup",
+    "Choice": "picklist",
+    "File": "file",
+}
+
+FLAG_ELEMENTS = {
+    "filterable": "IsFilterable",
+    "sortable": "IsSortableEnabled",
+    "searchable": "IsSearchable",
+    "retrievable": "IsRetrievable",
+}
+
+# Top-level entity blocks in customizations.xml, for the byte-level pre-filter
+ENTITY_OPEN = re.compile(rb"<Entity[\s>]")
+ENTITY_CLOSE = b"</Entity>"
+ENTITY_NAME = re.compile(rb'<entity\s+Name="([^"]+)"')
+READ_SIZE = 1 << 20
+
+
+@dataclass
+class ExportedAttribute:
+    logical_name: str
+    type: str
+    format: str
+    max_length: int | None
+    required_level: str
+    is_custom: bool
+    flags: dict[str, bool]
+    options: dict[int, str]
+
+
+@dataclass
+class ExportedEntity:
+    logical_name: str
+    attributes: dict[str, ExportedAttribute] = field(default_factory=dict)
+    keys: dict[str, list[str]] = field(default_factory=dict)
+
+
+@dataclass
+class ExportedRelationship:
+    name: str
+    referencing_entity: str
+    referenced_entity: str
+    referencing_attribute: str
+
+
+@dataclass
+class Drift:
+    table: str
+    kind: str
+    item: str
+    detail: str
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Streaming parse
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text(elem: Element, tag: str) -> str:
+    child = elem.find(tag)
+    return (child.text or "").strip() if child is not None else ""
+
+
+def _read_attribute(elem: Element) -> ExportedAttribute:
+    options = {}
+    for option in elem.iterfind("optionset/options/option"):
+        label = option.find("labels/label")
+        options[int(option.get("value", "0"))] = label.get("description", "") if label is not None else ""
+    max_length = _text(elem, "MaxLength")
+    return ExportedAttribute(
+        logical_name=(_text(elem, "LogicalName") or _text(elem, "Name")).lower(),
+        type=_text(elem, "Type").lower(),
+        format=_text(elem, "Format").lower(),
+        max_length=int(max_length) if max_length.isdigit() else None,
+        required_level=_text(elem, "RequiredLevel").lower(),
+        is_custom=_text(elem, "IsCustomField") == "1",
+        flags={flag: _text(elem, tag) == "1" for flag, tag in FLAG_ELEMENTS.items()},
+        options=options,
+    )
+
+
+def parse_stream(
+    stream: IO[bytes],
+    wanted: set[str],
+    entities: dict[str, ExportedEntity],
+    relationships: list[ExportedRelationship],
+) -> None:
+    """Stream one customizations/Entity/Relationships XML document into ``entities`` and ``relationships``.
+
+    Attributes, keys and relationships are read whole when they end (they
+    are small); everything else is cleared and removed from its parent as
+    soon as it ends, so the tree never holds more than the open path.
+    """
+    open_elements: list[Element] = []
+    open_tags: list[str] = []
+    unit_depth = 0  # >0 while inside an element that is read on its end
+    entity: ExportedEntity | None = None
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            parents = open_tags[-2:]
+            if tag == "entity" and parents[-1:] == ["EntityInfo"]:
+                name = (elem.get("Name") or "").lower()
+                entity = entities.setdefault(name, ExportedEntity(name)) if name in wanted else None
+            if _is_unit(tag, parents):
+                unit_depth += 1
+            open_elements.append(elem)
+            open_tags.append(tag)
+            continue
+
+        open_elements.pop()
+        open_tags.pop()
+        parents = open_tags[-2:]
+        if _is_unit(tag, parents):
+            unit_depth -= 1
+            if tag == "attribute" and entity is not None:
+                attr = _read_attribute(elem)
+                entity.attributes[attr.logical_name] = attr
+            elif tag == "EntityKey" and entity is not None:
+                columns = [(a.text or "").strip().lower() for a in elem.iterfind("EntityKeyAttributes/AttributeName")]
+                entity.keys[(_text(elem, "LogicalName") or _text(elem, "Name")).lower()] = columns
+            elif tag == "EntityRelationship" and elem.find("ReferencingEntityName") is not None:
+                relationships.append(ExportedRelationship(
+                    name=elem.get("Name", ""),
+                    referencing_entity=_text(elem, "ReferencingEntityName").lower(),
+                    referenced_entity=_text(elem, "ReferencedEntityName").lower(),
+                    referencing_attribute=_text(elem, "ReferencingAttributeName").lower(),
+                ))
+        elif tag == "entity" and parents[-1:] == ["EntityInfo"]:
+            entity = None
+        if unit_depth == 0:
+            elem.clear()
+            if open_elements:
+                open_elements[-1].remove(elem)
+
+
+def _is_unit(tag: str, parents: list[str]) -> bool:
+    return (
+        (tag == "attribute" and parents == ["entity", "attributes"])
+        or (tag == "EntityKey" and parents[-1:] == ["EntityKeys"])
+        or (tag == "EntityRelationship" and parents[-1:] == ["EntityRelationships"])
+    )
+
+
+def wanted_entity_chunks(stream: IO[bytes], wanted: set[str]) -> Iterator[bytes]:
+    """Yield the document's bytes without the top-level ``<Entity>`` blocks of unwanted tables."""
+    buf = b""
+    state = "outside"  # outside | head (block started, name not seen yet) | keep | skip
+    eof = False
+    while True:
+        data = stream.read(READ_SIZE)
+        eof = not data
+        buf += data
+        while True:
+            if state == "outside":
+                match = ENTITY_OPEN.search(buf)
+                if match is None:
+                    cut = len(buf) if eof else max(0, len(buf) - 8)  # keep a partial "<Entity"
+                    if cut:
+                        yield buf[:cut]
+                        buf = buf[cut:]
+                    break
+                if match.start():
+                    yield buf[:match.start()]
+                    buf = buf[match.start():]
+                state = "head"
+            elif state == "head":
+                name = ENTITY_NAME.search(buf)
+                close = buf.find(ENTITY_CLOSE)
+                if name and (close < 0 or name.start() < close):
+                    state = "keep" if name.group(1).decode().lower() in wanted else "skip"
+                elif close >= 0 or eof:
+                    state = "keep"  # no name to go by; let the parser see it
+                else:
+                    break
+            else:
+                close = buf.find(ENTITY_CLOSE)
+                if close < 0:
+                    cut = len(buf) if eof else max(0, len(buf) - len(ENTITY_CLOSE) + 1)
+                    if state == "keep" and cut:
+                        yield buf[:cut]
+                    buf = buf[cut:]
+                    break
+                end = close + len(ENTITY_CLOSE)
+                if state == "keep":
+                    yield buf[:end]
+                buf = buf[end:]
+                state = "outside"
+        if eof:
+            if buf and state != "skip":
+                yield buf
+            return
+
+
+class ChunkReader:
+    """Minimal file-like ``read()`` over an iterator of byte chunks, for ``iterparse``."""
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self._chunks = chunks
+        self._buf = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buf) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buf += chunk
+        if size < 0:
+            size = len(self._buf)
+        data, self._buf = self._buf[:size], self._buf[size:]
+        return data
+
+
+def solution_documents(source: Path, wanted: set[str]) -> Iterator[tuple[str, Callable[[], IO[bytes]], bool]]:
+    """Yield ``(name, opener, prefilter)`` for each XML document to parse.
+
+    ``prefilter`` is set for whole-solution ``customizations.xml`` files,
+    where unwanted entity blocks can be dropped before parsing.
+    """
+    if source.is_file():
+        with zipfile.ZipFile(source) as archive:
+            member = next((n for n in archive.namelist() if n.lower() == "customizations.xml"), None)
+            if member is None:
+                raise FileNotFoundError(f"No customizations.xml in {source}")
+            yield member, lambda: archive.open(member), True
+        return
+
+    candidates = [p for p in source.iterdir() if p.name.lower() == "customizations.xml"]
+    candidates += [p for p in (source / "Other").glob("*.xml") if p.name.lower() == "customizations.xml"]
+    entity_files = [p for p in sorted(source.glob("Entities/*/Entity.xml")) if p.parent.name.lower() in wanted]
+    relationship_files = sorted((source / "Other" / "Relationships").glob("*.xml"))
+    if not (candidates or entity_files):
+        raise FileNotFoundError(f"No customizations.xml or Entities/*/Entity.xml under {source}")
+    for path in candidates:
+        yield str(path.relative_to(source)), lambda path=path: open(path, "rb"), True
+    for path in entity_files + relationship_files:
+        yield str(path.relative_to(source)), lambda path=path: open(path, "rb"), False
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Diff
+# ═══════════════════════════════════════════════════════════════════════════
+
+def diff_table(
+    table: dict[str, Any],
+    exported: ExportedEntity,
+    shared: bool,
+) -> Iterator[Drift]:
+    name = table["logicalName"]
+    primary = primary_name_column(table)
+    expected = {primary: {"logicalName": primary, "type": "String"}}
+    expected.update({col["logicalName"]: col for col in table["columns"]})
+
+    for column, col in expected.items():
+        attr = exported.attributes.get(column)
+        if attr is None:
+            yield Drift(name, "missing-attribute", column, "in schema.json but not in the export")
+            continue
+        want_type = XML_TYPES[col["type"]]
+        if attr.type != want_type:
+            yield Drift(name, "type", column, f"schema {col['type']} ({want_type}), export {attr.type}")
+            continue
+        if col["type"] in ("DateTime", "DateOnly") and attr.format:
+            want_format = "date" if col["type"] == "DateOnly" else "datetime"
+            if attr.format != want_format:
+                yield Drift(name, "format", column, f"schema {want_format}, export {attr.format}")
+        if col["type"] == "String" and "maxLength" in col and attr.max_length != col["maxLength"]:
+            yield Drift(name, "max-length", column, f"schema {col['maxLength']}, export {attr.max_length}")
+        if column != primary:
+            want_required = "required" if col.get("required") else "none"
+            if attr.required_level in ("required", "none", "recommended") and attr.required_level != want_required:
+                yield Drift(name, "required", column, f"schema {want_required}, export {attr.required_level}")
+        for flag, want in column_flags(col, column == primary).items():
+            if attr.flags[flag] != want:
+                yield Drift(name, "flag", column, f"{flag}: schema {want}, export {attr.flags[flag]}")
+        if col["type"] == "Choice":
+            want_options = {value: label for label, value in option_values(col).items()}
+            for value in sorted(want_options.keys() | attr.options.keys()):
+                if want_options.get(value) != attr.options.get(value):
+                    yield Drift(name, "option", f"{column}={value}",
+                                f"schema {want_options.get(value)!r}, export {attr.options.get(value)!r}")
+
+    for column, attr in sorted(exported.attributes.items()):
+        if column in expected or not attr.is_custom:
+            continue
+        # Shared tables carry other apps' columns; only SimQuip's own prefix counts as drift there
+        if not shared or column.startswith(SIMQUIP_COLUMN_PREFIX):
+            yield Drift(name, "extra-attribute", column, f"{attr.type} in the export but not in schema.json")
+
+    want_keys = {key["name"].lower(): [c.lower() for c in key["columns"]] for key in table.get("alternateKeys", [])}
+    for key_name in sorted(want_keys.keys() | exported.keys.keys()):
+        want, have = want_keys.get(key_name), exported.keys.get(key_name)
+        if want != have and (want is not None or not shared):
+            yield Drift(name, "alternate-key", key_name, f"schema {want}, export {have}")
+
+
+def diff_relationships(
+    tables: list[dict[str, Any]],
+    simquip_tables: set[str],
+    relationships: list[ExportedRelationship],
+) -> Iterator[Drift]:
+    by_lookup = {(r.referencing_entity, r.referencing_attribute): r for r in relationships}
+    expected = set()
+    for table in tables:
+        for col in table["columns"]:
+            if col["type"] != "Lookup":
+                continue
+            key = (table["logicalName"], col["logicalName"])
+            expected.add(key)
+            rel = by_lookup.get(key)
+            if rel is None:
+                yield Drift(table["logicalName"], "missing-relationship", col["logicalName"],
+                            f"no 1:N relationship from {col['target']}")
+            elif rel.referenced_entity != col["target"]:
+                yield Drift(table["logicalName"], "relationship-target", col["logicalName"],
+                            f"schema {col['target']}, export {rel.referenced_entity} ({rel.name})")
+    for (entity, attribute), rel in sorted(by_lookup.items()):
+        if entity in simquip_tables and (entity, attribute) not in expected:
+            yield Drift(entity, "extra-relationship", attribute, f"{rel.name} -> {rel.referenced_entity}")
+
+
+def detect(source: Path, schema: dict[str, Any]) -> tuple[list[Drift], dict[str, int]]:
+    tables = all_tables(schema)
+    simquip_tables = {t["logicalName"] for t in schema["tables"]}
+    wanted = {t["logicalName"] for t in tables}
+    entities: dict[str, ExportedEntity] = {}
+    relationships: list[ExportedRelationship] = []
+    documents = 0
+    for name, opener, prefilter in solution_documents(source, wanted):
+        found: dict[str, ExportedEntity] = {}
+        found_relationships: list[ExportedRelationship] = []
+        try:
+            with opener() as stream:
+                parse_stream(ChunkReader(wanted_entity_chunks(stream, wanted)) if prefilter else stream,
+                             wanted, found, found_relationships)
+        except ParseError:
+            if not prefilter:
+                raise
+            print(f"  {name}: pre-filtered XML did not parse; reading it in full", file=sys.stderr)
+            found, found_relationships = {}, []
+            with opener() as stream:
+                parse_stream(stream, wanted, found, found_relationships)
+        for logical_name, entity in found.items():
+            merged = entities.setdefault(logical_name, ExportedEntity(logical_name))
+            merged.attributes.update(entity.attributes)
+            merged.keys.update(entity.keys)
+        relationships.extend(found_relationships)
+        documents += 1
+
+    drift: list[Drift] = []
+    for table in tables:
+        exported = entities.get(table["logicalName"])
+        if exported is None:
+            drift.append(Drift(table["logicalName"], "missing-entity", table["logicalName"], "not in the export"))
+            continue
+        drift.extend(diff_table(table, exported, table["logicalName"] not in simquip_tables))
+    drift.extend(diff_relationships(tables, simquip_tables, relationships))
+    stats = {"documents": documents, "entities": len(entities), "relationships": len(relationships)}
+    return drift, stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Diff an exported solution against schema.json.")
+    parser.add_argument("source", type=Path, help="Exported solution .zip, extracted export, or pac-unpacked folder")
+    parser.add_argument("--json", type=Path, help="Also write the drift report as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        drift, stats = detect(args.source, load_schema())
+    except (FileNotFoundError, zipfile.BadZipFile, ParseError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    elapsed = time.perf_counter() - started
+
+    current = None
+    for item in sorted(drift, key=lambda d: (d.table, d.kind, d.item)):
+        if item.table != current:
+            current = item.table
+            print(f"\n{current}")
+        print(f"  {item.kind:<22} {item.item:<36} {item.detail}")
+    print(f"\n{len(drift)} differences; read {stats['documents']} document(s), {stats['entities']} SimQuip "
+          f"entities, {stats['relationships']} relationships in {elapsed:.1f}s", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"source": str(args.source), "differences": [asdict(d) for d in drift], **stats}, f, indent=2)
+    sys.exit(1 if drift else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""SimQuip overdue-loan sweeper.
+
+Finds Active ``redi_loantransfer`` rows whose ``redi_duedate`` has passed with
+a server-side ``$filter`` (paged, selecting only the primary key) and flips
+them to Overdue in chunks, so the app no longer has to scan every loan to
+spot them. Only Active loans are selected, which makes the job idempotent:
+a second run straight after the first finds nothing to do.
+
+Updates go through ``UpdateMultiple`` by default. ``--optimistic`` sends them
+as ``$batch`` PATCHes with ``If-Match`` on the ETag that was read, so a loan
+returned or edited between the read and the write is skipped rather than
+overwritten.
+
+Run once from cron / a scheduled task, or keep it running with ``--interval``.
+
+Usage: python3 dataverse/sweep-overdue-loans.py [--as-of YYYY-MM-DD] [--chunk-size 500] [--workers 4]
+                                                [--optimistic] [--dry-run] [--interval SECONDS]
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from dv_client import DataverseClient, DataverseError, chunked
+from dv_schema import entity_set_name, get_table, load_schema, option_values, primary_key
+
+LOAN_TABLE = "redi_loantransfer"
+STATUS_COLUMN = "redi_loanstatus"
+DUE_DATE_COLUMN = "redi_duedate"
+
+# $batch is limited to 1000 operations per request
+MAX_BATCH_OPERATIONS = 1000
+
+
+def loan_status_values() -> tuple[int, int]:
+    """Return the (Active, Overdue) choice values from schema.json."""
+    table = get_table(load_schema(), LOAN_TABLE)
+    col = next(c for c in table["columns"] if c["logicalName"] == STATUS_COLUMN)
+    values = option_values(col)
+    return values["Active"], values["Overdue"]
+
+
+def find_overdue(client: DataverseClient, active: int, as_of: date) -> list[tuple[str, str | None]]:
+    """Return ``(loan_id, etag)`` for every Active loan due before ``as_of``."""
+    pk = primary_key(LOAN_TABLE)
+    loans = []
+    for page in client.iter_pages(
+        entity_set_name(LOAN_TABLE),
+        select=[pk],
+        filter=f"{STATUS_COLUMN} eq {active} and {DUE_DATE_COLUMN} lt {as_of.isoformat()}",
+    ):
+        loans.extend((row[pk], row.get("@odata.etag")) for row in page)
+    return loans
+
+
+def update_chunk(client: DataverseClient, chunk: list[tuple[str, str | None]], overdue: int) -> int:
+    pk = primary_key(LOAN_TABLE)
+    client.update_multiple(
+        entity_set_name(LOAN_TABLE),
+        LOAN_TABLE,
+        [{pk: loan_id, STATUS_COLUMN: overdue} for loan_id, _etag in chunk],
+    )
+    return len(chunk)
+
+
+def patch_chunk(client: DataverseClient, chunk: list[tuple[str, str | None]], overdue: int) -> int:
+    """PATCH each loan with If-Match; loans changed since the read return 412 and are skipped."""
+    entity_set = entity_set_name(LOAN_TABLE)
+    operations = [
+        (
+            "PATCH",
+            f"{entity_set}({loan_id})",
+            {STATUS_COLUMN: overdue},
+            {"If-Match": etag} if etag else None,
+        )
+        for loan_id, etag in chunk
+    ]
+    results = client.batch(operations)
+    failures = [(loan_id, status, body) for (loan_id, _e), (status, body) in zip(chunk, results)
+                if status >= 400 and status != 412]
+    if failures:
+        loan_id, status, body = failures[0]
+        raise DataverseError(status, f"{len(failures)} update(s) failed, first {loan_id}: {body}")
+    return sum(1 for status, _body in results if status < 300)
+
+
+def sweep(client: DataverseClient, args: argparse.Namespace, active: int, overdue: int) -> bool:
+    """Run one sweep; returns False if any chunk failed."""
+    started = time.monotonic()
+    as_of = date.fromisoformat(args.as_of) if args.as_of else date.today()
+    loans = find_overdue(client, active, as_of)
+    print(f"Found {len(loans)} Active loans due before {as_of} ({time.monotonic() - started:.1f}s)")
+    if not loans or args.dry_run:
+        return True
+
+    update = patch_chunk if args.optimistic else update_chunk
+    chunk_size = min(args.chunk_size, MAX_BATCH_OPERATIONS) if args.optimistic else args.chunk_size
+    updated = 0
+    ok = True
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(update, client, chunk, overdue) for chunk in chunked(loans, chunk_size)]
+        for future in as_completed(futures):
+            try:
+                updated += future.result()
+            except DataverseError as e:
+                print(f"  FAILED chunk: {e.message}", file=sys.stderr)
+                ok = False
+    skipped = f", {len(loans) - updated} skipped" if args.optimistic else ""
+    print(f"Marked {updated} loans Overdue{skipped} ({time.monotonic() - started:.1f}s)")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Flip past-due Active loans to Overdue.")
+    parser.add_argument("--as-of", help="Treat this date (YYYY-MM-DD) as today")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Loans per update request (default 500)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent update requests (default 4)")
+    parser.add_argument("--optimistic", action="store_true", help="Use $batch PATCH with If-Match instead of UpdateMultiple")
+    parser.add_argument("--dry-run", action="store_true", help="Report matching loans without updating them")
+    parser.add_argument("--interval", type=int, help="Repeat every N seconds instead of running once")
+    args = parser.parse_args()
+
+    active, overdue = loan_status_values()
+    client = DataverseClient()
+
+    if not args.interval:
+        sys.exit(0 if sweep(client, args, active, overdue) else 1)
+    while True:
+        try:
+            sweep(client, args, active, overdue)
+        except DataverseError as e:
+            print(f"Sweep failed: {e.message}", file=sys.stderr)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
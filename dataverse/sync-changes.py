@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""SimQuip incremental delta sync using Dataverse change tracking.
+
+The first run for a table reads every row with ``Prefer: odata.track-changes``
+and stores the returned ``@odata.deltaLink`` in ``sync-state.json``. Later
+runs request only that delta link, so they fetch just the rows created,
+updated or deleted since the previous run and the time taken follows the
+change volume rather than the table size.
+
+Each run writes one change file per table with changes:
+
+    <out-dir>/changes/<table>/<UTC timestamp>.jsonl        incremental
+    <out-dir>/changes/<table>/<UTC timestamp>-full.jsonl   initial / resync
+
+with one ``{"op": "upsert", "row": {...}}`` or ``{"op": "delete", "id": ...}``
+line per change. Consumers should replace their copy of a table when they
+see a ``-full`` file. Delta links that Dataverse has expired trigger a full
+resync automatically.
+
+Change tracking does not support ``$filter``, so shared tables are synced
+without their ``appFilter``. Tracking must be enabled on a table
+(``ChangeTrackingEnabled``); generate-solution.py enables it for SimQuip
+tables, and ``--enable-tracking`` turns it on for any that lack it.
+
+Usage: python3 dataverse/sync-changes.py [TABLE ...] [--out-dir sync] [--full] [--enable-tracking] [--workers 4]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from dv_client import MAX_PAGE_SIZE, DataverseClient, DataverseError
+from dv_schema import all_tables, entity_set_name, get_table, load_schema, select_columns
+
+STATE_FILE = "sync-state.json"
+
+# Status codes Dataverse returns for an expired or invalid delta token
+EXPIRED_TOKEN_STATUSES = {400, 410}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# State
+# ═══════════════════════════════════════════════════════════════════════════
+
+class SyncState:
+    """Per-table delta links persisted to ``sync-state.json``."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.tables: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            with open(path) as f:
+                self.tables = json.load(f)
+
+    def delta_link(self, table_name: str) -> str | None:
+        return self.tables.get(table_name, {}).get("deltaLink")
+
+    def save(self, table_name: str, delta_link: str, synced_at: str) -> None:
+        with self._lock:
+            self.tables[table_name] = {"deltaLink": delta_link, "syncedAt": synced_at}
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, "w") as f:
+                json.dump(self.tables, f, indent=2)
+            temp_path.replace(self.path)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Change tracking
+# ═══════════════════════════════════════════════════════════════════════════
+
+def tracking_enabled(client: DataverseClient, logical_name: str) -> bool:
+    meta = client.get(f"EntityDefinitions(LogicalName='{logical_name}')?$select=ChangeTrackingEnabled")
+    return bool(meta and meta.get("ChangeTrackingEnabled"))
+
+
+def enable_tracking(client: DataverseClient, logical_name: str) -> None:
+    """Turn on ChangeTrackingEnabled for a table and publish it."""
+    path = f"EntityDefinitions(LogicalName='{logical_name}')"
+    meta = client.checked("GET", path) or {}
+    meta.pop("@odata.context", None)
+    meta["ChangeTrackingEnabled"] = True
+    client.checked("PUT", path, meta, headers={"MSCRM.MergeLabels": "true"})
+    client.checked("POST", "PublishXml", {
+        "ParameterXml": f"<importexportxml><entities><entity>{logical_name}</entity></entities></importexportxml>",
+    })
+    print(f"  Enabled change tracking on {logical_name}")
+
+
+def sync_table(
+    client: DataverseClient,
+    table: dict[str, Any],
+    state: SyncState,
+    out_dir: Path,
+    full: bool,
+    page_size: int,
+) -> tuple[str, int, int, bool, float]:
+    """Fetch changes for one table; returns ``(name, upserts, deletes, was_full, seconds)``."""
+    logical_name = table["logicalName"]
+    delta_link = None if full else state.delta_link(logical_name)
+    started = time.monotonic()
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    try:
+        return _write_changes(client, table, state, out_dir, delta_link, stamp, page_size, started)
+    except DataverseError as e:
+        if delta_link is None or e.status not in EXPIRED_TOKEN_STATUSES:
+            raise
+        print(f"  {logical_name}: delta token rejected ({e.message}); running full resync")
+        return _write_changes(client, table, state, out_dir, None, stamp, page_size, started)
+
+
+def _write_changes(
+    client: DataverseClient,
+    table: dict[str, Any],
+    state: SyncState,
+    out_dir: Path,
+    delta_link: str | None,
+    stamp: str,
+    page_size: int,
+    started: float,
+) -> tuple[str, int, int, bool, float]:
+    logical_name = table["logicalName"]
+    table_dir = out_dir / "changes" / logical_name
+    table_dir.mkdir(parents=True, exist_ok=True)
+    is_full = delta_link is None
+    final_path = table_dir / f"{stamp}{'-full' if is_full else ''}.jsonl"
+    temp_path = final_path.with_suffix(".partial")
+
+    upserts = deletes = 0
+    next_link = None
+    try:
+        with open(temp_path, "w", encoding="utf-8") as out:
+            for rows, deleted_ids, link in client.iter_changes(
+                entity_set_name(logical_name),
+                select=select_columns(table),
+                delta_link=delta_link,
+                page_size=page_size,
+            ):
+                for row in rows:
+                    row.pop("@odata.etag", None)
+                    out.write(json.dumps({"op": "upsert", "row": row}, separators=(",", ":")) + "\n")
+                for record_id in deleted_ids:
+                    out.write(json.dumps({"op": "delete", "id": record_id}, separators=(",", ":")) + "\n")
+                upserts += len(rows)
+                deletes += len(deleted_ids)
+                next_link = link or next_link
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    if upserts or deletes or is_full:
+        temp_path.replace(final_path)
+    else:
+        temp_path.unlink()
+    if next_link:
+        state.save(logical_name, next_link, stamp)
+    return logical_name, upserts, deletes, is_full, time.monotonic() - started
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# Main Execution
+# ═══════════════════════════════════════════════════════════════════════════
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incrementally sync SimQuip tables via change tracking.")
+    parser.add_argument("tables", nargs="*", help="Table logical names (default: all schema tables)")
+    parser.add_argument("--out-dir", type=Path, default=Path("sync"), help="State and change files (default ./sync)")
+    parser.add_argument("--full", action="store_true", help="Ignore stored delta links and resync every row")
+    parser.add_argument("--enable-tracking", action="store_true", help="Enable change tracking where it is off")
+    parser.add_argument("--page-size", type=int, default=MAX_PAGE_SIZE, help="odata.maxpagesize (default 5000)")
+    parser.add_argument("--workers", type=int, default=4, help="Tables synced concurrently (default 4)")
+    args = parser.parse_args()
+
+    schema = load_schema()
+    try:
+        tables = [get_table(schema, name) for name in args.tables] or all_tables(schema)
+    except KeyError as e:
+        print(f"ERROR: {e.args[0]}", file=sys.stderr)
+        sys.exit(1)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+
+    client = DataverseClient()
+    state = SyncState(args.out_dir / STATE_FILE)
+
+    tracked = []
+    for table in tables:
+        logical_name = table["logicalName"]
+        if tracking_enabled(client, logical_name):
+            tracked.append(table)
+        elif args.enable_tracking:
+            enable_tracking(client, logical_name)
+            tracked.append(table)
+        else:
+            print(f"  Skipping {logical_name}: change tracking is not enabled (use --enable-tracking)")
+
+    failed = False
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(sync_table, client, table, state, args.out_dir, args.full, args.page_size): table
+            for table in tracked
+        }
+        for future in as_completed(futures):
+            logical_name = futures[future]["logicalName"]
+            try:
+                name, upserts, deletes, was_full, elapsed = future.result()
+            except Exception as e:  # report every table, even if one fails
+                print(f"  FAILED {logical_name}: {e}", file=sys.stderr)
+                failed = True
+                continue
+            kind = "full" if was_full else "delta"
+            print(f"  {name} ({kind}): {upserts} upserted, {deletes} deleted ({elapsed:.1f}s)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
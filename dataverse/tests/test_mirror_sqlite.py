@@ -0,0 +1,86 @@
+"""Tests for mirror-sqlite.py's change-file loader.
+
+Run with: python3 -m unittest discover -s dataverse/tests
+"""
+
+import contextlib
+import importlib.util
+import io
+import json
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+DATAVERSE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(DATAVERSE_DIR))
+
+from dv_schema import get_table, load_schema  # noqa: E402
+
+spec = importlib.util.spec_from_file_location("mirror_sqlite", DATAVERSE_DIR / "mirror-sqlite.py")
+mirror_sqlite = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mirror_sqlite)
+
+
+def upsert(row):
+    return {"op": "upsert", "row": row}
+
+
+class LoadSyncAppFilterTest(unittest.TestCase):
+    """Change tracking cannot filter shared tables, so load_sync applies appFilter itself."""
+
+    def setUp(self):
+        self.schema = load_schema()
+        self.conn = sqlite3.connect(":memory:")
+        mirror_sqlite.ensure_schema(self.conn, self.schema)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.sync_dir = Path(tmp.name)
+
+    def write_changes(self, table, file_name, changes):
+        table_dir = self.sync_dir / "changes" / table
+        table_dir.mkdir(parents=True, exist_ok=True)
+        with open(table_dir / file_name, "w", encoding="utf-8") as f:
+            for change in changes:
+                f.write(json.dumps(change) + "\n")
+
+    def load(self, table):
+        with contextlib.redirect_stdout(io.StringIO()):
+            mirror_sqlite.load_sync(self.conn, [get_table(self.schema, table)], self.sync_dir)
+
+    def mirrored_ids(self, table):
+        return {r[0] for r in self.conn.execute(f"SELECT {table}id FROM {table}")}
+
+    def test_full_snapshot_drops_other_apps_rows(self):
+        self.write_changes("redi_equipment", "0001-full.jsonl", [
+            upsert({"redi_equipmentid": "eq-simquip", "redi_sq_active": True}),
+            upsert({"redi_equipmentid": "eq-other-app", "redi_sq_active": None}),
+        ])
+        self.load("redi_equipment")
+        self.assertEqual(self.mirrored_ids("redi_equipment"), {"eq-simquip"})
+
+    def test_incremental_change_removes_rows_that_stop_matching(self):
+        self.write_changes("redi_equipment", "0001-full.jsonl", [
+            upsert({"redi_equipmentid": "eq-1", "redi_sq_active": True}),
+            upsert({"redi_equipmentid": "eq-2", "redi_sq_active": False}),
+        ])
+        self.load("redi_equipment")
+        self.write_changes("redi_equipment", "0002.jsonl", [
+            upsert({"redi_equipmentid": "eq-1", "redi_sq_active": None}),
+            upsert({"redi_equipmentid": "eq-3", "redi_sq_active": None}),
+        ])
+        self.load("redi_equipment")
+        self.assertEqual(self.mirrored_ids("redi_equipment"), {"eq-2"})
+
+    def test_lookup_filter_reads_the_value_property(self):
+        self.write_changes("redi_location", "0001-full.jsonl", [
+            upsert({"redi_locationid": "loc-simquip", "_redi_sq_buildingid_value": "bld-1"}),
+            upsert({"redi_locationid": "loc-other-app", "_redi_sq_buildingid_value": None}),
+        ])
+        self.load("redi_location")
+        self.assertEqual(self.mirrored_ids("redi_location"), {"loc-simquip"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,501 @@
+/*!
+ * Generated by dataverse/generate-ts-models.py from dataverse/schema.json.
+ * Do not edit this file directly; change schema.json and re-run the generator.
+ */
+
+// ── redi_building ─────────────────────────────────────────────────────────
+
+/** Building row as returned by the Web API. */
+export interface Redi_buildingsRow {
+  redi_buildingid: string
+  redi_building_name: string | null
+  redi_code: string | null
+}
+
+// ── redi_level ────────────────────────────────────────────────────────────
+
+/** Level row as returned by the Web API. */
+export interface Redi_levelsRow {
+  redi_levelid: string
+  redi_level_name: string | null
+  redi_sortorder: number | null
+  _redi_buildingid_value: string | null
+}
+
+// ── redi_team ─────────────────────────────────────────────────────────────
+
+/** Team row as returned by the Web API. */
+export interface Redi_teamsRow {
+  redi_teamid: string
+  redi_team_name: string | null
+  redi_teamcode: string | null
+  redi_active: boolean | null
+  _redi_maincontactpersonid_value: string | null
+  _redi_mainlocationid_value: string | null
+}
+
+// ── redi_teammember ───────────────────────────────────────────────────────
+
+/** Team Member row as returned by the Web API. */
+export interface Redi_teammembersRow {
+  redi_teammemberid: string
+  redi_teammember_name: string | null
+  redi_role: string | null
+  _redi_teamid_value: string | null
+  _redi_personid_value: string | null
+}
+
+// ── redi_mediablob ────────────────────────────────────────────────────────
+
+/** Media Blob row as returned by the Web API. */
+export interface Redi_mediablobsRow {
+  redi_mediablobid: string
+  redi_mediablob_name: string | null
+  redi_contenthash: string | null
+  redi_mimetype: string | null
+  redi_width: number | null
+  redi_height: number | null
+  redi_thumbnail: string | null
+  redi_preview: string | null
+}
+
+// ── redi_equipmentmedia ───────────────────────────────────────────────────
+
+export const Redi_equipmentmediasredi_mediatype = {
+  100000000: 'Image',
+  100000001: 'Attachment',
+} as const
+export type Redi_equipmentmediasredi_mediatype = keyof typeof Redi_equipmentmediasredi_mediatype
+
+/** Equipment Media row as returned by the Web API. */
+export interface Redi_equipmentmediasRow {
+  redi_equipmentmediaid: string
+  redi_equipmentmedia_name: string | null
+  redi_mediatype: Redi_equipmentmediasredi_mediatype | null
+  redi_filename: string | null
+  redi_mimetype: string | null
+  redi_fileurl: string | null
+  redi_file: string | null
+  redi_thumbnailurl: string | null
+  redi_previewurl: string | null
+  redi_sortorder: number | null
+  _redi_equipmentid_value: string | null
+  _redi_mediablobid_value: string | null
+}
+
+// ── redi_equipmentcontent ─────────────────────────────────────────────────
+
+/** Equipment Content row as returned by the Web API. */
+export interface Redi_equipmentcontentsRow {
+  redi_equipmentcontentid: string
+  redi_equipmentcontent_name: string | null
+  redi_itemkey: string | null
+  redi_checked: boolean | null
+  redi_lastchecked: string | null
+  redi_sortorder: number | null
+  _redi_equipmentid_value: string | null
+}
+
+// ── redi_locationmedia ────────────────────────────────────────────────────
+
+export const Redi_locationmediasredi_mediatype = {
+  100000000: 'Image',
+  100000001: 'Attachment',
+} as const
+export type Redi_locationmediasredi_mediatype = keyof typeof Redi_locationmediasredi_mediatype
+
+/** Location Media row as returned by the Web API. */
+export interface Redi_locationmediasRow {
+  redi_locationmediaid: string
+  redi_locationmedia_name: string | null
+  redi_mediatype: Redi_locationmediasredi_mediatype | null
+  redi_filename: string | null
+  redi_mimetype: string | null
+  redi_fileurl: string | null
+  redi_file: string | null
+  redi_thumbnailurl: string | null
+  redi_previewurl: string | null
+  redi_sortorder: number | null
+  _redi_locationid_value: string | null
+  _redi_mediablobid_value: string | null
+}
+
+// ── redi_loantransfer ─────────────────────────────────────────────────────
+
+export const Redi_loantransfersredi_reasoncode = {
+  100000000: 'Simulation',
+  100000001: 'Training',
+  100000002: 'Service',
+  100000003: 'Other',
+} as const
+export type Redi_loantransfersredi_reasoncode = keyof typeof Redi_loantransfersredi_reasoncode
+
+export const Redi_loantransfersredi_loanstatus = {
+  100000000: 'Draft',
+  100000001: 'Active',
+  100000002: 'Overdue',
+  100000003: 'Returned',
+  100000004: 'Cancelled',
+} as const
+export type Redi_loantransfersredi_loanstatus = keyof typeof Redi_loantransfersredi_loanstatus
+
+/** Loan Transfer row as returned by the Web API. */
+export interface Redi_loantransfersRow {
+  redi_loantransferid: string
+  redi_loantransfer_name: string | null
+  redi_startdate: string | null
+  redi_duedate: string | null
+  redi_reasoncode: Redi_loantransfersredi_reasoncode | null
+  redi_loanstatus: Redi_loantransfersredi_loanstatus | null
+  redi_isinternaltransfer: boolean | null
+  redi_notes: string | null
+  _redi_equipmentid_value: string | null
+  _redi_originteamid_value: string | null
+  _redi_recipientteamid_value: string | null
+  _redi_approverpersonid_value: string | null
+}
+
+// ── redi_dashboardmetric ──────────────────────────────────────────────────
+
+/** Dashboard Metric row as returned by the Web API. */
+export interface Redi_dashboardmetricsRow {
+  redi_dashboardmetricid: string
+  redi_dashboardmetric_name: string | null
+  redi_metrickey: string | null
+  redi_total: number | null
+  redi_payloadjson: string | null
+  redi_computedon: string | null
+}
+
+// ── redi_person ───────────────────────────────────────────────────────────
+
+/** Person row as returned by the Web API. */
+export interface Redi_personsRow {
+  redi_personid: string
+  redi_displayname: string | null
+  redi_email: string | null
+  redi_phone: string | null
+  redi_active: boolean | null
+}
+
+// ── redi_location ─────────────────────────────────────────────────────────
+
+/** Location row as returned by the Web API. */
+export interface Redi_locationsRow {
+  redi_locationid: string
+  redi_departmentname: string | null
+  redi_sq_description: string | null
+  _redi_sq_buildingid_value: string | null
+  _redi_sq_levelid_value: string | null
+  redi_sq_locationpath: string | null
+  redi_sq_locationsortkey: string | null
+  _redi_contactpersonid_value: string | null
+}
+
+// ── redi_equipment ────────────────────────────────────────────────────────
+
+export const Redi_equipmentsredi_sq_ownertype = {
+  1: 'Team',
+  2: 'Person',
+} as const
+export type Redi_equipmentsredi_sq_ownertype = keyof typeof Redi_equipmentsredi_sq_ownertype
+
+export const Redi_equipmentsredi_sq_status = {
+  1: 'Available',
+  2: 'InUse',
+  3: 'UnderMaintenance',
+  4: 'Retired',
+} as const
+export type Redi_equipmentsredi_sq_status = keyof typeof Redi_equipmentsredi_sq_status
+
+/** Equipment row as returned by the Web API. */
+export interface Redi_equipmentsRow {
+  redi_equipmentid: string
+  redi_itemname: string | null
+  redi_equipmentcode: string | null
+  redi_sq_description: string | null
+  redi_sq_ownertype: Redi_equipmentsredi_sq_ownertype | null
+  redi_sq_status: Redi_equipmentsredi_sq_status | null
+  redi_sq_active: boolean | null
+  redi_keyimageurl: string | null
+  redi_sq_keythumbnailurl: string | null
+  redi_contentslistjson: string | null
+  redi_quickstartflowchartjson: string | null
+  redi_sq_hierarchypath: string | null
+  redi_sq_hierarchydepth: number | null
+  _redi_ownerteamid_value: string | null
+  _redi_ownerpersonid_value: string | null
+  _redi_sq_contactpersonid_value: string | null
+  _redi_sq_homelocationid_value: string | null
+  _redi_parentequipmentid_value: string | null
+  _redi_sq_rootequipmentid_value: string | null
+}
+
+// ── Projections ──────────────────────────────────────────────────────────────
+
+/** Column projections per view: `list` for getAll, `detail` for getById. */
+export interface TableProjection {
+  list: readonly string[]
+  detail: readonly string[]
+}
+
+/** Keyed by entity set name (the adapter `tableName`). */
+export const tableProjections: Record<string, TableProjection> = {
+  redi_buildings: {
+    list: ['redi_buildingid', 'redi_building_name', 'redi_code'],
+    detail: ['redi_buildingid', 'redi_building_name', 'redi_code'],
+  },
+  redi_levels: {
+    list: ['redi_levelid', 'redi_level_name', 'redi_sortorder', '_redi_buildingid_value'],
+    detail: ['redi_levelid', 'redi_level_name', 'redi_sortorder', '_redi_buildingid_value'],
+  },
+  redi_teams: {
+    list: [
+      'redi_teamid',
+      'redi_team_name',
+      'redi_teamcode',
+      'redi_active',
+      '_redi_maincontactpersonid_value',
+      '_redi_mainlocationid_value',
+    ],
+    detail: [
+      'redi_teamid',
+      'redi_team_name',
+      'redi_teamcode',
+      'redi_active',
+      '_redi_maincontactpersonid_value',
+      '_redi_mainlocationid_value',
+    ],
+  },
+  redi_teammembers: {
+    list: [
+      'redi_teammemberid',
+      'redi_teammember_name',
+      'redi_role',
+      '_redi_teamid_value',
+      '_redi_personid_value',
+    ],
+    detail: [
+      'redi_teammemberid',
+      'redi_teammember_name',
+      'redi_role',
+      '_redi_teamid_value',
+      '_redi_personid_value',
+    ],
+  },
+  redi_mediablobs: {
+    list: [
+      'redi_mediablobid',
+      'redi_mediablob_name',
+      'redi_contenthash',
+      'redi_mimetype',
+      'redi_width',
+      'redi_height',
+      'redi_thumbnail',
+      'redi_preview',
+    ],
+    detail: [
+      'redi_mediablobid',
+      'redi_mediablob_name',
+      'redi_contenthash',
+      'redi_mimetype',
+      'redi_width',
+      'redi_height',
+      'redi_thumbnail',
+      'redi_preview',
+    ],
+  },
+  redi_equipmentmedias: {
+    list: [
+      'redi_equipmentmediaid',
+      'redi_equipmentmedia_name',
+      'redi_mediatype',
+      'redi_filename',
+      'redi_mimetype',
+      'redi_fileurl',
+      'redi_file',
+      'redi_thumbnailurl',
+      'redi_previewurl',
+      'redi_sortorder',
+      '_redi_equipmentid_value',
+      '_redi_mediablobid_value',
+    ],
+    detail: [
+      'redi_equipmentmediaid',
+      'redi_equipmentmedia_name',
+      'redi_mediatype',
+      'redi_filename',
+      'redi_mimetype',
+      'redi_fileurl',
+      'redi_file',
+      'redi_thumbnailurl',
+      'redi_previewurl',
+      'redi_sortorder',
+      '_redi_equipmentid_value',
+      '_redi_mediablobid_value',
+    ],
+  },
+  redi_equipmentcontents: {
+    list: [
+      'redi_equipmentcontentid',
+      'redi_equipmentcontent_name',
+      'redi_itemkey',
+      'redi_checked',
+      'redi_lastchecked',
+      'redi_sortorder',
+      '_redi_equipmentid_value',
+    ],
+    detail: [
+      'redi_equipmentcontentid',
+      'redi_equipmentcontent_name',
+      'redi_itemkey',
+      'redi_checked',
+      'redi_lastchecked',
+      'redi_sortorder',
+      '_redi_equipmentid_value',
+    ],
+  },
+  redi_locationmedias: {
+    list: [
+      'redi_locationmediaid',
+      'redi_locationmedia_name',
+      'redi_mediatype',
+      'redi_filename',
+      'redi_mimetype',
+      'redi_fileurl',
+      'redi_file',
+      'redi_thumbnailurl',
+      'redi_previewurl',
+      'redi_sortorder',
+      '_redi_locationid_value',
+      '_redi_mediablobid_value',
+    ],
+    detail: [
+      'redi_locationmediaid',
+      'redi_locationmedia_name',
+      'redi_mediatype',
+      'redi_filename',
+      'redi_mimetype',
+      'redi_fileurl',
+      'redi_file',
+      'redi_thumbnailurl',
+      'redi_previewurl',
+      'redi_sortorder',
+      '_redi_locationid_value',
+      '_redi_mediablobid_value',
+    ],
+  },
+  redi_loantransfers: {
+    list: [
+      'redi_loantransferid',
+      'redi_loantransfer_name',
+      'redi_startdate',
+      'redi_duedate',
+      'redi_reasoncode',
+      'redi_loanstatus',
+      'redi_isinternaltransfer',
+      '_redi_equipmentid_value',
+      '_redi_originteamid_value',
+      '_redi_recipientteamid_value',
+      '_redi_approverpersonid_value',
+    ],
+    detail: [
+      'redi_loantransferid',
+      'redi_loantransfer_name',
+      'redi_startdate',
+      'redi_duedate',
+      'redi_reasoncode',
+      'redi_loanstatus',
+      'redi_isinternaltransfer',
+      'redi_notes',
+      '_redi_equipmentid_value',
+      '_redi_originteamid_value',
+      '_redi_recipientteamid_value',
+      '_redi_approverpersonid_value',
+    ],
+  },
+  redi_dashboardmetrics: {
+    list: [
+      'redi_dashboardmetricid',
+      'redi_dashboardmetric_name',
+      'redi_metrickey',
+      'redi_total',
+      'redi_computedon',
+    ],
+    detail: [
+      'redi_dashboardmetricid',
+      'redi_dashboardmetric_name',
+      'redi_metrickey',
+      'redi_total',
+      'redi_payloadjson',
+      'redi_computedon',
+    ],
+  },
+  redi_persons: {
+    list: ['redi_personid', 'redi_displayname', 'redi_email', 'redi_phone', 'redi_active'],
+    detail: ['redi_personid', 'redi_displayname', 'redi_email', 'redi_phone', 'redi_active'],
+  },
+  redi_locations: {
+    list: [
+      'redi_locationid',
+      'redi_departmentname',
+      'redi_sq_description',
+      '_redi_sq_buildingid_value',
+      '_redi_sq_levelid_value',
+      'redi_sq_locationpath',
+      'redi_sq_locationsortkey',
+      '_redi_contactpersonid_value',
+    ],
+    detail: [
+      'redi_locationid',
+      'redi_departmentname',
+      'redi_sq_description',
+      '_redi_sq_buildingid_value',
+      '_redi_sq_levelid_value',
+      'redi_sq_locationpath',
+      'redi_sq_locationsortkey',
+      '_redi_contactpersonid_value',
+    ],
+  },
+  redi_equipments: {
+    list: [
+      'redi_equipmentid',
+      'redi_itemname',
+      'redi_equipmentcode',
+      'redi_sq_ownertype',
+      'redi_sq_status',
+      'redi_sq_active',
+      'redi_keyimageurl',
+      'redi_sq_keythumbnailurl',
+      'redi_sq_hierarchypath',
+      'redi_sq_hierarchydepth',
+      '_redi_ownerteamid_value',
+      '_redi_ownerpersonid_value',
+      '_redi_sq_contactpersonid_value',
+      '_redi_sq_homelocationid_value',
+      '_redi_parentequipmentid_value',
+      '_redi_sq_rootequipmentid_value',
+    ],
+    detail: [
+      'redi_equipmentid',
+      'redi_itemname',
+      'redi_equipmentcode',
+      'redi_sq_description',
+      'redi_sq_ownertype',
+      'redi_sq_status',
+      'redi_sq_active',
+      'redi_keyimageurl',
+      'redi_sq_keythumbnailurl',
+      'redi_contentslistjson',
+      'redi_quickstartflowchartjson',
+      'redi_sq_hierarchypath',
+      'redi_sq_hierarchydepth',
+      '_redi_ownerteamid_value',
+      '_redi_ownerpersonid_value',
+      '_redi_sq_contactpersonid_value',
+      '_redi_sq_homelocationid_value',
+      '_redi_parentequipmentid_value',
+      '_redi_sq_rootequipmentid_value',
+    ],
+  },
+}
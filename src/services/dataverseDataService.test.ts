@@ -0,0 +1,60 @@
+import { describe, it, expect, vi } from 'vitest'
+import type { DataClient } from '@microsoft/power-apps/data'
+import { DataverseDataService } from './dataverseDataService.ts'
+import { equipmentAdapter } from './dataverseAdapters.ts'
+
+// ---------------------------------------------------------------------------
+// Helpers
+// ---------------------------------------------------------------------------
+
+function fakeClient(data: Record<string, unknown>) {
+  const executeAsync = vi.fn().mockResolvedValue({ success: true, data })
+  return { client: { executeAsync } as unknown as DataClient, executeAsync }
+}
+
+function selectedColumns(executeAsync: ReturnType<typeof vi.fn>): string[] {
+  const request = executeAsync.mock.calls[0][0] as {
+    connectorOperation: { parameters: { $select: string } }
+  }
+  return request.connectorOperation.parameters.$select.split(',')
+}
+
+// ---------------------------------------------------------------------------
+// Projections
+// ---------------------------------------------------------------------------
+
+describe('DataverseDataService projections', () => {
+  it('omits detail-only columns from list reads', async () => {
+    const { client, executeAsync } = fakeClient({
+      value: [{ redi_equipmentid: 'eq-1', redi_itemname: 'Defibrillator' }],
+    })
+    const service = new DataverseDataService(client, equipmentAdapter)
+
+    const result = await service.getAll()
+
+    const columns = selectedColumns(executeAsync)
+    expect(columns).toContain('redi_equipmentid')
+    expect(columns).toContain('redi_itemname')
+    expect(columns).not.toContain('redi_sq_description')
+    expect(columns).not.toContain('redi_contentslistjson')
+    expect(columns).not.toContain('redi_quickstartflowchartjson')
+    // Columns outside the projection read back as null
+    expect(result.data[0].description).toBeNull()
+  })
+
+  it('keeps detail-only columns in detail reads', async () => {
+    const { client, executeAsync } = fakeClient({
+      redi_equipmentid: 'eq-1',
+      redi_sq_description: 'Portable AED unit',
+    })
+    const service = new DataverseDataService(client, equipmentAdapter)
+
+    const item = await service.getById('eq-1')
+
+    const columns = selectedColumns(executeAsync)
+    expect(columns).toContain('redi_sq_description')
+    expect(columns).toContain('redi_contentslistjson')
+    expect(columns).toContain('redi_quickstartflowchartjson')
+    expect(item.description).toBe('Portable AED unit')
+  })
+})
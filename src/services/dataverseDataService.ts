@@ -1,5 +1,6 @@
 import type { DataClient, IOperationResult } from '@microsoft/power-apps/data'
 import { NotFoundError, TransientDependencyError } from '../errors'
+import { tableProjections } from '../generated/models/SimQuipTablesModel'
 import { withRetry } from '../utils/retry'
 import type { DataService, ListOptions, PagedResult } from './dataService'
 import type { ColumnAdapter } from './dataverseAdapters'
@@ -103,7 +104,7 @@ export class DataverseDataService<T extends Record<string, unknown>>
           accept: 'application/json',
           entityName: this.adapter.tableName,
           recordId: id,
-          $select: this.selectColumns().join(','),
+          $select: this.selectColumns('detail').join(','),
         },
       },
     })
@@ -208,11 +209,17 @@ export class DataverseDataService<T extends Record<string, unknown>>
 
   // ── Helpers ──────────────────────────────────────────────────────────────
 
-  /** Returns the Dataverse column names that actually exist on the entity (excludes virtual). */
-  private selectColumns(): string[] {
+  /**
+   * Returns the Dataverse column names that actually exist on the entity (excludes virtual),
+   * limited to the schema.json-generated projection for the view when one exists.
+   * Columns left out of a list projection read back as null.
+   */
+  private selectColumns(view: 'list' | 'detail'): string[] {
+    const projection = tableProjections[this.adapter.tableName]?.[view]
     return Object.entries(this.adapter.columns)
       .filter(([tsKey]) => !this.adapter.virtualColumns?.has(tsKey as keyof T & string))
       .map(([, dvCol]) => dvCol)
+      .filter((dvCol) => !projection || projection.includes(dvCol))
   }
 
   // ── Column mapping ───────────────────────────────────────────────────────
@@ -292,8 +299,8 @@ export class DataverseDataService<T extends Record<string, unknown>>
       entityName: this.adapter.tableName,
     }
 
-    // Select only real (non-virtual) columns
-    params.$select = this.selectColumns().join(',')
+    // Select only real (non-virtual) columns in the list projection (no memo columns)
+    params.$select = this.selectColumns('list').join(',')
 
     // Pagination
     if (options?.top) params.$top = options.top
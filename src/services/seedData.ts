@@ -330,7 +330,7 @@ export async function clearAllData(
   } else {
     for (const e of equipResult.data) {
       if (e.parentEquipmentId) {
-        await services.equipmentService.update(e.equipmentId, { ...e, parentEquipmentId: null })
+        await services.equipmentService.update(e.equipmentId, { parentEquipmentId: null })
       }
     }
     for (const e of equipResult.data) {